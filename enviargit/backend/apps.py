@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class BackendConfig(AppConfig):
+    """Infraestructura compartida por todas las apps (caché, etc.)"""
+    name = 'backend'
+
+    def ready(self):
+        from . import autocompletar, cache, medicion, sqlite
+        sqlite.conectar_senales()
+        medicion.instrumentar_serializers()
+        cache.conectar_senales()
+        autocompletar.conectar_senales()
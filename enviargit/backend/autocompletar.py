@@ -0,0 +1,321 @@
+"""
+Índice en memoria para la búsqueda global (/api/buscar/)
+
+Cada proceso carga clientes, productos y pedidos una sola vez (al iniciar el
+worker o en la primera búsqueda) en una lista ordenada de tokens, y responde
+cada tecla con búsquedas binarias por prefijo sin tocar la base de datos.
+
+El índice se actualiza de forma incremental con las señales post_save y
+post_delete, cuando la transacción confirma. Tiene su propia versión en
+backend.cache, que solo sube cuando cambia algo indexado (nombres,
+teléfonos, descripciones...), no con cada venta o cambio de estado, y cada
+subida registra qué (tipo, id) cambió. Cada proceso sabe cuánto subió él
+mismo: si la versión no es la que espera, otro proceso cambió algo y la
+siguiente búsqueda vuelve a leer solo esas filas (una consulta por tipo).
+Solo las escrituras masivas sin señales (importación, fusión, datos
+sintéticos), que llaman a invalidar_indice sin detalle, recargan todo.
+"""
+import heapq
+import logging
+import re
+import threading
+import unicodedata
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+
+from .cache import cambios, invalidar, subir, versiones
+
+logger = logging.getLogger(__name__)
+
+TIPOS = ['cliente', 'producto', 'pedido']
+
+DOMINIO = 'busqueda'  # Versión del índice en backend.cache
+
+LIMITE_POR_DEFECTO = 10
+LIMITE_MAXIMO = 50
+
+# Para prefijos muy cortos ("a") no se revisan más de estas entradas
+LIMITE_CANDIDATOS = 2000
+
+MIN_SUFIJO_TELEFONO = 4
+
+_FIN_DE_PREFIJO = '\U0010ffff'
+
+
+def normalizar(texto):
+    """Minúsculas y sin tildes: 'Muñoz' -> 'munoz'"""
+    texto = unicodedata.normalize('NFKD', str(texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def tokens(*textos):
+    return {token for texto in textos for token in re.findall(r'\w+', normalizar(texto))}
+
+
+def _entrada_cliente(cliente):
+    digitos = re.sub(r'\D', '', cliente.telefono or '')
+    # Los sufijos del teléfono también son tokens: "2233" encuentra "300 111 2233"
+    sufijos = [digitos[i:] for i in range(len(digitos) - MIN_SUFIJO_TELEFONO + 1)]
+    return {
+        'tipo': 'cliente',
+        'id': cliente.id,
+        'titulo': cliente.nombre,
+        'detalle': cliente.telefono,
+        'tokens': tokens(cliente.nombre, cliente.telefono, cliente.email, *sufijos),
+    }
+
+
+def _entrada_producto(producto):
+    return {
+        'tipo': 'producto',
+        'id': producto.id,
+        'titulo': producto.nombre,
+        'detalle': ' · '.join(filter(None, [producto.marca, producto.color])),
+        'tokens': tokens(producto.nombre, producto.marca, producto.color),
+    }
+
+
+def _entrada_pedido(pedido, nombre_cliente):
+    return {
+        'tipo': 'pedido',
+        'id': pedido.id,
+        'titulo': f'Pedido #{pedido.id}',
+        'detalle': f'{nombre_cliente} - {pedido.descripcion[:60]}',
+        'tokens': tokens(pedido.id, pedido.descripcion, nombre_cliente),
+        'cliente_id': pedido.cliente_id,
+        'descripcion': pedido.descripcion,
+    }
+
+
+class IndicePrefijos:
+    """Lista ordenada de (token, tipo, id) más las entradas por (tipo, id)"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tokens = []
+        self._entradas = {}
+        self._pedidos_por_cliente = {}
+        self._version = None
+
+    @property
+    def cargado(self):
+        return self._version is not None
+
+    def cargar(self):
+        """Leer todo desde la base de datos (3 consultas)"""
+        from clientes.models import Cliente
+        from inventario.models import Producto
+        from pedidos.models import Pedido
+
+        version, = versiones([DOMINIO])
+        entradas = [_entrada_cliente(c) for c in Cliente.objects.only('nombre', 'telefono', 'email')]
+        entradas += [_entrada_producto(p) for p in Producto.objects.only('nombre', 'marca', 'color')]
+        entradas += [
+            _entrada_pedido(p, p.cliente.nombre)
+            for p in Pedido.objects.select_related('cliente').only('descripcion', 'cliente__nombre')
+        ]
+
+        with self._lock:
+            self._entradas = {(e['tipo'], e['id']): e for e in entradas}
+            self._tokens = sorted(
+                (token, e['tipo'], e['id']) for e in entradas for token in e['tokens']
+            )
+            self._pedidos_por_cliente = {}
+            for e in entradas:
+                if e['tipo'] == 'pedido':
+                    self._pedidos_por_cliente.setdefault(e['cliente_id'], set()).add(e['id'])
+            self._version = version
+
+    def descartar(self):
+        """Olvidar lo cargado; se vuelve a leer en la siguiente búsqueda"""
+        with self._lock:
+            self._version = None
+
+    def _quitar(self, clave):
+        entrada = self._entradas.pop(clave, None)
+        if entrada is None:
+            return
+        for token in entrada['tokens']:
+            i = bisect_left(self._tokens, (token, *clave))
+            if i < len(self._tokens) and self._tokens[i] == (token, *clave):
+                del self._tokens[i]
+        if entrada['tipo'] == 'pedido':
+            self._pedidos_por_cliente.get(entrada['cliente_id'], set()).discard(entrada['id'])
+
+    def _poner(self, entrada):
+        clave = (entrada['tipo'], entrada['id'])
+        self._quitar(clave)
+        self._entradas[clave] = entrada
+        for token in entrada['tokens']:
+            insort(self._tokens, (token, *clave))
+        if entrada['tipo'] == 'pedido':
+            self._pedidos_por_cliente.setdefault(entrada['cliente_id'], set()).add(entrada['id'])
+
+    def guardado(self, instance):
+        """Aplicar un guardado confirmado de Cliente, Producto o Pedido"""
+        with self._lock:
+            if self.cargado and not self._aplicar(instance):
+                return  # No cambió nada indexado: los demás procesos no necesitan releer
+            self._subir_version((_TIPO_POR_MODELO[type(instance).__name__], instance.pk))
+
+    def _aplicar(self, instance):
+        """Actualizar la entrada del objeto. Retorna False si quedó igual"""
+        from clientes.models import Cliente
+        from inventario.models import Producto
+
+        if isinstance(instance, Cliente):
+            entrada = _entrada_cliente(instance)
+        elif isinstance(instance, Producto):
+            entrada = _entrada_producto(instance)
+        else:
+            cliente = self._entradas.get(('cliente', instance.cliente_id))
+            entrada = _entrada_pedido(instance, cliente['titulo'] if cliente else '')
+        if self._entradas.get((entrada['tipo'], entrada['id'])) == entrada:
+            return False
+
+        self._poner(entrada)
+        if entrada['tipo'] == 'cliente':
+            # El nombre del cliente también es parte de sus pedidos
+            for pedido_id in list(self._pedidos_por_cliente.get(instance.id, ())):
+                anterior = self._entradas[('pedido', pedido_id)]
+                self._poner(_entrada_pedido(_PedidoGuardado(anterior), instance.nombre))
+        return True
+
+    def borrado(self, tipo, pk):
+        """Aplicar un borrado confirmado"""
+        with self._lock:
+            if self.cargado:
+                self._quitar((tipo, pk))
+            self._subir_version((tipo, pk))
+
+    def _subir_version(self, clave):
+        """Avisar a los demás procesos de un cambio que este ya aplicó"""
+        esperada = self._version + 1 if self.cargado else None
+        if subir(DOMINIO, [clave]) == esperada:
+            self._version = esperada
+        # Si no, otro proceso también subió la versión: al no coincidir con
+        # self._version, la siguiente búsqueda lee sus cambios
+
+    def _ponerse_al_dia(self):
+        """Aplicar lo que cambiaron otros procesos desde la versión cargada"""
+        version, = versiones([DOMINIO])
+        if self.cargado and version == self._version:
+            return
+        pendientes = cambios(DOMINIO, self._version, version) if self.cargado else None
+        if pendientes is None:
+            self.cargar()
+        else:
+            self._releer(pendientes)
+            self._version = version
+
+    def _releer(self, claves):
+        """Volver a leer solo las filas de `claves` ((tipo, id)), una consulta por tipo"""
+        from clientes.models import Cliente
+        from inventario.models import Producto
+        from pedidos.models import Pedido
+
+        consultas = {
+            'cliente': Cliente.objects.only('nombre', 'telefono', 'email'),
+            'producto': Producto.objects.only('nombre', 'marca', 'color'),
+            'pedido': Pedido.objects.select_related('cliente').only('descripcion', 'cliente__nombre'),
+        }
+        ids = defaultdict(set)
+        for tipo, pk in claves:
+            ids[tipo].add(pk)
+        # Primero los clientes: el nombre del cliente es parte de sus pedidos
+        for tipo in TIPOS:
+            if not ids[tipo]:
+                continue
+            encontrados = list(consultas[tipo].filter(pk__in=ids[tipo]))
+            for instance in encontrados:
+                self._aplicar(instance)
+            for pk in ids[tipo] - {instance.pk for instance in encontrados}:
+                self._quitar((tipo, pk))
+
+    def buscar(self, texto, limite=LIMITE_POR_DEFECTO, tipos=None):
+        """Las `limite` mejores coincidencias para todas las palabras de `texto`"""
+        palabras = sorted(tokens(texto), key=len, reverse=True)
+        if not palabras:
+            return []
+
+        with self._lock:
+            self._ponerse_al_dia()
+
+            # Recorrer solo el rango de la palabra más larga (la más selectiva)
+            principal, resto = palabras[0], palabras[1:]
+            inicio = bisect_left(self._tokens, (principal,))
+            fin = bisect_left(self._tokens, (principal + _FIN_DE_PREFIJO,), inicio)
+
+            candidatos = {}
+            for token, tipo, pk in self._tokens[inicio:min(fin, inicio + LIMITE_CANDIDATOS)]:
+                if tipos and tipo not in tipos:
+                    continue
+                if (tipo, pk) in candidatos:
+                    continue
+                entrada = self._entradas[(tipo, pk)]
+                if all(any(t.startswith(p) for t in entrada['tokens']) for p in resto):
+                    # Primero las palabras completas, luego clientes, productos y pedidos
+                    exactas = sum(p in entrada['tokens'] for p in palabras)
+                    puntaje = (-exactas, TIPOS.index(tipo), len(entrada['titulo']), pk)
+                    candidatos[(tipo, pk)] = (puntaje, entrada)
+
+        mejores = heapq.nsmallest(limite, candidatos.values(), key=lambda c: c[0])
+        return [
+            {'tipo': e['tipo'], 'id': e['id'], 'titulo': e['titulo'], 'detalle': e['detalle']}
+            for _, e in mejores
+        ]
+
+
+class _PedidoGuardado:
+    """Lo mínimo de un pedido para reconstruir su entrada sin ir a la base de datos"""
+
+    def __init__(self, entrada):
+        self.id = entrada['id']
+        self.cliente_id = entrada['cliente_id']
+        self.descripcion = entrada['descripcion']
+
+
+indice = IndicePrefijos()
+
+
+def precargar():
+    """Cargar el índice al iniciar el worker (si falla, se carga en la primera búsqueda)"""
+    try:
+        indice.cargar()
+    except Exception as e:
+        logger.warning('No se pudo cargar el índice de búsqueda: %s', e)
+
+
+def invalidar_indice():
+    """
+    Para escrituras masivas sin señales (bulk_create, update()) de campos
+    indexados. No dice qué cambió: todos los procesos recargan el índice.
+    """
+    invalidar(DOMINIO)
+
+
+def _al_guardar(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(lambda: indice.guardado(instance))
+
+
+def _al_borrar(sender, instance, **kwargs):
+    # Django pone el pk en None después del borrado: guardarlo ahora
+    tipo, pk = _TIPO_POR_MODELO[sender.__name__], instance.pk
+    transaction.on_commit(lambda: indice.borrado(tipo, pk))
+
+
+_TIPO_POR_MODELO = {'Cliente': 'cliente', 'Producto': 'producto', 'Pedido': 'pedido'}
+
+
+def conectar_senales():
+    from clientes.models import Cliente
+    from inventario.models import Producto
+    from pedidos.models import Pedido
+
+    for modelo in (Cliente, Producto, Pedido):
+        post_save.connect(_al_guardar, sender=modelo, dispatch_uid=f'autocompletar_guardar_{modelo.__name__}')
+        post_delete.connect(_al_borrar, sender=modelo, dispatch_uid=f'autocompletar_borrar_{modelo.__name__}')
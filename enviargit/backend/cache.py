@@ -0,0 +1,184 @@
+"""
+Caché versionada para los endpoints de dashboard
+
+Cada dominio (una app: clientes, inventario, pedidos, finanzas) tiene un
+contador de versión compartido por los workers. Las respuestas se guardan
+bajo una clave que incluye las versiones de los dominios de los que dependen,
+así que al guardar o borrar cualquier modelo del dominio basta con subir su
+contador para que la siguiente lectura recalcule.
+
+Los contadores van en su propio alias de caché (`versiones` en
+settings.CACHES), que no se descarta al llenarse como la de las respuestas:
+si un contador se perdiera volvería a 1 y se servirían respuestas viejas
+guardadas con esa versión. Se suben con un candado de archivo para que dos
+workers que suben a la vez no pierdan una de las dos subidas.
+"""
+import logging
+import threading
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: runserver es un solo proceso, basta el candado entre hilos
+    fcntl = None
+
+DOMINIOS = ['clientes', 'inventario', 'pedidos', 'finanzas']
+
+ALIAS_VERSIONES = 'versiones'
+# Últimas subidas cuyo detalle se guarda por dominio (ver cambios())
+TAMANO_REGISTRO = 1000
+
+TIMEOUT_RESPUESTAS = 300  # Red de seguridad para ventanas móviles (últimos 30 días, etc.)
+
+# nombre -> función cacheada, para precalentar al iniciar el proceso
+REGISTRO = {}
+
+
+_candado_hilos = threading.Lock()
+
+
+def _contadores():
+    return caches[ALIAS_VERSIONES] if ALIAS_VERSIONES in settings.CACHES else cache
+
+
+def _clave_version(dominio):
+    return f'version:{dominio}'
+
+
+@contextmanager
+def _candado():
+    """Exclusión entre hilos y, con fcntl, entre los procesos que comparten la caché"""
+    with _candado_hilos:
+        ubicacion = settings.CACHES.get(ALIAS_VERSIONES, {}).get('LOCATION')
+        if fcntl is None or not ubicacion:
+            yield
+            return
+        Path(ubicacion).mkdir(parents=True, exist_ok=True)
+        with open(Path(ubicacion) / 'versiones.lock', 'a') as archivo:
+            fcntl.flock(archivo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(archivo, fcntl.LOCK_UN)
+
+
+def versiones(dominios):
+    """Versión actual de cada dominio (1 si nunca se ha subido)"""
+    claves = [_clave_version(d) for d in dominios]
+    actuales = _contadores().get_many(claves)
+    return tuple(actuales.get(clave, 1) for clave in claves)
+
+
+def _clave_cambio(dominio, version):
+    # Registro circular: la versión guardada con el detalle dice si es vigente
+    return f'cambio:{dominio}:{version % TAMANO_REGISTRO}'
+
+
+def subir(dominio, cambio=None):
+    """
+    Subir ya la versión de `dominio`. `cambio` (una lista) describe qué
+    cambió, para que los demás procesos lo lean con cambios(). Retorna la
+    nueva versión.
+    """
+    contadores = _contadores()
+    clave = _clave_version(dominio)
+    with _candado():
+        version = contadores.get(clave, 1) + 1
+        # El detalle antes que la versión: quien vea la versión nueva ya lo encuentra
+        if cambio is not None:
+            contadores.set(_clave_cambio(dominio, version), (version, list(cambio)), timeout=None)
+        contadores.set(clave, version, timeout=None)
+    return version
+
+
+def cambios(dominio, desde, hasta):
+    """
+    Lo registrado con subir() en las versiones posteriores a `desde` hasta
+    `hasta`, en una sola lista. None si alguna subida no tiene detalle (o ya
+    salió del registro): hay que recalcular todo.
+    """
+    if not 0 <= hasta - desde <= TAMANO_REGISTRO:
+        return None
+    numeros = range(desde + 1, hasta + 1)
+    guardados = _contadores().get_many([_clave_cambio(dominio, v) for v in numeros])
+    resultado = []
+    for version in numeros:
+        guardado = guardados.get(_clave_cambio(dominio, version))
+        if guardado is None or guardado[0] != version:
+            return None
+        resultado.extend(guardado[1])
+    return resultado
+
+
+def invalidar(*dominios):
+    """Subir la versión de los dominios cuando la transacción actual confirme"""
+    def subir_todos():
+        for dominio in dominios:
+            subir(dominio)
+
+    transaction.on_commit(subir_todos)
+
+
+def en_cache(nombre, dominios, timeout=TIMEOUT_RESPUESTAS):
+    """
+    Decorador para funciones que calculan el payload de un dashboard.
+    La clave incluye el nombre, las versiones de los dominios, la fecha local
+    y los argumentos de la llamada (los mismos parámetros del endpoint).
+    """
+    def decorador(funcion):
+        @wraps(funcion)
+        def envoltura(**params):
+            clave = 'respuesta:{}:{}:{}:{}'.format(
+                nombre,
+                '.'.join(str(v) for v in versiones(dominios)),
+                timezone.localdate().isoformat(),
+                sorted(params.items()),
+            )
+            data = cache.get(clave)
+            if data is None:
+                metricas.contar('bordados_cache_fallos_total', payload=nombre)
+                data = funcion(**params)
+                cache.set(clave, data, timeout)
+            else:
+                metricas.contar('bordados_cache_aciertos_total', payload=nombre)
+            return data
+
+        envoltura.sin_cache = funcion
+        REGISTRO[nombre] = envoltura
+        return envoltura
+
+    return decorador
+
+
+def precalentar():
+    """Calcular los dashboards registrados con sus parámetros por defecto"""
+    autodiscover_modules('reportes')
+    for nombre, funcion in REGISTRO.items():
+        try:
+            funcion()
+        except Exception as e:
+            logger.warning('No se pudo precalentar %s: %s', nombre, e)
+
+
+def _invalidar_por_modelo(sender, **kwargs):
+    dominio = sender._meta.app_label
+    if dominio in DOMINIOS:
+        invalidar(dominio)
+
+
+def conectar_senales():
+    post_save.connect(_invalidar_por_modelo, dispatch_uid='cache_invalidar_post_save')
+    post_delete.connect(_invalidar_por_modelo, dispatch_uid='cache_invalidar_post_delete')
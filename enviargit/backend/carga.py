@@ -0,0 +1,260 @@
+"""
+Generador de carga concurrente dentro del proceso
+
+Varios hilos llaman al WSGIHandler de Django, el mismo que usa gunicorn, con
+una mezcla de operaciones del día a día: ventas de mostrador, pagos de
+pedidos, consultas de dashboard y búsquedas. Se recorre el stack completo:
+middlewares, routers de base de datos, caché, escritura agrupada, y cada
+request abre y cierra su conexión como en producción. No pasa por la red,
+así que mide el backend y no el servidor HTTP.
+
+El resultado es un dict serializable a JSON, con el throughput, las
+latencias p50/p95/p99 y los errores por endpoint, para compararlo entre
+commits. Escribe ventas y pagos de verdad: úselo sobre una base sembrada con
+`sembrar_datos`, nunca sobre la de producción.
+"""
+import io
+import json
+import logging
+import platform
+import random
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+
+import django
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.db import connections
+from django.db.models import F
+from django.utils import timezone
+
+from clientes.models import Cliente
+from inventario.models import Producto
+from pedidos.models import Pedido
+
+# operación -> peso en la mezcla
+MEZCLA = {'venta': 20, 'pago': 10, 'dashboard': 40, 'busqueda': 30}
+
+DASHBOARDS = [
+    '/api/finanzas/dashboard/resumen_general/',
+    '/api/finanzas/dashboard/ingresos_por_periodo/',
+    '/api/finanzas/dashboard/productos_mas_vendidos/',
+    '/api/pedidos/pedidos/dashboard/',
+    '/api/clientes/clientes/estadisticas/',
+    '/api/inventario/productos/alertas_stock/',
+]
+MUESTRA = 2000  # Clientes, productos y pedidos de donde se eligen los datos de cada request
+HOST = 'localhost'  # Permitido con DEBUG aunque ALLOWED_HOSTS esté vacío
+
+
+def leer_mezcla(texto):
+    """'venta=20,pago=10' -> {'venta': 20, 'pago': 10}. Lanza ValueError si es inválida"""
+    mezcla = {}
+    for parte in texto.split(','):
+        operacion, _, peso = parte.partition('=')
+        operacion = operacion.strip()
+        if operacion not in MEZCLA:
+            raise ValueError(f'Operación desconocida "{operacion}". Opciones: {", ".join(MEZCLA)}')
+        mezcla[operacion] = float(peso)
+    if not any(peso > 0 for peso in mezcla.values()):
+        raise ValueError('La mezcla necesita al menos una operación con peso mayor a cero')
+    return mezcla
+
+
+def percentil(ordenados, p):
+    """Percentil p (0-100) por rango más cercano de una lista ya ordenada"""
+    if not ordenados:
+        return None
+    return ordenados[min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))]
+
+
+class Datos:
+    """Ids y textos reales de la base para armar requests válidos"""
+
+    def __init__(self):
+        self.productos = list(
+            Producto.objects.filter(cantidad_actual__gt=0).values_list('id', 'precio_venta')[:MUESTRA]
+        )
+        self.pedidos = list(
+            Pedido.objects.filter(adelanto_pagado__lt=F('precio_total'))
+            .exclude(estado='cancelado').values_list('id', flat=True)[:MUESTRA]
+        )
+        nombres = Cliente.objects.values_list('id', 'nombre')[:MUESTRA]
+        self.clientes = [pk for pk, _ in nombres]
+        self.palabras = sorted({palabra for _, nombre in nombres for palabra in nombre.split() if len(palabra) > 3})
+
+    def faltantes(self, mezcla):
+        """Operaciones de la mezcla que no tienen datos para armarse"""
+        requisitos = {'venta': self.productos, 'pago': self.pedidos, 'busqueda': self.palabras}
+        return [op for op, peso in mezcla.items() if peso > 0 and not requisitos.get(op, True)]
+
+
+def armar(operacion, datos, rng):
+    """(endpoint, método, ruta, query, cuerpo) de una operación"""
+    if operacion == 'venta':
+        lineas = rng.sample(datos.productos, min(len(datos.productos), rng.choice([1, 1, 2, 3])))
+        detalles = [
+            {'producto': pk, 'cantidad': rng.choice([1, 1, 2]), 'precio_unitario': str(precio)}
+            for pk, precio in lineas
+        ]
+        subtotal = sum(Decimal(d['precio_unitario']) * d['cantidad'] for d in detalles)
+        return 'POST ventas-directas', 'POST', '/api/finanzas/ventas-directas/', '', {
+            'cliente': rng.choice(datos.clientes) if datos.clientes and rng.random() < 0.6 else None,
+            'metodo_pago': rng.choice(['efectivo', 'efectivo', 'transferencia', 'tarjeta']),
+            'subtotal': str(subtotal), 'descuento': '0', 'total': str(subtotal), 'detalles': detalles,
+        }
+    if operacion == 'pago':
+        pedido = rng.choice(datos.pedidos)
+        return 'POST agregar_pago', 'POST', f'/api/pedidos/pedidos/{pedido}/agregar_pago/', '', {
+            'monto': str(rng.choice([1000, 5000, 10000])), 'metodo_pago': 'transferencia',
+        }
+    if operacion == 'dashboard':
+        ruta = rng.choice(DASHBOARDS)
+        return f'GET {ruta}', 'GET', ruta, '', None
+    prefijo = rng.choice(datos.palabras)[:rng.randrange(3, 6)]
+    if rng.random() < 0.5:
+        return 'GET buscar', 'GET', '/api/buscar/', f'q={prefijo}', None
+    return 'GET clientes?buscar', 'GET', '/api/clientes/clientes/', f'buscar={prefijo}', None
+
+
+def _entorno(metodo, ruta, query, cuerpo):
+    contenido = json.dumps(cuerpo).encode() if cuerpo is not None else b''
+    return {
+        'REQUEST_METHOD': metodo,
+        'PATH_INFO': ruta,
+        'SCRIPT_NAME': '',
+        'QUERY_STRING': query,
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'CONTENT_TYPE': 'application/json',
+        'CONTENT_LENGTH': str(len(contenido)),
+        'wsgi.input': io.BytesIO(contenido),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.url_scheme': 'http',
+        'wsgi.version': (1, 0),
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+
+
+def solicitar(handler, metodo, ruta, query='', cuerpo=None):
+    """Ejecutar un request por WSGI. Retorna (código, cuerpo)"""
+    estado = []
+    respuesta = handler(_entorno(metodo, ruta, query, cuerpo), lambda s, encabezados, exc=None: estado.append(s))
+    try:
+        contenido = b''.join(respuesta)
+    finally:
+        if hasattr(respuesta, 'close'):
+            respuesta.close()
+    return int(estado[0].split()[0]), contenido
+
+
+@contextmanager
+def _sin_advertencias_4xx():
+    # Los pagos rechazados por saldo son parte de la carga: no llenar la consola
+    logger = logging.getLogger('django.request')
+    nivel = logger.level
+    logger.setLevel(logging.ERROR)
+    try:
+        yield
+    finally:
+        logger.setLevel(nivel)
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, timeout=5,
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def correr(segundos=30, hilos=8, mezcla=None, semilla=1):
+    """Ejecutar la carga y retornar el reporte (ver el docstring del módulo)"""
+    mezcla = mezcla or MEZCLA
+    datos = Datos()
+    faltantes = datos.faltantes(mezcla)
+    if faltantes:
+        raise ValueError(f'No hay datos para: {", ".join(faltantes)}. Ejecute sembrar_datos primero')
+    operaciones, pesos = zip(*[(op, peso) for op, peso in mezcla.items() if peso > 0])
+
+    handler = WSGIHandler()
+    resultados = defaultdict(lambda: {'latencias': [], 'codigos': defaultdict(int), 'bloqueos': 0, 'excepciones': 0})
+    candado = threading.Lock()
+    fin = time.monotonic() + segundos
+
+    def trabajar(numero):
+        rng = random.Random(semilla * 1000 + numero)
+        propios = []
+        try:
+            while time.monotonic() < fin:
+                endpoint, metodo, ruta, query, cuerpo = armar(rng.choices(operaciones, pesos)[0], datos, rng)
+                inicio = time.perf_counter()
+                try:
+                    codigo, contenido = solicitar(handler, metodo, ruta, query, cuerpo)
+                except Exception:
+                    codigo, contenido = None, b''
+                propios.append((endpoint, time.perf_counter() - inicio, codigo, b'database is locked' in contenido))
+        finally:
+            connections.close_all()
+            with candado:
+                for endpoint, duracion, codigo, bloqueo in propios:
+                    resultado = resultados[endpoint]
+                    resultado['latencias'].append(duracion)
+                    if codigo is None:
+                        resultado['excepciones'] += 1
+                    else:
+                        resultado['codigos'][str(codigo)] += 1
+                    resultado['bloqueos'] += bloqueo
+
+    inicio = time.perf_counter()
+    with _sin_advertencias_4xx():
+        trabajadores = [threading.Thread(target=trabajar, args=(i,), name=f'carga-{i}') for i in range(hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+    duracion = time.perf_counter() - inicio
+
+    endpoints = {}
+    for endpoint, resultado in sorted(resultados.items()):
+        latencias = sorted(resultado.pop('latencias'))
+        endpoints[endpoint] = {
+            'solicitudes': len(latencias),
+            'por_segundo': round(len(latencias) / duracion, 2),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+            'max_ms': round(latencias[-1] * 1000, 2),
+            'codigos': dict(resultado['codigos']),
+            'errores': sum(n for c, n in resultado['codigos'].items() if int(c) >= 500) + resultado['excepciones'],
+            'bloqueos': resultado['bloqueos'],
+        }
+    total = sum(e['solicitudes'] for e in endpoints.values())
+    return {
+        'fecha': timezone.now().isoformat(),
+        'commit': _commit(),
+        'entorno': {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'escritura_agrupada': getattr(settings, 'ESCRITURA_AGRUPADA', False),
+        },
+        'parametros': {'segundos': segundos, 'hilos': hilos, 'mezcla': dict(mezcla), 'semilla': semilla},
+        'duracion_s': round(duracion, 2),
+        'solicitudes': total,
+        'por_segundo': round(total / duracion, 2),
+        'errores': sum(e['errores'] for e in endpoints.values()),
+        'bloqueos': sum(e['bloqueos'] for e in endpoints.values()),
+        'endpoints': endpoints,
+    }
@@ -0,0 +1,361 @@
+"""
+Datos sintéticos a escala de producción para pruebas de carga
+
+`sembrar(escala)` crea clientes, categorías, productos, pedidos con sus
+detalles y pagos, y ventas directas con sus detalles y movimientos de
+inventario. Las fechas siguen el calendario del taller: más movimiento de
+lunes a sábado en horario de 8 a 19 y un volumen que crece hacia el presente.
+Los clientes frecuentes concentran la mayoría de las compras y los métodos de
+pago siguen una distribución realista (ver METODOS_*).
+
+Todo se inserta con bulk_create por lotes, una transacción por lote, y al
+final se recalculan los datos derivados que las señales no mantienen con
+bulk_create: métricas de clientes, resumen diario de ingresos, versiones de
+la caché y del índice de búsqueda. El historial de stock es coherente: cada producto empieza con lo
+vendido más su stock final y los movimientos encadenan cantidad_anterior y
+cantidad_nueva. Con la misma semilla se obtienen los mismos datos.
+"""
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from clientes import metricas
+from clientes.models import Cliente
+from finanzas import rollup
+from finanzas.models import DetalleVentaDirecta, MovimientoInventario, PagoPedido, VentaDirecta
+from inventario.models import Categoria, Producto
+from pedidos.models import DetallePedido, Pedido
+from .autocompletar import invalidar_indice
+from .cache import DOMINIOS, invalidar
+
+TAMANO_LOTE = 5000
+
+NOMBRES = [
+    'Ana', 'Andrés', 'Camila', 'Carlos', 'Carolina', 'Daniel', 'Diana', 'Felipe', 'Gloria',
+    'Jorge', 'Juan', 'Julián', 'Laura', 'Luis', 'Luz', 'María', 'Mauricio', 'Natalia',
+    'Óscar', 'Paola', 'Pedro', 'Sandra', 'Santiago', 'Valentina', 'Yolanda',
+]
+APELLIDOS = [
+    'Álvarez', 'Castro', 'Díaz', 'Gómez', 'González', 'Gutiérrez', 'Hernández', 'Jiménez',
+    'López', 'Martínez', 'Moreno', 'Muñoz', 'Ortiz', 'Pérez', 'Ramírez', 'Restrepo',
+    'Rodríguez', 'Rojas', 'Sánchez', 'Torres', 'Vargas',
+]
+EMPRESAS = [
+    'Dotaciones', 'Uniformes', 'Confecciones', 'Colegio', 'Club Deportivo', 'Restaurante',
+    'Clínica', 'Constructora', 'Fundación', 'Almacén',
+]
+CATEGORIAS = [
+    'Hilos', 'Telas', 'Gorras', 'Camisetas', 'Camibusos', 'Chaquetas', 'Delantales',
+    'Parches', 'Estabilizadores', 'Agujas', 'Bolsos', 'Toallas',
+]
+MARCAS = ['Madeira', 'Isacord', 'Robison-Anton', 'Gunold', 'Coats', 'Genérica']
+COLORES = ['Blanco', 'Negro', 'Rojo', 'Azul', 'Verde', 'Amarillo', 'Gris', 'Vinotinto']
+
+# (valor, peso)
+METODOS_VENTA = [('efectivo', 55), ('transferencia', 25), ('tarjeta', 15), ('credito', 5)]
+METODOS_PAGO = [('efectivo', 45), ('transferencia', 40), ('tarjeta', 15)]
+TIPOS_CLIENTE = [('particular', 70), ('empresa', 22), ('mayorista', 8)]
+TIPOS_BORDADO = [('computarizado', 70), ('manual', 10), ('combinado', 20)]
+PESO_DIA_SEMANA = [1.0, 1.0, 1.0, 1.1, 1.3, 1.5, 0.2]  # Lunes a domingo
+HORA_APERTURA, HORA_CIERRE = 8, 19
+CRECIMIENTO = 1.0  # El último día tiene (1 + CRECIMIENTO) veces el volumen del primero
+VENTAS_SIN_CLIENTE = 0.4  # Ventas de mostrador sin cliente registrado
+
+
+@dataclass
+class Escala:
+    clientes: int = 1000
+    productos: int = 200
+    pedidos: int = 2000
+    ventas: int = 5000
+    dias: int = 365
+    semilla: int = 1
+    lote: int = TAMANO_LOTE
+
+
+def _elegir(rng, opciones):
+    valores, pesos = zip(*opciones)
+    return rng.choices(valores, pesos)[0]
+
+
+def _en_lotes(objetos, tamano):
+    lote = []
+    for objeto in objetos:
+        lote.append(objeto)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _pareto(n, sesgo=5):
+    """
+    Pesos acumulados 1/(posición + sesgo) para random.choices(cum_weights=...):
+    pocos elementos concentran la mayoría de las elecciones
+    """
+    return list(accumulate(1 / (i + sesgo) for i in range(n)))
+
+
+def _por_dia(total, dias, hoy):
+    """
+    [(fecha, cuántos)] de los `dias` anteriores a hoy, repartiendo `total`
+    según el día de la semana y el crecimiento
+    """
+    fechas = [hoy - timedelta(days=dias - i) for i in range(dias)]
+    pesos = [
+        PESO_DIA_SEMANA[fecha.weekday()] * (1 + CRECIMIENTO * i / max(dias - 1, 1))
+        for i, fecha in enumerate(fechas)
+    ]
+    suma = sum(pesos)
+    cantidades = [int(total * p / suma) for p in pesos]
+    # Lo que se perdió al truncar va a los días más recientes
+    for i in range(total - sum(cantidades)):
+        cantidades[-1 - i % dias] += 1
+    return list(zip(fechas, cantidades))
+
+
+def _momentos(rng, fecha, cantidad):
+    """`cantidad` fechas y horas aware del día, ordenadas, en horario del taller"""
+    inicio = timezone.make_aware(datetime.combine(fecha, time(HORA_APERTURA)))
+    segundos = (HORA_CIERRE - HORA_APERTURA) * 3600
+    return [inicio + timedelta(seconds=s) for s in sorted(rng.randrange(segundos) for _ in range(cantidad))]
+
+
+def _redondear(monto):
+    """Monto en pesos colombianos redondeado a la centena"""
+    return Decimal(int(monto) // 100 * 100)
+
+
+class Sembrador:
+    def __init__(self, escala, reporte=None):
+        self.escala = escala
+        self.reporte = reporte or (lambda mensaje: None)
+        self.rng = random.Random(escala.semilla)
+        self.hoy = timezone.localdate()
+        self.filas = defaultdict(int)
+
+    def _crear(self, modelo, objetos):
+        creados = modelo.objects.bulk_create(objetos, batch_size=self.escala.lote)
+        self.filas[modelo._meta.label] += len(creados)
+        return creados
+
+    def _insertar(self, modelo, objetos):
+        """bulk_create por lotes, una transacción por lote. Retorna los objetos con pk"""
+        creados = []
+        for lote in _en_lotes(objetos, self.escala.lote):
+            with transaction.atomic():
+                creados.extend(self._crear(modelo, lote))
+        return creados
+
+    def _calendario(self, total):
+        """`total` fechas y horas en orden cronológico, repartidas entre los días"""
+        for fecha, cantidad in _por_dia(total, self.escala.dias, self.hoy):
+            yield from _momentos(self.rng, fecha, cantidad)
+
+    def sembrar(self):
+        clientes = self.clientes()
+        self.reporte(f'{len(clientes)} clientes')
+        productos = self.productos()
+        self.reporte(f'{len(productos)} productos')
+        self.pedidos(clientes, productos)
+        self.reporte(f'{self.filas["pedidos.Pedido"]} pedidos')
+        self.ventas(clientes, productos)
+        self.reporte(f'{self.filas["finanzas.VentaDirecta"]} ventas directas')
+
+        # bulk_create no dispara las señales que mantienen estos datos
+        with transaction.atomic():
+            metricas.reconstruir()
+            rollup.reconstruir(self.hoy - timedelta(days=self.escala.dias), self.hoy)
+        invalidar(*DOMINIOS)
+        invalidar_indice()
+        return dict(self.filas)
+
+    # --- Clientes y productos --------------------------------------------------
+
+    def clientes(self):
+        """Lista de (id, descuento) de los clientes creados"""
+        rng = self.rng
+        # Teléfonos y emails únicos aunque la base ya tenga clientes
+        base = (Cliente.objects.aggregate(maximo=Max('id'))['maximo'] or 0) + 1
+        ahora = timezone.now()
+
+        def generar():
+            for i in range(base, base + self.escala.clientes):
+                tipo = _elegir(rng, TIPOS_CLIENTE)
+                if tipo == 'particular':
+                    nombre = f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}'
+                else:
+                    nombre = f'{rng.choice(EMPRESAS)} {rng.choice(APELLIDOS)} {rng.choice(["S.A.S", "Ltda", ""])}'.strip()
+                telefono = f'3{i % 10 ** 9:09d}'
+                email = f'cliente{i}@{"empresa.com.co" if tipo != "particular" else "gmail.com"}'
+                yield Cliente(
+                    nombre=nombre, telefono=telefono, telefono_canonico='57' + telefono,
+                    email=email if rng.random() < 0.7 else '', tipo_cliente=tipo,
+                    descuento_especial=Decimal(rng.choice([5, 10, 15])) if tipo == 'mayorista' else Decimal(0),
+                    # Antes de la primera compra posible
+                    fecha_registro=ahora - timedelta(days=self.escala.dias + rng.randrange(1, 365)),
+                )
+
+        return [(c.pk, c.descuento_especial) for c in self._insertar(Cliente, generar())]
+
+    def productos(self):
+        """Lista de (id, precio_venta); los primeros son los más vendidos"""
+        rng = self.rng
+        categorias = [Categoria.objects.get_or_create(nombre=nombre)[0] for nombre in CATEGORIAS]
+        # Stock inicial provisional: se corrige al final con lo vendido (ver ventas())
+        objetos = []
+        for i in range(self.escala.productos):
+            categoria = rng.choice(categorias)
+            compra = Decimal(rng.randrange(20, 400) * 100)  # De 2 mil a 40 mil
+            objetos.append(Producto(
+                nombre=f'{categoria.nombre} {rng.choice(COLORES)} ref {i + 1:04d}',
+                categoria=categoria, marca=rng.choice(MARCAS), color=rng.choice(COLORES),
+                cantidad_actual=0, stock_minimo=Decimal(rng.choice([5, 10, 20])),
+                precio_compra=compra, precio_venta=_redondear(compra * Decimal(rng.uniform(1.3, 2.2))),
+                proveedor=f'Proveedor {rng.randrange(1, 15)}',
+            ))
+        return [(p.pk, p.precio_venta) for p in self._insertar(Producto, objetos)]
+
+    # --- Pedidos ---------------------------------------------------------------
+
+    def pedidos(self, clientes, productos):
+        rng = self.rng
+        pesos_clientes = _pareto(len(clientes))
+        pesos_productos = _pareto(len(productos))
+        ahora = timezone.now()
+
+        def generar():
+            """(pedido, pagos, detalles) en orden cronológico"""
+            for momento in self._calendario(self.escala.pedidos):
+                cliente_id, _ = rng.choices(clientes, cum_weights=pesos_clientes)[0]
+                precio = _redondear(rng.lognormvariate(12.2, 0.8))  # Mediana ~200 mil
+                entrega = momento + timedelta(days=rng.randrange(3, 21))
+                if entrega < ahora:
+                    estado = 'cancelado' if rng.random() < 0.05 else 'entregado'
+                else:
+                    estado = rng.choice(['recibido', 'en_proceso', 'terminado'])
+
+                # Adelanto del 50% casi siempre; los entregados pagan el saldo al entregar
+                pagos = []
+                if estado != 'cancelado' and rng.random() < 0.9:
+                    pagos.append((momento, _redondear(precio / 2), 'Adelanto'))
+                if estado == 'entregado':
+                    pagos.append((entrega, precio - sum(p[1] for p in pagos), 'Pago final'))
+
+                pedido = Pedido(
+                    cliente_id=cliente_id, fecha_pedido=momento, fecha_entrega_prometida=entrega,
+                    fecha_entrega_real=entrega if estado == 'entregado' else None,
+                    tipo_bordado=_elegir(rng, TIPOS_BORDADO), estado=estado,
+                    descripcion=f'Bordado de logo en {rng.randrange(1, 60)} prendas',
+                    precio_total=precio, adelanto_pagado=sum((p[1] for p in pagos), Decimal(0)),
+                )
+                detalles = [
+                    (producto_id, Decimal(rng.randrange(1, 30)))
+                    for producto_id, _ in rng.choices(productos, cum_weights=pesos_productos, k=rng.randrange(1, 4))
+                ]
+                yield pedido, pagos, detalles
+
+        for lote in _en_lotes(generar(), self.escala.lote):
+            with transaction.atomic():
+                pedidos = self._crear(Pedido, [pedido for pedido, _, _ in lote])
+                self._crear(DetallePedido, [
+                    DetallePedido(pedido_id=pedido.pk, producto_id=producto_id, cantidad_usada=cantidad)
+                    for pedido, (_, _, detalles) in zip(pedidos, lote)
+                    for producto_id, cantidad in detalles
+                ])
+                self._crear(PagoPedido, [
+                    PagoPedido(
+                        pedido_id=pedido.pk, fecha_pago=momento, monto=monto,
+                        metodo_pago=_elegir(rng, METODOS_PAGO), concepto=concepto,
+                    )
+                    for pedido, (_, pagos, _) in zip(pedidos, lote)
+                    for momento, monto, concepto in pagos
+                    if monto > 0
+                ])
+
+    # --- Ventas directas ---------------------------------------------------------
+
+    def _lineas(self, semilla, productos):
+        """
+        Generador de las líneas (producto_id, precio, cantidad) de cada venta.
+        Con la misma semilla repite la misma secuencia: una primera pasada suma
+        lo vendido por producto y la segunda crea las ventas.
+        """
+        rng = random.Random(semilla)
+        pesos = _pareto(len(productos))
+        while True:
+            yield [
+                (producto_id, precio, Decimal(rng.choice([1, 1, 1, 1, 2, 2, 3, 6])))
+                for producto_id, precio in rng.choices(productos, cum_weights=pesos, k=rng.choice([1, 1, 1, 2, 2, 3, 4]))
+            ]
+
+    def ventas(self, clientes, productos):
+        rng = self.rng
+        semilla_lineas = rng.random()
+        pesos_clientes = _pareto(len(clientes))
+
+        vendido = defaultdict(Decimal)
+        lineas = self._lineas(semilla_lineas, productos)
+        for _ in range(self.escala.ventas):
+            for producto_id, _, cantidad in next(lineas):
+                vendido[producto_id] += cantidad
+        # Stock final entre 0 y 300 (algunos quedan bajo el mínimo para las alertas)
+        stock = {producto_id: vendido[producto_id] + rng.randrange(0, 300) for producto_id, _ in productos}
+
+        lineas = self._lineas(semilla_lineas, productos)
+
+        def generar():
+            """(venta, líneas) en orden cronológico"""
+            for momento in self._calendario(self.escala.ventas):
+                lineas_venta = next(lineas)
+                cliente_id, descuento_cliente = (
+                    (None, Decimal(0)) if rng.random() < VENTAS_SIN_CLIENTE
+                    else rng.choices(clientes, cum_weights=pesos_clientes)[0]
+                )
+                subtotal = sum((precio * cantidad for _, precio, cantidad in lineas_venta), Decimal(0))
+                descuento = _redondear(subtotal * descuento_cliente / 100)
+                metodo = _elegir(rng, METODOS_VENTA)
+                yield VentaDirecta(
+                    cliente_id=cliente_id, fecha_venta=momento, subtotal=subtotal,
+                    descuento=descuento, total=subtotal - descuento, metodo_pago=metodo,
+                    pagado=metodo != 'credito' or rng.random() < 0.6,
+                ), lineas_venta
+
+        for lote in _en_lotes(generar(), self.escala.lote):
+            detalles, movimientos = [], []
+            with transaction.atomic():
+                ventas = self._crear(VentaDirecta, [venta for venta, _ in lote])
+                for venta, (_, lineas_venta) in zip(ventas, lote):
+                    for producto_id, precio, cantidad in lineas_venta:
+                        detalles.append(DetalleVentaDirecta(
+                            venta_id=venta.pk, producto_id=producto_id, cantidad=cantidad,
+                            precio_unitario=precio, subtotal=precio * cantidad,
+                        ))
+                        anterior = stock[producto_id]
+                        stock[producto_id] = anterior - cantidad
+                        movimientos.append(MovimientoInventario(
+                            producto_id=producto_id, tipo_movimiento='salida_venta', cantidad=cantidad,
+                            cantidad_anterior=anterior, cantidad_nueva=anterior - cantidad,
+                            venta_directa_id=venta.pk, fecha=venta.fecha_venta,
+                            motivo=f'Venta directa #{venta.pk}', usuario='datos_sinteticos',
+                        ))
+                self._crear(DetalleVentaDirecta, detalles)
+                self._crear(MovimientoInventario, movimientos)
+
+        # Después de todas las ventas queda el stock final
+        with transaction.atomic():
+            for producto_id, cantidad in stock.items():
+                Producto.objects.filter(pk=producto_id).update(cantidad_actual=cantidad)
+
+
+def sembrar(escala, reporte=None):
+    """Crear los datos de `escala`. Retorna {modelo: filas creadas}"""
+    return Sembrador(escala, reporte).sembrar()
@@ -0,0 +1,144 @@
+"""
+Escrituras agrupadas (group commit) para los endpoints de escritura frecuente
+
+SQLite admite un solo escritor a la vez, aun en WAL: cada request que
+escribe toma el bloqueo, hace su COMMIT (un fsync) y lo suelta. Con
+settings.ESCRITURA_AGRUPADA activo, `ejecutar(unidad)` no escribe en el hilo
+del request. La unidad se encola para un hilo escritor por proceso, que junta
+lo que llegue en unos milisegundos (hasta LOTE_MAXIMO unidades), las ejecuta
+en una sola transacción con un savepoint por unidad y hace un solo COMMIT.
+
+Cada request recibe su propio resultado o su propia excepción. Si una unidad
+falla solo se revierte su savepoint; el resto del lote se confirma. Si falla
+el COMMIT, todas las unidades del lote reciben el error. Las llamadas
+hechas dentro de una transacción abierta (y los TestCase) se ejecutan en el
+mismo hilo, porque el escritor no vería sus cambios sin confirmar.
+
+Si el resultado no llega en ESPERA_RESULTADO segundos y la unidad aún no
+empezó, se cancela y se lanza TimeoutError: no se escribió nada. Si ya
+empezó, puede confirmarse todavía y se lanza ResultadoDesconocido; la vista
+responde 503 para que el cliente verifique antes de repetir (repetir una
+venta o un pago la registraría dos veces).
+
+Entre workers de gunicorn el bloqueo del archivo sigue serializando las
+escrituras (con transaction_mode=IMMEDIATE y el timeout se espera en lugar de
+fallar), pero cada worker lo pide una vez por lote y no una vez por request.
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+LOTE_MAXIMO = 32
+ESPERA = 0.002  # Segundos que el escritor espera a que lleguen más unidades
+ESPERA_RESULTADO = 30  # Segundos que un request espera su resultado
+
+
+class ResultadoDesconocido(Exception):
+    """La unidad empezó en el hilo escritor pero no terminó a tiempo: puede o no confirmarse"""
+
+    def __init__(self):
+        super().__init__(
+            'La operación tardó demasiado y no se sabe si quedó registrada. '
+            'Verifique antes de repetirla'
+        )
+
+
+class ColaEscritura:
+    def __init__(self, lote_maximo=LOTE_MAXIMO, espera=ESPERA):
+        self.lote_maximo = lote_maximo
+        self.espera = espera
+        self.lotes = 0
+        self.unidades = 0
+        self._cola = queue.SimpleQueue()
+        self._candado = threading.Lock()
+        self._hilo = None
+        self._pid = None
+
+    def enviar(self, unidad):
+        """Encolar `unidad` (una función sin argumentos). Retorna un Future con su resultado"""
+        futuro = Future()
+        self._cola.put((unidad, futuro))
+        self._arrancar()
+        return futuro
+
+    def _arrancar(self):
+        # Después de un fork (gunicorn --preload) el hilo no existe en el hijo
+        if self._pid == os.getpid() and self._hilo.is_alive():
+            return
+        with self._candado:
+            if self._pid != os.getpid() or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._recorrer, name='escritor', daemon=True)
+                self._pid = os.getpid()
+                self._hilo.start()
+
+    def _siguiente_lote(self):
+        lote = [self._cola.get()]
+        limite = time.monotonic() + self.espera
+        while len(lote) < self.lote_maximo:
+            restante = limite - time.monotonic()
+            try:
+                lote.append(self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait())
+            except queue.Empty:
+                break
+        return lote
+
+    def _recorrer(self):
+        while True:
+            lote = [(unidad, futuro) for unidad, futuro in self._siguiente_lote()
+                    if futuro.set_running_or_notify_cancel()]
+            if lote:
+                self.procesar(lote)
+
+    def procesar(self, lote):
+        """Ejecutar el lote en una transacción y entregar cada resultado después del COMMIT"""
+        resultados = []
+        try:
+            with transaction.atomic():
+                for unidad, futuro in lote:
+                    try:
+                        with transaction.atomic():
+                            resultados.append((futuro, unidad(), None))
+                    except Exception as e:
+                        resultados.append((futuro, None, e))
+        except Exception as e:
+            logger.exception('Falló el COMMIT de un lote de %s escritura(s)', len(lote))
+            connection.close()
+            for _, futuro in lote:
+                futuro.set_exception(e)
+            return
+
+        self.lotes += 1
+        self.unidades += len(lote)
+        for futuro, resultado, error in resultados:
+            if error is None:
+                futuro.set_result(resultado)
+            else:
+                futuro.set_exception(error)
+
+
+cola = ColaEscritura()
+
+
+def ejecutar(unidad):
+    """
+    Ejecutar `unidad()` en una transacción y retornar su resultado (o relanzar
+    su excepción), agrupada con otras si ESCRITURA_AGRUPADA está activo.
+    """
+    if not getattr(settings, 'ESCRITURA_AGRUPADA', False) or connection.in_atomic_block:
+        with transaction.atomic():
+            return unidad()
+    futuro = cola.enviar(unidad)
+    try:
+        return futuro.result(timeout=ESPERA_RESULTADO)
+    except TimeoutError:
+        if futuro.cancel():
+            raise  # Seguía en la cola: no se ejecutará
+        raise ResultadoDesconocido from None
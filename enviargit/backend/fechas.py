@@ -0,0 +1,58 @@
+"""
+Filtros por fecha local que aprovechan los índices
+
+`campo__date=hoy` obliga a SQLite a convertir cada fila con una función de
+Python (django_datetime_cast_date), así que ningún índice sirve. Estas
+utilidades traducen fechas locales (America/Bogota) a rangos semiabiertos
+[inicio, fin) de datetimes aware, que la base de datos compara directamente
+contra el índice de la columna.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def inicio_dia_local(fecha):
+    """Datetime aware de la medianoche local de una fecha"""
+    return timezone.make_aware(datetime.combine(fecha, time.min), timezone.get_current_timezone())
+
+
+def rango_fechas(campo, desde=None, hasta=None):
+    """
+    Q para `campo` entre las fechas locales `desde` y `hasta` (ambas inclusive).
+    Cualquiera de los extremos puede omitirse.
+    """
+    filtro = {}
+    if desde is not None:
+        filtro[f'{campo}__gte'] = inicio_dia_local(desde)
+    if hasta is not None:
+        filtro[f'{campo}__lt'] = inicio_dia_local(hasta + timedelta(days=1))
+    return Q(**filtro)
+
+
+def filtrar_por_parametros(queryset, campo, desde=None, hasta=None):
+    """
+    Aplicar los parámetros `fecha_desde`/`fecha_hasta` de los listados.
+    Las fechas (AAAA-MM-DD) se interpretan como días locales completos;
+    cualquier otro valor (p. ej. un datetime ISO) se compara tal cual.
+    """
+    if desde:
+        fecha = _fecha(desde)
+        queryset = queryset.filter(
+            rango_fechas(campo, desde=fecha) if fecha else Q(**{f'{campo}__gte': desde})
+        )
+    if hasta:
+        fecha = _fecha(hasta)
+        queryset = queryset.filter(
+            rango_fechas(campo, hasta=fecha) if fecha else Q(**{f'{campo}__lte': hasta})
+        )
+    return queryset
+
+
+def _fecha(valor):
+    try:
+        return parse_date(valor)
+    except ValueError:
+        return None
@@ -0,0 +1,62 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import carga
+
+
+def _mezcla(texto):
+    try:
+        return carga.leer_mezcla(texto)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera carga concurrente sobre las vistas reales (ventas, pagos, dashboards y búsquedas) '
+        'y reporta throughput, latencias p50/p95/p99 y errores por endpoint. Escribe datos: '
+        'úselo sobre una base sembrada con sembrar_datos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segundos', type=float, default=30, help='Duración de la carga')
+        parser.add_argument('--hilos', type=int, default=8, help='Requests simultáneos')
+        parser.add_argument(
+            '--mezcla', type=_mezcla, default=carga.MEZCLA,
+            help='Pesos por operación, p. ej. venta=20,pago=10,dashboard=40,busqueda=30'
+        )
+        parser.add_argument('--semilla', type=int, default=1)
+        parser.add_argument('--salida', help='Guardar el reporte JSON en este archivo')
+
+    def handle(self, *args, **options):
+        if options['hilos'] < 1 or options['segundos'] <= 0:
+            raise CommandError('Se necesita al menos un hilo y una duración mayor a cero')
+        try:
+            reporte = carga.correr(
+                options['segundos'], options['hilos'], options['mezcla'], options['semilla']
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(
+            f'{"endpoint":<54}{"req":>7}{"req/s":>9}{"p50":>9}{"p95":>9}{"p99":>9}{"err":>6}{"lock":>6}'
+        )
+        for endpoint, datos in reporte['endpoints'].items():
+            self.stdout.write(
+                f'{endpoint:<54}{datos["solicitudes"]:>7}{datos["por_segundo"]:>9.1f}'
+                f'{datos["p50_ms"]:>9.1f}{datos["p95_ms"]:>9.1f}{datos["p99_ms"]:>9.1f}'
+                f'{datos["errores"]:>6}{datos["bloqueos"]:>6}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{reporte["solicitudes"]} requests en {reporte["duracion_s"]} s '
+            f'({reporte["por_segundo"]} req/s), {reporte["errores"]} errores, {reporte["bloqueos"]} bloqueos'
+        ))
+
+        texto = json.dumps(reporte, ensure_ascii=False, indent=2)
+        if options['salida']:
+            Path(options['salida']).write_text(texto, encoding='utf-8')
+            self.stdout.write(f'Reporte guardado en {options["salida"]}')
+        else:
+            self.stdout.write(texto)
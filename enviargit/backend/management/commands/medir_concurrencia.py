@@ -0,0 +1,110 @@
+import sqlite3
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+
+from backend import sqlite
+
+FILAS_INICIALES = 50000
+PRODUCTOS = 200
+
+
+def _crear_base(ruta, pragmas):
+    conexion = sqlite3.connect(ruta)
+    for sentencia in pragmas:
+        conexion.execute(sentencia)
+    conexion.execute(
+        'CREATE TABLE venta (id INTEGER PRIMARY KEY, producto INTEGER, monto REAL, fecha REAL)'
+    )
+    conexion.execute('CREATE INDEX venta_fecha ON venta (fecha)')
+    conexion.executemany(
+        'INSERT INTO venta (producto, monto, fecha) VALUES (?, ?, julianday() - ?)',
+        ((i % PRODUCTOS, i % 997 * 100, i / 1000) for i in range(FILAS_INICIALES))
+    )
+    conexion.commit()
+    conexion.close()
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide escrituras (ventas) y lecturas de dashboard concurrentes sobre una base SQLite '
+        'temporal, con la configuración por defecto y con el perfil de backend/sqlite'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--segundos', type=float, default=3, help='Duración de cada medición')
+        parser.add_argument('--escritores', type=int, default=2, help='Hilos que registran ventas')
+        parser.add_argument('--lectores', type=int, default=2, help='Hilos que calculan el dashboard')
+        parser.add_argument('--timeout', type=float, default=5, help='Espera máxima por un bloqueo (s)')
+
+    def handle(self, *args, **options):
+        perfiles = [
+            ('por defecto', [], []),
+            ('backend/sqlite', sqlite.sentencias(), sqlite.sentencias(solo_lectura=True)),
+        ]
+        self.stdout.write(f'{"perfil":<16}{"escrituras/s":>14}{"lecturas/s":>12}{"bloqueos":>10}')
+        with tempfile.TemporaryDirectory() as directorio:
+            for indice, (nombre, escritura, lectura) in enumerate(perfiles):
+                ruta = str(Path(directorio) / f'medicion_{indice}.sqlite3')
+                _crear_base(ruta, escritura)
+                escrituras, lecturas, bloqueos = self.medir(ruta, escritura, lectura, options)
+                segundos = options['segundos']
+                self.stdout.write(
+                    f'{nombre:<16}{escrituras / segundos:>14.0f}{lecturas / segundos:>12.1f}{bloqueos:>10}'
+                )
+
+    def medir(self, ruta, pragmas_escritura, pragmas_lectura, options):
+        """Retorna (escrituras, lecturas, errores "database is locked") en `segundos`"""
+        fin = time.monotonic() + options['segundos']
+        conteos = {'escrituras': 0, 'lecturas': 0, 'bloqueos': 0}
+        candado = threading.Lock()
+
+        def sumar(clave):
+            with candado:
+                conteos[clave] += 1
+
+        def trabajar(pragmas, operacion, clave):
+            conexion = sqlite3.connect(ruta, timeout=options['timeout'], isolation_level=None)
+            for sentencia in pragmas:
+                conexion.execute(sentencia)
+            while time.monotonic() < fin:
+                try:
+                    operacion(conexion)
+                    sumar(clave)
+                except sqlite3.OperationalError as e:
+                    if 'locked' not in str(e):
+                        raise
+                    if conexion.in_transaction:
+                        conexion.execute('ROLLBACK')
+                    sumar('bloqueos')
+            conexion.close()
+
+        def vender(conexion):
+            conexion.execute('BEGIN IMMEDIATE')
+            conexion.execute(
+                'INSERT INTO venta (producto, monto, fecha) VALUES (?, ?, julianday())',
+                (conteos['escrituras'] % PRODUCTOS, 15000)
+            )
+            conexion.execute('COMMIT')
+
+        def dashboard(conexion):
+            conexion.execute(
+                'SELECT producto, COUNT(*), SUM(monto) FROM venta '
+                'WHERE fecha >= julianday() - 30 GROUP BY producto ORDER BY 3 DESC'
+            ).fetchall()
+
+        hilos = [
+            threading.Thread(target=trabajar, args=(pragmas_escritura, vender, 'escrituras'))
+            for _ in range(options['escritores'])
+        ] + [
+            threading.Thread(target=trabajar, args=(pragmas_lectura, dashboard, 'lecturas'))
+            for _ in range(options['lectores'])
+        ]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        return conteos['escrituras'], conteos['lecturas'], conteos['bloqueos']
@@ -0,0 +1,144 @@
+import io
+import pstats
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from backend import perfilado
+
+
+def _fecha(valor):
+    """Fecha u hora local del argumento (una fecha sola es la medianoche)"""
+    momento = parse_datetime(valor)
+    if momento is None:
+        dia = parse_date(valor)
+        if dia is None:
+            raise CommandError(f'Fecha inválida: {valor}')
+        momento = datetime.combine(dia, time.min)
+    return momento if timezone.is_aware(momento) else timezone.make_aware(momento)
+
+
+def _promedios(perfiles):
+    """{función: ms acumulados por request} promediando los perfiles"""
+    estadisticas = pstats.Stats(*[str(perfilado.ruta_prof(p['id'])) for p in perfiles])
+    return {
+        pstats.func_std_string(clave): acumulado * 1000 / len(perfiles)
+        for clave, (_, _, _, acumulado, _) in estadisticas.stats.items()
+    }
+
+
+def _media(perfiles, campo):
+    valores = [p[campo] for p in perfiles if p.get(campo) is not None]
+    return sum(valores) / len(valores) if valores else 0
+
+
+class Command(BaseCommand):
+    help = (
+        'Lista, agrega y compara los perfiles de requests guardados con X-Perfilar '
+        '(ver backend/perfilado.py), o firma un token para pedirlos'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('accion', choices=['listar', 'agregar', 'comparar', 'firmar'])
+        parser.add_argument(
+            'argumentos', nargs='*',
+            help='Ids de perfiles (agregar, comparar) o el usuario staff (firmar)'
+        )
+        parser.add_argument('--vista', help='Solo la vista indicada, p. ej. VentaDirectaViewSet.create')
+        parser.add_argument('--desde', type=_fecha, help='Fecha u hora inicial')
+        parser.add_argument('--hasta', type=_fecha, help='Fecha u hora final (excluida)')
+        parser.add_argument(
+            '--corte', type=_fecha,
+            help='comparar: los perfiles antes de esta fecha contra los posteriores (p. ej. un despliegue)'
+        )
+        parser.add_argument('--top', type=int, default=25, help='Funciones a mostrar')
+
+    def handle(self, *args, **options):
+        accion = options['accion']
+        if accion == 'firmar':
+            if len(options['argumentos']) != 1:
+                raise CommandError('Indique el usuario staff: perfiles firmar <usuario>')
+            token = perfilado.firmar(options['argumentos'][0])
+            if perfilado.usuario_del_token(token) is None:
+                raise CommandError('El usuario no existe, está inactivo o no es staff')
+            self.stdout.write(token)
+            return
+
+        perfiles = self.seleccionar(options)
+        if accion == 'listar':
+            self.listar(perfiles)
+        elif accion == 'agregar':
+            if not perfiles:
+                raise CommandError('No hay perfiles que coincidan')
+            self.agregar(perfiles, options['top'])
+        else:
+            self.comparar(perfiles, options)
+
+    def seleccionar(self, options):
+        perfiles = perfilado.cargar()
+        ids = options['argumentos']
+        if ids:
+            por_id = {p['id']: p for p in perfiles}
+            faltantes = [i for i in ids if i not in por_id]
+            if faltantes:
+                raise CommandError(f'Perfiles no encontrados: {", ".join(faltantes)}')
+            return [por_id[i] for i in ids]
+
+        if options['vista']:
+            perfiles = [p for p in perfiles if p['vista'] == options['vista']]
+        if options['desde']:
+            perfiles = [p for p in perfiles if parse_datetime(p['fecha']) >= options['desde']]
+        if options['hasta']:
+            perfiles = [p for p in perfiles if parse_datetime(p['fecha']) < options['hasta']]
+        return perfiles
+
+    def listar(self, perfiles):
+        self.stdout.write(f'{"id":<60}{"estado":>7}{"ms":>10}{"consultas":>11}  ruta')
+        for perfil in perfiles:
+            self.stdout.write(
+                f'{perfil["id"]:<60}{perfil["estado"]:>7}{perfil["total_ms"]:>10.1f}'
+                f'{perfil["consultas"] or 0:>11}  {perfil["metodo"]} {perfil["ruta"]}'
+            )
+        self.stdout.write(f'{len(perfiles)} perfil(es)')
+
+    def agregar(self, perfiles, top):
+        self.stdout.write(
+            f'{len(perfiles)} perfil(es): {_media(perfiles, "total_ms"):.1f} ms y '
+            f'{_media(perfiles, "consultas"):.1f} consultas en promedio'
+        )
+        salida = io.StringIO()
+        estadisticas = pstats.Stats(*[str(perfilado.ruta_prof(p['id'])) for p in perfiles], stream=salida)
+        estadisticas.sort_stats('cumulative').print_stats(top)
+        self.stdout.write(salida.getvalue())
+
+    def comparar(self, perfiles, options):
+        if options['argumentos']:
+            if len(perfiles) != 2:
+                raise CommandError('comparar recibe dos ids, o --vista y --corte')
+            antes, despues = [perfiles[0]], [perfiles[1]]
+        elif options['vista'] and options['corte']:
+            antes = [p for p in perfiles if parse_datetime(p['fecha']) < options['corte']]
+            despues = [p for p in perfiles if parse_datetime(p['fecha']) >= options['corte']]
+        else:
+            raise CommandError('comparar recibe dos ids, o --vista y --corte')
+        if not antes or not despues:
+            raise CommandError(f'Hacen falta perfiles en los dos grupos (antes: {len(antes)}, después: {len(despues)})')
+
+        self.stdout.write(f'{"":<14}{"perfiles":>10}{"ms":>10}{"consultas":>11}')
+        for nombre, grupo in (('antes', antes), ('después', despues)):
+            self.stdout.write(
+                f'{nombre:<14}{len(grupo):>10}{_media(grupo, "total_ms"):>10.1f}'
+                f'{_media(grupo, "consultas"):>11.1f}'
+            )
+
+        # ms acumulados por request de cada función; primero los que más cambiaron
+        previos, nuevos = _promedios(antes), _promedios(despues)
+        cambios = sorted(
+            ((funcion, previos.get(funcion, 0), nuevos.get(funcion, 0)) for funcion in previos.keys() | nuevos.keys()),
+            key=lambda c: -abs(c[2] - c[1])
+        )[:options['top']]
+        self.stdout.write(f'\n{"antes ms":>10}{"después ms":>12}{"cambio":>10}  función')
+        for funcion, previo, nuevo in cambios:
+            self.stdout.write(f'{previo:>10.2f}{nuevo:>12.2f}{nuevo - previo:>+10.2f}  {funcion}')
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend import datos_sinteticos
+from backend.datos_sinteticos import Escala
+
+
+class Command(BaseCommand):
+    help = (
+        'Crea datos sintéticos a escala de producción (clientes, productos, pedidos con pagos '
+        'y ventas directas) para pruebas de carga. Úselo sobre una copia de la base de datos'
+    )
+
+    def add_arguments(self, parser):
+        defecto = Escala()
+        parser.add_argument('--clientes', type=int, default=defecto.clientes)
+        parser.add_argument('--productos', type=int, default=defecto.productos)
+        parser.add_argument('--pedidos', type=int, default=defecto.pedidos)
+        parser.add_argument('--ventas', type=int, default=defecto.ventas)
+        parser.add_argument('--dias', type=int, default=defecto.dias, help='Días de historia hasta ayer')
+        parser.add_argument('--semilla', type=int, default=defecto.semilla, help='Misma semilla, mismos datos')
+        parser.add_argument(
+            '--lote', type=int, default=defecto.lote,
+            help=f'Filas por bulk_create y por transacción (por defecto {defecto.lote})'
+        )
+
+    def handle(self, *args, **options):
+        escala = Escala(**{campo: options[campo] for campo in Escala.__dataclass_fields__})
+        if escala.clientes < 1 or escala.productos < 1 or escala.dias < 1 or escala.lote < 1:
+            raise CommandError('Se necesita al menos un cliente, un producto, un día y un lote de una fila')
+
+        inicio = time.perf_counter()
+        filas = datos_sinteticos.sembrar(
+            escala, reporte=lambda mensaje: self.stdout.write(f'  {mensaje} ({time.perf_counter() - inicio:.1f} s)')
+        )
+        segundos = time.perf_counter() - inicio
+        for modelo, cantidad in filas.items():
+            self.stdout.write(f'  {modelo}: {cantidad}')
+        total = sum(filas.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} filas en {segundos:.1f} s ({total / segundos:.0f} filas/s)'
+        ))
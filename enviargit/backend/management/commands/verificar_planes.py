@@ -0,0 +1,47 @@
+import re
+from importlib import import_module
+
+from django.core.management.base import BaseCommand, CommandError
+
+from backend.cache import DOMINIOS
+
+# "SCAN tabla" recorre todas las filas, aunque sea en el orden de un índice
+# ("SCAN tabla USING INDEX ..."). Solo "SEARCH" acota el rango leído.
+RECORRIDO_COMPLETO = re.compile(r'\bSCAN (?!CONSTANT ROW)(\w+)')
+
+
+def consultas_registradas():
+    """Consultas por fecha declaradas en <app>/reportes.py (función consultas_por_fecha)"""
+    for app in DOMINIOS:
+        try:
+            reportes = import_module(f'{app}.reportes')
+        except ImportError:
+            continue
+        consultas = getattr(reportes, 'consultas_por_fecha', None)
+        if consultas:
+            for nombre, queryset in consultas().items():
+                yield f'{app}.{nombre}', queryset
+
+
+class Command(BaseCommand):
+    help = 'Ejecuta EXPLAIN QUERY PLAN sobre las consultas por fecha de los dashboards y falla si alguna recorre una tabla completa'
+
+    def handle(self, *args, **options):
+        fallidas = []
+
+        for nombre, queryset in consultas_registradas():
+            plan = queryset.explain()
+            recorridos = RECORRIDO_COMPLETO.findall(plan)
+
+            if recorridos:
+                fallidas.append(nombre)
+                self.stdout.write(self.style.ERROR(f'✗ {nombre}'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✓ {nombre}'))
+
+            if recorridos or options['verbosity'] > 1:
+                for linea in plan.splitlines():
+                    self.stdout.write(f'    {linea}')
+
+        if fallidas:
+            raise CommandError(f'Consultas que recorren la tabla completa: {", ".join(fallidas)}')
@@ -0,0 +1,187 @@
+"""
+Medición por request: consultas SQL, tiempo en la base de datos, tiempo de
+serialización y tiempo total
+
+MedicionMiddleware instala un `execute_wrapper` en cada conexión mientras
+dura el request (no depende de DEBUG ni de connection.queries, que crece sin
+límite) y agrupa las consultas por texto SQL: la misma sentencia repetida
+muchas veces con distintos parámetros es el síntoma de un N+1. El tiempo de
+serialización se mide envolviendo `BaseSerializer.data` (incluye las
+consultas perezosas que dispare).
+
+Cada respuesta lleva un encabezado Server-Timing (visible en la pestaña de
+red del navegador):
+
+    Server-Timing: db;dur=12.4;desc="7 consultas", ser;dur=3.1, total;dur=41.0
+
+y los requests que superan settings.UMBRAL_REQUEST_LENTO_MS se escriben como
+una línea JSON en el logger `backend.medicion` (datos/solicitudes_lentas.log).
+La duración, el código y las consultas de cada request se suman además a las
+métricas de /metrics por vista (ver backend/metricas.py).
+"""
+import json
+import logging
+from contextlib import ExitStack
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.db import OperationalError, connections
+
+from . import metricas
+
+logger = logging.getLogger(__name__)
+
+UMBRAL_POR_DEFECTO_MS = 500
+# A partir de cuántas ejecuciones de la misma sentencia se marca como N+1
+REPETICIONES_N_MAS_1 = 5
+MAX_SENTENCIAS = 200  # Sentencias distintas que se guardan por request
+TOP_SENTENCIAS = 5
+
+_actual = ContextVar('medicion', default=None)
+
+
+class Medicion:
+    def __init__(self):
+        self.consultas = 0
+        self.bd = 0.0
+        self.serializacion = 0.0
+        self.sentencias = {}  # sql -> [veces, segundos]
+        self._anidada = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: cronometrar cada consulta"""
+        inicio = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        except OperationalError as e:
+            # SQLite ya esperó `timeout` segundos reintentando el bloqueo
+            if 'locked' in str(e):
+                metricas.contar('bordados_sqlite_bloqueos_total')
+            raise
+        finally:
+            duracion = perf_counter() - inicio
+            self.consultas += 1
+            self.bd += duracion
+            acumulado = self.sentencias.get(sql)
+            if acumulado is not None:
+                acumulado[0] += 1
+                acumulado[1] += duracion
+            elif len(self.sentencias) < MAX_SENTENCIAS:
+                self.sentencias[sql] = [1, duracion]
+
+    def peores(self):
+        """Sentencias que más tiempo tomaron, con las repetidas (N+1) marcadas"""
+        ordenadas = sorted(self.sentencias.items(), key=lambda s: -s[1][1])[:TOP_SENTENCIAS]
+        return [
+            {
+                'sql': sql[:500],
+                'veces': veces,
+                'ms': round(segundos * 1000, 2),
+                'n_mas_1': veces >= REPETICIONES_N_MAS_1,
+            }
+            for sql, (veces, segundos) in ordenadas
+        ]
+
+    def repetidas(self):
+        return [
+            {'sql': sql[:500], 'veces': veces}
+            for sql, (veces, _) in sorted(self.sentencias.items(), key=lambda s: -s[1][0])
+            if veces >= REPETICIONES_N_MAS_1
+        ]
+
+
+def actual():
+    """Medición del request en curso (None fuera de MedicionMiddleware)"""
+    return _actual.get()
+
+
+def nombre_vista(view_func, metodo):
+    """'ViewSet.acción' para las vistas de DRF, el nombre de la función para las demás"""
+    clase = getattr(view_func, 'cls', None)
+    if clase is None:
+        return getattr(view_func, '__name__', 'otra')
+    accion = (getattr(view_func, 'actions', None) or {}).get(metodo.lower())
+    return f'{clase.__name__}.{accion}' if accion else clase.__name__
+
+
+def instrumentar_serializers():
+    """Envolver BaseSerializer.data para sumar el tiempo de serialización del request"""
+    from rest_framework.serializers import BaseSerializer
+
+    original = BaseSerializer.data
+    if getattr(original.fget, 'medido', False):
+        return
+
+    def data(self):
+        medicion = _actual.get()
+        if medicion is None or medicion._anidada:
+            return original.fget(self)
+        medicion._anidada += 1
+        inicio = perf_counter()
+        try:
+            return original.fget(self)
+        finally:
+            medicion.serializacion += perf_counter() - inicio
+            medicion._anidada -= 1
+
+    data.medido = True
+    BaseSerializer.data = property(data)
+
+
+class MedicionMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        medicion = Medicion()
+        request._vista_medida = 'sin_ruta'
+        token = _actual.set(medicion)
+        inicio = perf_counter()
+        try:
+            with ExitStack() as pila:
+                for conexion in connections.all():
+                    pila.enter_context(conexion.execute_wrapper(medicion))
+                response = self.get_response(request)
+        finally:
+            _actual.reset(token)
+        total = perf_counter() - inicio
+
+        response['Server-Timing'] = (
+            f'db;dur={medicion.bd * 1000:.1f};desc="{medicion.consultas} consultas", '
+            f'ser;dur={medicion.serializacion * 1000:.1f}, '
+            f'total;dur={total * 1000:.1f}'
+        )
+        # El navegador oculta Server-Timing en respuestas de otro origen (el frontend en :3000)
+        origen = request.headers.get('Origin')
+        if origen and origen in getattr(settings, 'CORS_ALLOWED_ORIGINS', []):
+            response['Timing-Allow-Origin'] = origen
+        if total * 1000 >= getattr(settings, 'UMBRAL_REQUEST_LENTO_MS', UMBRAL_POR_DEFECTO_MS):
+            self.registrar_lento(request, response, medicion, total)
+        self.registrar_metricas(request, response, medicion, total)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._vista_medida = nombre_vista(view_func, request.method)
+
+    def registrar_metricas(self, request, response, medicion, total):
+        vista = request._vista_medida
+        metricas.observar('bordados_request_duracion_segundos', total, vista=vista, metodo=request.method)
+        metricas.contar('bordados_requests_total', vista=vista, codigo=response.status_code)
+        if medicion.consultas:
+            metricas.contar('bordados_consultas_sql_total', medicion.consultas, vista=vista)
+
+    def registrar_lento(self, request, response, medicion, total):
+        from .perfilado import ruta_sin_token  # perfilado importa este módulo
+
+        logger.warning(json.dumps({
+            'metodo': request.method,
+            'ruta': ruta_sin_token(request),
+            'estado': response.status_code,
+            'total_ms': round(total * 1000, 1),
+            'bd_ms': round(medicion.bd * 1000, 1),
+            'serializacion_ms': round(medicion.serializacion * 1000, 1),
+            'consultas': medicion.consultas,
+            'peores': medicion.peores(),
+            'repetidas': medicion.repetidas(),
+        }, ensure_ascii=False))
@@ -0,0 +1,238 @@
+"""
+Métricas en formato de texto de Prometheus (GET /metrics), sin agentes ni
+servicios externos
+
+Cada proceso (worker de gunicorn) escribe sus contadores en su propio archivo
+mapeado en memoria, settings.DIRECTORIO_METRICAS/<pid>.db. Sumar a un
+contador es una búsqueda en un diccionario más un struct.pack_into sobre el
+mmap, del orden de un microsegundo, sin llamadas al sistema. /metrics lee y
+suma los archivos de todos los procesos, así que cualquier worker responde
+con el total.
+
+Solo hay contadores e histogramas (valores acumulados), por lo que los
+archivos de procesos que ya terminaron se siguen sumando. Al reiniciar el
+servidor se puede vaciar el directorio con `limpiar()` (p. ej. en el hook
+on_starting de gunicorn) y Prometheus lo verá como un reinicio de contadores.
+
+Formato de cada archivo: 8 bytes de encabezado con los bytes usados y luego
+registros [largo de la clave: u32][clave JSON, rellenada a múltiplo de 8][valor: f64].
+"""
+import json
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left
+from pathlib import Path
+
+from django.conf import settings
+from django.http import HttpResponse
+
+TAMANO_INICIAL = 64 * 1024
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# nombre -> (tipo, ayuda)
+METRICAS = {
+    'bordados_request_duracion_segundos': (
+        'histogram', 'Duración de los requests por vista (ViewSet.acción) y método'
+    ),
+    'bordados_requests_total': ('counter', 'Requests por vista y código de estado'),
+    'bordados_consultas_sql_total': ('counter', 'Consultas SQL ejecutadas por vista'),
+    'bordados_sqlite_bloqueos_total': (
+        'counter', 'Consultas que fallaron con "database is locked" tras agotar la espera'
+    ),
+    'bordados_reintentos_total': (
+        'counter', 'Reintentos por conflictos de concurrencia (stock que cambió durante una venta)'
+    ),
+    'bordados_cache_aciertos_total': ('counter', 'Payloads de dashboard servidos desde la caché'),
+    'bordados_cache_fallos_total': ('counter', 'Payloads de dashboard recalculados'),
+    'bordados_ventas_registradas_total': ('counter', 'Ventas directas confirmadas'),
+    'bordados_pagos_registrados_total': ('counter', 'Pagos de pedidos confirmados'),
+    'bordados_ventas_sin_stock_total': ('counter', 'Ventas rechazadas por stock insuficiente'),
+}
+
+_ENCABEZADO = struct.Struct('<Q')
+_LARGO = struct.Struct('<I')
+_VALOR = struct.Struct('<d')
+
+
+def _relleno(n):
+    return (8 - n % 8) % 8
+
+
+def leer_registros(datos):
+    """(clave, valor) de los registros completos de un archivo"""
+    if len(datos) < _ENCABEZADO.size:
+        return
+    usado = _ENCABEZADO.unpack_from(datos, 0)[0]
+    posicion = _ENCABEZADO.size
+    while posicion < usado:
+        largo = _LARGO.unpack_from(datos, posicion)[0]
+        inicio = posicion + _LARGO.size
+        valor = inicio + largo + _relleno(_LARGO.size + largo)
+        yield datos[inicio:inicio + largo].decode(), _VALOR.unpack_from(datos, valor)[0]
+        posicion = valor + _VALOR.size
+
+
+class ArchivoMetricas:
+    """Valores float64 por clave en un archivo mapeado en memoria (de un solo proceso)"""
+
+    def __init__(self, ruta):
+        self.ruta = Path(ruta)
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._candado = threading.Lock()
+        self._posiciones = {}
+        self._mmap = None
+        self._abrir(max(TAMANO_INICIAL, self.ruta.stat().st_size if self.ruta.exists() else 0))
+        self._usado = _ENCABEZADO.unpack_from(self._mmap, 0)[0] or _ENCABEZADO.size
+        # Mismo pid que un proceso anterior: seguir sumando sobre sus claves
+        posicion = _ENCABEZADO.size
+        for clave, _ in leer_registros(self._mmap):
+            largo = len(clave.encode())
+            posicion += _LARGO.size + largo + _relleno(_LARGO.size + largo)
+            self._posiciones[clave] = posicion
+            posicion += _VALOR.size
+
+    def _abrir(self, tamano):
+        if self._mmap is not None:
+            self._mmap.close()
+        descriptor = os.open(self.ruta, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(descriptor).st_size < tamano:
+                os.ftruncate(descriptor, tamano)
+            self._mmap = mmap.mmap(descriptor, tamano)
+        finally:
+            os.close(descriptor)
+
+    def _agregar(self, clave):
+        codificada = clave.encode()
+        registro = _LARGO.size + len(codificada) + _relleno(_LARGO.size + len(codificada)) + _VALOR.size
+        while self._usado + registro > len(self._mmap):
+            self._abrir(len(self._mmap) * 2)
+        _LARGO.pack_into(self._mmap, self._usado, len(codificada))
+        self._mmap[self._usado + _LARGO.size:self._usado + _LARGO.size + len(codificada)] = codificada
+        posicion = self._usado + registro - _VALOR.size
+        _VALOR.pack_into(self._mmap, posicion, 0.0)
+        self._usado += registro
+        # El encabezado al final: un lector nunca ve un registro a medias
+        _ENCABEZADO.pack_into(self._mmap, 0, self._usado)
+        self._posiciones[clave] = posicion
+        return posicion
+
+    def sumar(self, clave, valor):
+        with self._candado:
+            posicion = self._posiciones.get(clave)
+            if posicion is None:
+                posicion = self._agregar(clave)
+            _VALOR.pack_into(self._mmap, posicion, _VALOR.unpack_from(self._mmap, posicion)[0] + valor)
+
+
+class Registro:
+    """Contadores del proceso actual; se recrea si el proceso cambia (fork)"""
+
+    def __init__(self):
+        self._pid = None
+        self._archivo = None
+        self._claves = {}
+
+    def archivo(self):
+        if self._pid != os.getpid():
+            self._archivo = ArchivoMetricas(directorio() / f'{os.getpid()}.db')
+            self._claves = {}
+            self._pid = os.getpid()
+        return self._archivo
+
+    def sumar(self, nombre, valor, etiquetas, sufijo=''):
+        archivo = self.archivo()
+        llave = (nombre, sufijo, etiquetas)
+        clave = self._claves.get(llave)
+        if clave is None:
+            clave = self._claves[llave] = json.dumps([nombre + sufijo, sorted(etiquetas)])
+        archivo.sumar(clave, valor)
+
+
+registro = Registro()
+
+
+def directorio():
+    return Path(getattr(settings, 'DIRECTORIO_METRICAS', settings.BASE_DIR / 'datos' / 'metricas'))
+
+
+def contar(nombre, valor=1, **etiquetas):
+    registro.sumar(nombre, valor, tuple(etiquetas.items()))
+
+
+def observar(nombre, segundos, **etiquetas):
+    """Sumar una observación a un histograma"""
+    etiquetas = tuple(etiquetas.items())
+    indice = bisect_left(BUCKETS_SEGUNDOS, segundos)
+    limite = str(BUCKETS_SEGUNDOS[indice]) if indice < len(BUCKETS_SEGUNDOS) else '+Inf'
+    registro.sumar(nombre, 1, etiquetas + (('le', limite),), '_bucket')
+    registro.sumar(nombre, segundos, etiquetas, '_sum')
+    registro.sumar(nombre, 1, etiquetas, '_count')
+
+
+def limpiar():
+    """Borrar los archivos de todos los procesos (al iniciar el servidor)"""
+    for ruta in directorio().glob('*.db'):
+        ruta.unlink(missing_ok=True)
+    registro._pid = None
+
+
+def totales():
+    """{(nombre con sufijo, etiquetas ordenadas): valor} sumando todos los procesos"""
+    resultado = {}
+    for ruta in directorio().glob('*.db'):
+        try:
+            datos = ruta.read_bytes()
+        except FileNotFoundError:
+            continue
+        for clave, valor in leer_registros(datos):
+            nombre, etiquetas = json.loads(clave)
+            llave = (nombre, tuple(tuple(e) for e in etiquetas))
+            resultado[llave] = resultado.get(llave, 0) + valor
+    return resultado
+
+
+def _etiquetas(pares):
+    if not pares:
+        return ''
+    texto = ','.join(
+        '{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for k, v in pares
+    )
+    return '{' + texto + '}'
+
+
+def _valor(valor):
+    return str(int(valor)) if float(valor).is_integer() else repr(valor)
+
+
+def exposicion():
+    """Texto en el formato de exposición de Prometheus (versión 0.0.4)"""
+    valores = totales()
+    lineas = []
+    for nombre, (tipo, ayuda) in METRICAS.items():
+        lineas.append(f'# HELP {nombre} {ayuda}')
+        lineas.append(f'# TYPE {nombre} {tipo}')
+        if tipo == 'counter':
+            for (metrica, etiquetas), valor in sorted(valores.items()):
+                if metrica == nombre:
+                    lineas.append(f'{nombre}{_etiquetas(etiquetas)} {_valor(valor)}')
+            continue
+
+        # Histograma: los buckets se guardan sin acumular
+        series = sorted({etiquetas for metrica, etiquetas in valores if metrica == f'{nombre}_count'})
+        for etiquetas in series:
+            acumulado = 0
+            for limite in [*map(str, BUCKETS_SEGUNDOS), '+Inf']:
+                acumulado += valores.get((f'{nombre}_bucket', tuple(sorted(etiquetas + (('le', limite),)))), 0)
+                lineas.append(f'{nombre}_bucket{_etiquetas(etiquetas + (("le", limite),))} {_valor(acumulado)}')
+            lineas.append(f'{nombre}_sum{_etiquetas(etiquetas)} {_valor(valores[(f"{nombre}_sum", etiquetas)])}')
+            lineas.append(f'{nombre}_count{_etiquetas(etiquetas)} {_valor(valores[(f"{nombre}_count", etiquetas)])}')
+    return '\n'.join(lineas) + '\n'
+
+
+def vista_metricas(request):
+    return HttpResponse(exposicion(), content_type='text/plain; version=0.0.4; charset=utf-8')
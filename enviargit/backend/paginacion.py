@@ -0,0 +1,28 @@
+"""
+Paginación por cursor (keyset) para los listados de la API
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class CursorPorOrden(CursorPagination):
+    """
+    Cursor sobre el orden declarado en cada viewset (`ordering`), con el id
+    como desempate: la página 1000 cuesta lo mismo que la primera, cosa que
+    no se logra con OFFSET.
+
+    - `?page_size=N` cambia el tamaño de página (máximo `max_page_size`)
+    - `?paginar=false` devuelve la lista completa como antes, para que el
+      frontend migre de forma gradual
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    ordering = ('-id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if request.query_params.get('paginar', '').lower() == 'false':
+            return None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        return tuple(getattr(view, 'ordering', None) or self.ordering)
@@ -0,0 +1,178 @@
+"""
+Perfilado bajo demanda de un request puntual
+
+Un request con el encabezado `X-Perfilar` (o el parámetro `?perfilar=`) se
+ejecuta bajo cProfile y el perfil queda en settings.DIRECTORIO_PERFILES como
+<id>.prof (formato pstats) más <id>.json con la vista, la ruta, el usuario,
+los tiempos y las consultas. El valor del encabezado puede ser:
+
+- `1`, si el request trae la sesión de un usuario staff (admin de Django)
+- un token firmado con `manage.py perfiles firmar <usuario>`, para curl o el
+  frontend, que no usan la sesión; vence en settings.VALIDEZ_TOKEN_PERFILADO
+
+`X-Perfilar-Memoria: 1` (o `?perfilar_memoria=1`) agrega las líneas que más
+memoria asignaron, con tracemalloc (hace el request varias veces más lento).
+Los requests sin permiso se atienden normalmente, sin perfil. La respuesta
+perfilada lleva el id del perfil en `X-Perfil`; `manage.py perfiles` los
+lista, agrega y compara.
+"""
+import cProfile
+import json
+import re
+import tracemalloc
+import uuid
+from pathlib import Path
+from time import perf_counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core import signing
+from django.utils import timezone
+
+from . import medicion
+
+ENCABEZADO = 'X-Perfilar'
+ENCABEZADO_MEMORIA = 'X-Perfilar-Memoria'
+PARAMETRO = 'perfilar'
+PARAMETRO_MEMORIA = 'perfilar_memoria'
+VALIDEZ_POR_DEFECTO = 3600  # Segundos
+LINEAS_MEMORIA = 25
+MARCOS_MEMORIA = 10  # Profundidad del stack que guarda tracemalloc
+
+_SAL = 'backend.perfilado'
+
+
+def directorio():
+    return Path(getattr(settings, 'DIRECTORIO_PERFILES', settings.BASE_DIR / 'datos' / 'profiles'))
+
+
+def firmar(usuario):
+    """Token para perfilar en nombre de `usuario` (debe ser staff)"""
+    return signing.TimestampSigner(salt=_SAL).sign(usuario)
+
+
+def usuario_del_token(token):
+    """Usuario staff activo del token, o None si es inválido o venció"""
+    try:
+        usuario = signing.TimestampSigner(salt=_SAL).unsign(
+            token, max_age=getattr(settings, 'VALIDEZ_TOKEN_PERFILADO', VALIDEZ_POR_DEFECTO)
+        )
+    except signing.BadSignature:
+        return None
+    modelo = get_user_model()
+    existe = modelo.objects.filter(
+        **{modelo.USERNAME_FIELD: usuario}, is_staff__in=[True], is_active__in=[True]
+    ).exists()
+    return usuario if existe else None
+
+
+def autorizado(request, valor):
+    """Usuario en cuyo nombre se perfila el request, o None"""
+    usuario = getattr(request, 'user', None)
+    if valor == '1':
+        if usuario is not None and usuario.is_active and usuario.is_staff:
+            return usuario.get_username()
+        return None
+    return usuario_del_token(valor)
+
+
+def _pedido(request, encabezado, parametro):
+    return request.headers.get(encabezado) or request.GET.get(parametro)
+
+
+def ruta_sin_token(request):
+    """Ruta con la query, sin los parámetros de perfilado (el token es una credencial)"""
+    parametros = request.GET.copy()
+    parametros.pop(PARAMETRO, None)
+    parametros.pop(PARAMETRO_MEMORIA, None)
+    return request.path + ('?' + parametros.urlencode() if parametros else '')
+
+
+def guardar(perfil, metadatos):
+    """Escribir <id>.prof y <id>.json. Retorna el id"""
+    carpeta = directorio()
+    carpeta.mkdir(parents=True, exist_ok=True)
+    vista = re.sub(r'[^\w.-]', '_', metadatos['vista'])
+    identificador = f'{timezone.localtime():%Y%m%d-%H%M%S}-{vista}-{uuid.uuid4().hex[:6]}'
+    perfil.dump_stats(carpeta / f'{identificador}.prof')
+    (carpeta / f'{identificador}.json').write_text(
+        json.dumps({'id': identificador, **metadatos}, ensure_ascii=False, indent=2), encoding='utf-8'
+    )
+    return identificador
+
+
+def cargar():
+    """Metadatos de todos los perfiles guardados, del más antiguo al más reciente"""
+    perfiles = []
+    for ruta in sorted(directorio().glob('*.json')):
+        if ruta.with_suffix('.prof').exists():
+            perfiles.append(json.loads(ruta.read_text(encoding='utf-8')))
+    return sorted(perfiles, key=lambda p: p['fecha'])
+
+
+def ruta_prof(identificador):
+    return directorio() / f'{identificador}.prof'
+
+
+def _memoria(antes, despues):
+    """Líneas que más memoria asignaron entre las dos instantáneas"""
+    return [
+        {
+            'linea': str(diferencia.traceback[0]),
+            'kb': round(diferencia.size_diff / 1024, 1),
+            'asignaciones': diferencia.count_diff,
+        }
+        for diferencia in despues.compare_to(antes, 'lineno')[:LINEAS_MEMORIA]
+    ]
+
+
+class PerfiladoMiddleware:
+    """Va después de AuthenticationMiddleware, para saber si el usuario es staff"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        valor = _pedido(request, ENCABEZADO, PARAMETRO)
+        usuario = autorizado(request, valor) if valor else None
+        if usuario is None:
+            return self.get_response(request)
+
+        memoria = _pedido(request, ENCABEZADO_MEMORIA, PARAMETRO_MEMORIA) == '1'
+        iniciar_memoria = memoria and not tracemalloc.is_tracing()
+        if iniciar_memoria:
+            tracemalloc.start(MARCOS_MEMORIA)
+        antes = tracemalloc.take_snapshot() if memoria else None
+
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Ya hay otro perfilador activo en el proceso (p. ej. un request concurrente)
+            if iniciar_memoria:
+                tracemalloc.stop()
+            return self.get_response(request)
+        inicio = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            perfil.disable()
+            total = perf_counter() - inicio
+            despues = tracemalloc.take_snapshot() if memoria else None
+            if iniciar_memoria:
+                tracemalloc.stop()
+
+        medida = medicion.actual()
+        response['X-Perfil'] = guardar(perfil, {
+            'fecha': timezone.now().isoformat(),
+            'vista': getattr(request, '_vista_medida', 'sin_ruta'),
+            'metodo': request.method,
+            'ruta': ruta_sin_token(request),
+            'estado': response.status_code,
+            'usuario': usuario,
+            'total_ms': round(total * 1000, 1),
+            'consultas': medida.consultas if medida else None,
+            'bd_ms': round(medida.bd * 1000, 1) if medida else None,
+            'memoria': _memoria(antes, despues) if memoria else None,
+        })
+        return response
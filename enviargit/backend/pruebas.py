@@ -0,0 +1,50 @@
+"""
+Ejecutor de pruebas que aísla los datos del proyecto.
+
+Las almacenes, las métricas, los perfiles y el log de requests lentos viven en
+datos/ y los comparten los workers de gunicorn. Durante las pruebas todo eso
+apunta a un directorio temporal, para que `cache.clear()` o un request medido
+no borren ni ensucien los datos del servidor que corre en la misma máquina.
+"""
+import copy
+import logging.config
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+def _ajustes_temporales(raiz):
+    """Los ajustes que apuntan a datos/, reubicados dentro de raiz"""
+    almacenes = copy.deepcopy(settings.CACHES)
+    for alias, ajustes in almacenes.items():
+        if 'LOCATION' in ajustes:
+            ajustes['LOCATION'] = raiz / 'cache' / alias
+    registro = copy.deepcopy(settings.LOGGING)
+    for manejador in registro.get('handlers', {}).values():
+        if 'filename' in manejador:
+            manejador['filename'] = raiz / Path(manejador['filename']).name
+    return {
+        'CACHES': almacenes,
+        'LOGGING': registro,
+        'DIRECTORIO_METRICAS': raiz / 'metricas',
+        'DIRECTORIO_PERFILES': raiz / 'profiles',
+    }
+
+
+class EjecutorPruebas(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._temporal = tempfile.TemporaryDirectory()
+        self._ajustes = override_settings(**_ajustes_temporales(Path(self._temporal.name)))
+        self._ajustes.enable()
+        # LOGGING solo se aplica al iniciar Django: reconfigurar los handlers a mano
+        logging.config.dictConfig(settings.LOGGING)
+
+    def teardown_test_environment(self, **kwargs):
+        self._ajustes.disable()
+        logging.config.dictConfig(settings.LOGGING)
+        self._temporal.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,61 @@
+"""
+Conexión de solo lectura para los reportes y dashboards
+
+El alias 'reportes' (settings.DATABASES) abre el mismo archivo con
+`PRAGMA query_only`. Con WAL sus lecturas largas no bloquean a las ventas ni
+a los pagos, y cualquier escritura por error falla en lugar de competir por el
+bloqueo. Las acciones marcadas con @en_reportes leen por ese alias mientras se
+ejecutan.
+
+Si la conexión principal está dentro de una transacción (siempre en los
+TestCase) las lecturas se quedan en ella para ver sus propias escrituras.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+ALIAS_REPORTES = 'reportes'
+
+_en_reportes = ContextVar('en_reportes', default=False)
+
+
+@contextmanager
+def solo_lectura():
+    """Enviar las lecturas del bloque al alias de reportes"""
+    token = _en_reportes.set(True)
+    try:
+        yield
+    finally:
+        _en_reportes.reset(token)
+
+
+def en_reportes(funcion):
+    """Decorador para acciones de reportes (la respuesta se serializa dentro)"""
+    @wraps(funcion)
+    def envoltura(*args, **kwargs):
+        with solo_lectura():
+            return funcion(*args, **kwargs)
+    return envoltura
+
+
+class RouterReportes:
+    def db_for_read(self, model, **hints):
+        if (
+            _en_reportes.get()
+            and ALIAS_REPORTES in connections.settings
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return ALIAS_REPORTES
+        return None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Ambos alias son el mismo archivo
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != ALIAS_REPORTES
@@ -43,16 +43,20 @@ INSTALLED_APPS = [
     'clientes', 
     'pedidos',
     'finanzas',
-
+    'backend',
 ]
 
 MIDDLEWARE = [
+    # Primero, para medir el request completo (ver backend/medicion.py)
+    'backend.medicion.MedicionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Después de la autenticación: solo staff puede perfilar (ver backend/perfilado.py)
+    'backend.perfilado.PerfiladoMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -80,14 +84,90 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 # Database - CAMBIADO A SQLITE
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# WAL, cachés y PRAGMA optimize al cerrar: ver backend/sqlite
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'backend.sqlite',
         'NAME': BASE_DIR / 'db.sqlite3',
         'OPTIONS': {
             'timeout': 20,
+            # Tomar el bloqueo de escritura al abrir la transacción: en WAL una
+            # transacción que empieza leyendo y luego escribe no espera el
+            # timeout, falla de inmediato con "database is locked"
+            'transaction_mode': 'IMMEDIATE',
+        },
+    },
+    # Mismo archivo, solo lectura, para reportes y dashboards (ver backend/routers.py)
+    'reportes': {
+        'ENGINE': 'backend.sqlite',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        'SOLO_LECTURA': True,
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'MIRROR': 'default',
+        },
+    },
+}
+
+DATABASE_ROUTERS = ['backend.routers.RouterReportes']
+
+# Agrupar ventas, pagos, cambios de estado y ajustes de stock en un COMMIT por
+# lote desde un hilo escritor por proceso (ver backend/escritura.py)
+ESCRITURA_AGRUPADA = False
+
+# Requests más lentos que esto se registran en datos/solicitudes_lentas.log
+UMBRAL_REQUEST_LENTO_MS = 500
+
+# Un archivo mapeado en memoria por proceso; /metrics suma todos (ver backend/metricas.py)
+DIRECTORIO_METRICAS = BASE_DIR / 'datos' / 'metricas'
+
+# Perfiles de requests pedidos con X-Perfilar (ver backend/perfilado.py)
+DIRECTORIO_PERFILES = BASE_DIR / 'datos' / 'profiles'
+VALIDEZ_TOKEN_PERFILADO = 3600
+
+# Las pruebas usan cachés, métricas y logs en un directorio temporal (ver backend/pruebas.py)
+TEST_RUNNER = 'backend.pruebas.EjecutorPruebas'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'solicitudes_lentas': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': BASE_DIR / 'datos' / 'solicitudes_lentas.log',
+            'maxBytes': 5 * 1024 * 1024,
+            'backupCount': 3,
+            'encoding': 'utf-8',
+            'delay': True,
+        },
+    },
+    'loggers': {
+        'backend.medicion': {
+            'handlers': ['solicitudes_lentas'],
+            'level': 'WARNING',
+            'propagate': False,
+        },
+    },
+}
+
+
+# Caché compartida entre los workers de gunicorn (ver backend/cache.py)
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'datos' / 'cache',
+    },
+    # Contadores de versión de backend.cache: pocas claves que nunca deben descartarse
+    'versiones': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'datos' / 'versiones',
+        'TIMEOUT': None,
+        'OPTIONS': {
+            'MAX_ENTRIES': 10 ** 9,
         },
-    }
+    },
 }
 
 
@@ -135,7 +215,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
-    ]
+    ],
+    # Cursor sobre el `ordering` de cada viewset (ver backend/paginacion.py)
+    'DEFAULT_PAGINATION_CLASS': 'backend.paginacion.CursorPorOrden',
 }
 
 # Configuración CORS (para conectar con React)
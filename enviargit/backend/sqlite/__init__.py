@@ -0,0 +1,47 @@
+"""
+Perfil de conexión SQLite para producción
+
+Con la configuración por defecto (journal en modo DELETE) una escritura
+bloquea a todos los lectores y un reporte largo bloquea a las ventas, de ahí
+los "database is locked". Cada conexión nueva recibe por la señal
+`connection_created`:
+
+- journal_mode=WAL: lectores y un escritor a la vez sin bloquearse
+- synchronous=NORMAL: en WAL no se pierde consistencia, solo la última
+  transacción si se cae el sistema operativo
+- cache_size, mmap_size y temp_store para leer menos del disco
+- query_only en los alias con 'SOLO_LECTURA': True (ver backend/routers.py)
+
+El ENGINE de este paquete es el sqlite3 de Django más `PRAGMA optimize` al
+cerrar cada conexión, que actualiza las estadísticas del planificador solo
+cuando hace falta. Django no tiene una señal para el cierre.
+"""
+from django.db.backends.signals import connection_created
+
+PRAGMAS = [
+    ('journal_mode', 'WAL'),
+    ('synchronous', 'NORMAL'),
+    ('cache_size', -20000),  # Negativo = KiB: 20 MB por conexión
+    ('mmap_size', 256 * 1024 * 1024),
+    ('temp_store', 'MEMORY'),
+]
+
+
+def sentencias(solo_lectura=False):
+    """PRAGMAs a ejecutar al abrir una conexión"""
+    resultado = [f'PRAGMA {nombre} = {valor}' for nombre, valor in PRAGMAS]
+    if solo_lectura:
+        resultado.append('PRAGMA query_only = ON')
+    return resultado
+
+
+def configurar_conexion(sender, connection, **kwargs):
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sentencia in sentencias(connection.settings_dict.get('SOLO_LECTURA', False)):
+            cursor.execute(sentencia)
+
+
+def conectar_senales():
+    connection_created.connect(configurar_conexion, dispatch_uid='backend_sqlite_configurar')
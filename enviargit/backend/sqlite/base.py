@@ -0,0 +1,25 @@
+import logging
+
+from django.db import DatabaseError
+from django.db.backends.sqlite3 import base
+
+logger = logging.getLogger(__name__)
+
+ESPERA_OPTIMIZE_MS = 50
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """sqlite3 de Django con `PRAGMA optimize` antes de cerrar la conexión"""
+
+    def _close(self):
+        # optimize puede ejecutar ANALYZE, que escribe: no en las de solo lectura
+        if self.connection is not None and not self.settings_dict.get('SOLO_LECTURA'):
+            try:
+                with self.wrap_database_errors:
+                    # Si otra conexión está escribiendo no vale la pena esperarla:
+                    # la próxima que cierre lo hará
+                    self.connection.execute(f'PRAGMA busy_timeout = {ESPERA_OPTIMIZE_MS}')
+                    self.connection.execute('PRAGMA optimize')
+            except DatabaseError as e:
+                logger.debug('PRAGMA optimize omitido al cerrar: %s', e)
+        super()._close()
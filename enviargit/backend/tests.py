@@ -0,0 +1,612 @@
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import Future
+from contextlib import ExitStack
+from dataclasses import replace
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connections
+from django.db.models import Count, F
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import URLResolver, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clientes import metricas as metricas_clientes
+from clientes.models import CandidatoDuplicado, Cliente
+from finanzas import rollup
+from finanzas.models import MovimientoInventario, VentaDirecta
+from inventario.models import Categoria, Producto
+from pedidos.models import Pedido
+from . import autocompletar, carga, datos_sinteticos, escritura, medicion, metricas, perfilado, sqlite
+from .autocompletar import indice, invalidar_indice
+from .cache import invalidar, subir, versiones
+from .routers import RouterReportes, solo_lectura
+
+
+class BuscarTests(TestCase):
+    url = '/api/buscar/'
+
+    def setUp(self):
+        cache.clear()
+        indice.descartar()
+        self.client = APIClient()
+        self.cliente = Cliente.objects.create(nombre='José Muñoz', telefono='300 111 2233')
+        self.producto = Producto.objects.create(
+            nombre='Hilo poliéster', categoria=Categoria.objects.create(nombre='Hilos'),
+            marca='Madeira', color='Rojo', precio_compra=Decimal('1000'), precio_venta=Decimal('3000')
+        )
+        self.pedido = Pedido.objects.create(
+            cliente=self.cliente, fecha_entrega_prometida=timezone.now() + timedelta(days=3),
+            tipo_bordado='computarizado', descripcion='Logo en gorras rojas',
+            precio_total=Decimal('50000')
+        )
+
+    def buscar(self, texto, **params):
+        response = self.client.get(self.url, {'q': texto, **params})
+        self.assertEqual(response.status_code, 200)
+        return [(r['tipo'], r['id']) for r in response.data]
+
+    def test_coincidencias_entre_entidades(self):
+        self.assertEqual(self.buscar('munoz'), [('cliente', self.cliente.id), ('pedido', self.pedido.id)])
+        self.assertEqual(self.buscar('roj'), [('producto', self.producto.id), ('pedido', self.pedido.id)])
+        self.assertEqual(self.buscar('made rojo'), [('producto', self.producto.id)])
+        self.assertEqual(self.buscar('1112233'), [('cliente', self.cliente.id)])
+        self.assertEqual(self.buscar('mu', tipos='pedido'), [('pedido', self.pedido.id)])
+
+    def test_sin_consultas_y_actualizacion_incremental(self):
+        self.buscar('hilo')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buscar('polies'), [('producto', self.producto.id)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cliente.nombre = 'José Ramírez'
+            self.cliente.save()
+            self.producto.delete()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buscar('ramirez'), [('cliente', self.cliente.id), ('pedido', self.pedido.id)])
+            self.assertEqual(self.buscar('munoz'), [])
+            self.assertEqual(self.buscar('hilo'), [])
+
+    def test_recarga_si_otro_proceso_escribe(self):
+        self.buscar('hilo')
+        # update() no dispara señales; invalidar_indice() sube la versión como haría otro proceso
+        with self.captureOnCommitCallbacks(execute=True):
+            Producto.objects.filter(pk=self.producto.pk).update(nombre='Aguja')
+            invalidar_indice()
+
+        self.assertEqual(self.buscar('aguja'), [('producto', self.producto.id)])
+
+    def test_cambio_de_otro_proceso_antes_de_uno_local(self):
+        self.buscar('hilo')
+        # Otro proceso renombra un cliente y sube la versión; luego este guarda un pedido
+        Cliente.objects.filter(pk=self.cliente.pk).update(nombre='Ana Pérez')
+        subir(autocompletar.DOMINIO)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.pedido.descripcion = 'Logo en camisetas'
+            self.pedido.save()
+
+        self.assertEqual(self.buscar('perez'), [('cliente', self.cliente.id), ('pedido', self.pedido.id)])
+
+    def test_guardado_de_otro_proceso_sin_recarga_completa(self):
+        self.buscar('hilo')
+        otro_proceso = autocompletar.IndicePrefijos()  # Sin cargar, como un worker recién iniciado
+        Cliente.objects.filter(pk=self.cliente.pk).update(nombre='Ana Pérez')
+        otro_proceso.guardado(Cliente.objects.get(pk=self.cliente.pk))
+        nuevo = Producto.objects.create(
+            nombre='Aguja curva', categoria=self.producto.categoria,
+            precio_compra=Decimal('100'), precio_venta=Decimal('300')
+        )
+        otro_proceso.guardado(nuevo)
+        Producto.objects.filter(pk=self.producto.pk).delete()
+        otro_proceso.borrado('producto', self.producto.pk)
+
+        with mock.patch.object(indice, 'cargar', side_effect=AssertionError('recarga completa')), \
+                self.assertNumQueries(2):  # Una consulta por tipo: clientes y productos
+            self.assertEqual(self.buscar('aguja'), [('producto', nuevo.id)])
+        self.assertEqual(self.buscar('perez'), [('cliente', self.cliente.id), ('pedido', self.pedido.id)])
+        self.assertEqual(self.buscar('hilo'), [])
+
+    def test_ventas_y_cambios_sin_campos_indexados_no_recargan(self):
+        self.buscar('hilo')
+        version = versiones([autocompletar.DOMINIO])
+        with self.captureOnCommitCallbacks(execute=True):
+            Producto.objects.filter(pk=self.producto.pk).update(cantidad_actual=3)
+            invalidar('inventario', 'finanzas')
+            self.pedido.estado = 'en_proceso'
+            self.pedido.save()
+
+        self.assertEqual(versiones([autocompletar.DOMINIO]), version)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.buscar('gorras'), [('pedido', self.pedido.id)])
+
+    def test_tipo_invalido(self):
+        response = self.client.get(self.url, {'q': 'hilo', 'tipos': 'factura'})
+        self.assertEqual(response.status_code, 400)
+
+
+class VersionesCacheTests(TestCase):
+    def test_subidas_concurrentes_no_se_pierden(self):
+        antes, = versiones(['pruebas'])
+        hilos = [threading.Thread(target=lambda: [subir('pruebas') for _ in range(25)]) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        self.assertEqual(versiones(['pruebas']), (antes + 200,))
+
+    def test_sobreviven_a_la_cache_de_respuestas(self):
+        version = subir('pruebas')
+        cache.clear()
+        self.assertEqual(versiones(['pruebas']), (version,))
+
+
+class ConexionSqliteTests(TestCase):
+    def test_pragmas_y_solo_lectura(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            conexion = sqlite3.connect(Path(directorio) / 'prueba.sqlite3')
+            for sentencia in sqlite.sentencias(solo_lectura=True):
+                conexion.execute(sentencia)
+            self.assertEqual(conexion.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+            with self.assertRaises(sqlite3.OperationalError):
+                conexion.execute('CREATE TABLE t (x)')
+            conexion.close()
+
+    def test_lecturas_en_transaccion_no_van_a_reportes(self):
+        # El TestCase corre dentro de una transacción de 'default'
+        with solo_lectura():
+            self.assertIsNone(RouterReportes().db_for_read(Cliente))
+            self.assertEqual(Cliente.objects.all().db, 'default')
+
+    def test_medir_concurrencia(self):
+        salida = StringIO()
+        call_command('medir_concurrencia', segundos=0.2, escritores=1, lectores=1, stdout=salida)
+        self.assertIn('backend/sqlite', salida.getvalue())
+
+
+@override_settings(ESCRITURA_AGRUPADA=True)
+class EscrituraAgrupadaTests(TransactionTestCase):
+    def test_lote_con_resultados_por_unidad(self):
+        cola = escritura.ColaEscritura()
+
+        def crear(nombre):
+            return lambda: Categoria.objects.create(nombre=nombre).pk
+
+        def fallar():
+            Categoria.objects.create(nombre='Revertida')
+            raise ValueError('sin stock')
+
+        lote = [(unidad, Future()) for unidad in (crear('Hilos'), fallar, crear('Agujas'))]
+        for _, futuro in lote:
+            futuro.set_running_or_notify_cancel()
+        cola.procesar(lote)
+
+        self.assertTrue(Categoria.objects.filter(pk=lote[0][1].result()).exists())
+        self.assertIsInstance(lote[1][1].exception(), ValueError)
+        self.assertEqual(
+            set(Categoria.objects.values_list('nombre', flat=True)), {'Hilos', 'Agujas'}
+        )
+        self.assertEqual((cola.lotes, cola.unidades), (1, 3))
+
+    def test_requests_concurrentes_en_el_hilo_escritor(self):
+        hilos = []
+        resultados = {}
+
+        def vender(i):
+            resultados[i] = escritura.ejecutar(
+                lambda: (threading.current_thread().name, Categoria.objects.create(nombre=f'C{i}').pk)
+            )
+
+        for i in range(8):
+            hilos.append(threading.Thread(target=vender, args=(i,)))
+            hilos[-1].start()
+        for hilo in hilos:
+            hilo.join()
+
+        self.assertEqual({nombre for nombre, _ in resultados.values()}, {'escritor'})
+        self.assertEqual(Categoria.objects.count(), 8)
+
+    def test_tiempo_agotado_cancela_o_reporta_resultado_desconocido(self):
+        empezo, soltar = threading.Event(), threading.Event()
+        errores = []
+
+        def bloquear():
+            empezo.set()
+            soltar.wait(5)
+            return Categoria.objects.create(nombre='Lenta').pk
+
+        def primero():
+            try:
+                escritura.ejecutar(bloquear)
+            except Exception as e:
+                errores.append(e)
+
+        with mock.patch.object(escritura, 'cola', escritura.ColaEscritura()), \
+                mock.patch.object(escritura, 'ESPERA_RESULTADO', 0.05):
+            hilo = threading.Thread(target=primero)
+            hilo.start()
+            empezo.wait(5)
+            # Detrás de la unidad que no termina: se cancela sin ejecutarse
+            with self.assertRaises(TimeoutError):
+                escritura.ejecutar(lambda: Categoria.objects.create(nombre='Cancelada'))
+            hilo.join()
+            soltar.set()
+            self.assertIsInstance(errores[0], escritura.ResultadoDesconocido)
+
+            # La unidad que ya había empezado sí se confirma
+            with mock.patch.object(escritura, 'ESPERA_RESULTADO', 5):
+                escritura.ejecutar(lambda: None)
+        self.assertEqual(list(Categoria.objects.values_list('nombre', flat=True)), ['Lenta'])
+
+
+class MedicionTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        for i in range(3):
+            Cliente.objects.create(nombre=f'Cliente {i}', telefono=f'300{i:07d}')
+
+    def test_server_timing(self):
+        response = self.client.get('/api/clientes/clientes/')
+        tiempos = dict(
+            parte.strip().split(';', 1)[0:2] for parte in response['Server-Timing'].split(',')
+        )
+        self.assertEqual(set(tiempos), {'db', 'ser', 'total'})
+        self.assertRegex(response['Server-Timing'], r'db;dur=[\d.]+;desc="\d+ consultas"')
+
+    @override_settings(UMBRAL_REQUEST_LENTO_MS=0)
+    def test_log_de_requests_lentos_con_n_mas_1(self):
+        with self.assertLogs('backend.medicion', 'WARNING') as registro:
+            self.client.get('/api/clientes/clientes/', {'buscar': 'cliente', 'perfilar': 'token:firmado'})
+        linea = json.loads(registro.records[0].getMessage())
+        self.assertEqual((linea['metodo'], linea['estado']), ('GET', 200))
+        self.assertEqual(linea['ruta'], '/api/clientes/clientes/?buscar=cliente')  # Sin el token
+        self.assertGreater(linea['consultas'], 0)
+        self.assertTrue(linea['peores'])
+
+        medida = medicion.Medicion()
+        for i in range(medicion.REPETICIONES_N_MAS_1):
+            medida(lambda *args: None, 'SELECT * FROM t WHERE id = %s', (i,), False, {})
+        self.assertEqual(medida.repetidas(), [{'sql': 'SELECT * FROM t WHERE id = %s', 'veces': 5}])
+        self.assertTrue(medida.peores()[0]['n_mas_1'])
+
+
+class MetricasTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        ajuste = override_settings(DIRECTORIO_METRICAS=Path(self.directorio.name))
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.addCleanup(self.directorio.cleanup)
+        # El registro del proceso se vuelve a abrir en el directorio temporal
+        metricas.registro._pid = None
+        self.addCleanup(setattr, metricas.registro, '_pid', None)
+
+    def test_suma_los_archivos_de_todos_los_procesos(self):
+        otro = metricas.ArchivoMetricas(Path(self.directorio.name) / '99999.db')
+        for _ in range(1000):  # Obliga a crecer el archivo
+            otro.sumar(json.dumps(['bordados_pagos_registrados_total', []]), 2)
+        metricas.contar('bordados_pagos_registrados_total', 3)
+        metricas.observar('bordados_request_duracion_segundos', 0.03, vista='V.list', metodo='GET')
+        metricas.observar('bordados_request_duracion_segundos', 20, vista='V.list', metodo='GET')
+
+        texto = metricas.exposicion()
+        self.assertIn('bordados_pagos_registrados_total 2003\n', texto)
+        self.assertIn('bordados_request_duracion_segundos_bucket{metodo="GET",vista="V.list",le="0.025"} 0', texto)
+        self.assertIn('bordados_request_duracion_segundos_bucket{metodo="GET",vista="V.list",le="0.05"} 1', texto)
+        self.assertIn('bordados_request_duracion_segundos_bucket{metodo="GET",vista="V.list",le="+Inf"} 2', texto)
+        self.assertIn('bordados_request_duracion_segundos_count{metodo="GET",vista="V.list"} 2', texto)
+
+        # Un proceso nuevo con el mismo pid sigue sumando sobre el archivo
+        reabierto = metricas.ArchivoMetricas(otro.ruta)
+        reabierto.sumar(json.dumps(['bordados_pagos_registrados_total', []]), 1)
+        self.assertIn('bordados_pagos_registrados_total 2004\n', metricas.exposicion())
+
+    def test_requests_y_contadores_de_negocio(self):
+        client = APIClient()
+        Cliente.objects.create(nombre='Cliente', telefono='3001234567')
+        client.get('/api/clientes/clientes/')
+        pedido = Pedido.objects.create(
+            cliente=Cliente.objects.get(), fecha_entrega_prometida=timezone.now() + timedelta(days=3),
+            tipo_bordado='computarizado', descripcion='Bordado', precio_total=Decimal('100')
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            client.post(f'/api/pedidos/pedidos/{pedido.pk}/agregar_pago/', {'monto': '40'}, format='json')
+
+        texto = client.get('/metrics').content.decode()
+        self.assertIn('bordados_request_duracion_segundos_count{metodo="GET",vista="ClienteViewSet.list"} 1', texto)
+        self.assertIn('bordados_requests_total{codigo="200",vista="ClienteViewSet.list"} 1', texto)
+        self.assertRegex(texto, r'bordados_consultas_sql_total\{vista="ClienteViewSet.list"\} [1-9]')
+        self.assertIn('vista="PedidoViewSet.agregar_pago"', texto)
+        self.assertIn('bordados_pagos_registrados_total 1\n', texto)
+
+
+class PerfiladoTests(TestCase):
+    def setUp(self):
+        self.directorio = tempfile.TemporaryDirectory()
+        ajuste = override_settings(DIRECTORIO_PERFILES=Path(self.directorio.name))
+        ajuste.enable()
+        self.addCleanup(ajuste.disable)
+        self.addCleanup(self.directorio.cleanup)
+        self.client = APIClient()
+        self.staff = User.objects.create_user('admin', password='x', is_staff=True)
+        Cliente.objects.create(nombre='Cliente', telefono='3001234567')
+
+    def test_solo_staff_puede_perfilar(self):
+        response = self.client.get('/api/clientes/clientes/', HTTP_X_PERFILAR='1')
+        self.assertNotIn('X-Perfil', response)
+        response = self.client.get('/api/clientes/clientes/', {'perfilar': 'token-falso'})
+        self.assertNotIn('X-Perfil', response)
+        User.objects.create_user('vendedor', password='x')
+        self.assertIsNone(perfilado.usuario_del_token(perfilado.firmar('vendedor')))
+        self.assertEqual(list(Path(self.directorio.name).iterdir()), [])
+
+    def test_perfil_con_token_y_comando(self):
+        token = perfilado.firmar('admin')
+        primero = self.client.get('/api/clientes/clientes/', {'perfilar': token, 'perfilar_memoria': '1'})
+        self.assertEqual(primero.status_code, 200)
+        self.client.force_login(self.staff)
+        segundo = self.client.get('/api/clientes/clientes/', HTTP_X_PERFILAR='1')
+
+        perfiles = perfilado.cargar()
+        self.assertEqual([p['id'] for p in perfiles], [primero['X-Perfil'], segundo['X-Perfil']])
+        self.assertEqual(perfiles[0]['vista'], 'ClienteViewSet.list')
+        self.assertEqual(perfiles[0]['ruta'], '/api/clientes/clientes/')  # Sin el token
+        self.assertEqual(perfiles[0]['usuario'], 'admin')
+        self.assertGreater(perfiles[0]['consultas'], 0)
+        self.assertTrue(perfiles[0]['memoria'])
+        self.assertIsNone(perfiles[1]['memoria'])
+
+        salida = StringIO()
+        call_command('perfiles', 'listar', '--vista', 'ClienteViewSet.list', stdout=salida)
+        self.assertIn('2 perfil(es)', salida.getvalue())
+        salida = StringIO()
+        call_command('perfiles', 'agregar', '--vista', 'ClienteViewSet.list', '--top', '5', stdout=salida)
+        self.assertIn('cumulative', salida.getvalue())
+        salida = StringIO()
+        call_command('perfiles', 'comparar', primero['X-Perfil'], segundo['X-Perfil'], stdout=salida)
+        self.assertIn('después ms', salida.getvalue())
+
+
+ESCALA_PRUEBA = datos_sinteticos.Escala(clientes=30, productos=10, pedidos=40, ventas=80, dias=20, lote=25)
+
+
+class DatosSinteticosTests(TestCase):
+    def test_datos_coherentes(self):
+        filas = datos_sinteticos.sembrar(ESCALA_PRUEBA)
+        self.assertEqual(filas['clientes.Cliente'], 30)
+        self.assertEqual(filas['pedidos.Pedido'], 40)
+        self.assertEqual(VentaDirecta.objects.count(), 80)
+        self.assertEqual(MovimientoInventario.objects.count(), filas['finanzas.DetalleVentaDirecta'])
+
+        # Derivados recalculados y stock final igual al último movimiento de cada producto
+        hoy = timezone.localdate()
+        self.assertEqual(rollup.diferencias(hoy - timedelta(days=30), hoy), [])
+        self.assertEqual(metricas_clientes.diferencias(), [])
+        for producto in Producto.objects.filter(movimientos__isnull=False).distinct():
+            ultimo = producto.movimientos.order_by('fecha', 'id').last()
+            self.assertEqual(producto.cantidad_actual, ultimo.cantidad_nueva)
+        self.assertFalse(Pedido.objects.filter(adelanto_pagado__gt=F('precio_total')).exists())
+
+        # Sobre datos existentes no choca con teléfonos ni categorías
+        datos_sinteticos.sembrar(datos_sinteticos.Escala(clientes=5, productos=2, pedidos=0, ventas=0, dias=5))
+        self.assertEqual(Cliente.objects.count(), 35)
+
+
+class CargaTests(TransactionTestCase):
+    def test_reporte_por_endpoint(self):
+        datos_sinteticos.sembrar(ESCALA_PRUEBA)
+        reporte = carga.correr(segundos=0.5, hilos=2, mezcla={'venta': 1, 'pago': 1, 'dashboard': 1})
+        self.assertGreater(reporte['solicitudes'], 0)
+        self.assertEqual(reporte['errores'], 0)
+        self.assertIn('POST ventas-directas', reporte['endpoints'])
+        for datos in reporte['endpoints'].values():
+            self.assertLessEqual(datos['p50_ms'], datos['p99_ms'])
+        json.dumps(reporte)
+
+    def test_mezcla(self):
+        self.assertEqual(carga.leer_mezcla('venta=2, busqueda=1'), {'venta': 2, 'busqueda': 1})
+        with self.assertRaises(ValueError):
+            carga.leer_mezcla('reembolso=1')
+        self.assertEqual(carga.percentil([1, 2, 3, 4], 50), 2)
+        self.assertEqual(carga.percentil([1, 2, 3, 4], 99), 4)
+
+
+ARCHIVO_PRESUPUESTO = Path(__file__).with_name('presupuesto_consultas.json')
+# Datos de la medición base; la segunda se hace con diez veces más filas
+ESCALA_PRESUPUESTO = datos_sinteticos.Escala(clientes=8, productos=4, pedidos=10, ventas=12, dias=10, lote=50)
+PARES_DUPLICADOS = 3  # Candidatos a duplicado por cada escala
+# PUT, PATCH y DELETE usan el mismo queryset que retrieve, que ya se mide
+METODOS_MEDIDOS = ('get', 'post')
+SIN_MEDIR = {
+    'ClienteViewSet.importar': 'recibe un archivo Excel, no JSON',
+    'CandidatoDuplicadoViewSet.fusionar': 'borra clientes de los datos sembrados',
+}
+
+
+def _rutas(patrones, prefijo=''):
+    """(ruta, vista) de cada URL de la API registrada, sin las de sufijo de formato"""
+    for patron in patrones:
+        ruta = prefijo + str(patron.pattern).lstrip('^').rstrip('$')
+        if isinstance(patron, URLResolver):
+            yield from _rutas(patron.url_patterns, ruta)
+        elif ruta.startswith('api/') and '(?P<format>' not in ruta and getattr(patron.callback, 'actions', None):
+            yield ruta, patron.callback
+
+
+def _ultimo(modelo, **filtros):
+    return modelo.objects.filter(**filtros).order_by('-pk').values_list('pk', flat=True).first()
+
+
+def _cliente_con_mas_pedidos():
+    return Pedido.objects.values('cliente').annotate(n=Count('id')).order_by('-n', 'cliente')[0]['cliente']
+
+
+def _venta():
+    productos = Producto.objects.filter(cantidad_actual__gte=1).order_by('-cantidad_actual')[:3]
+    detalles = [{'producto': p.pk, 'cantidad': '1', 'precio_unitario': str(p.precio_venta)} for p in productos]
+    total = str(sum(p.precio_venta for p in productos))
+    return None, {
+        'cliente': _ultimo(Cliente), 'subtotal': total, 'total': total,
+        'metodo_pago': 'efectivo', 'detalles': detalles,
+    }
+
+
+def _pedido_con_saldo():
+    return _ultimo(Pedido, adelanto_pagado__lt=F('precio_total') - 2)
+
+
+# Vista -> función que retorna (pk o None, cuerpo) de un POST válido con los datos sembrados
+ESCRITURAS = {
+    'VentaDirectaViewSet.create': _venta,
+    'PagoPedidoViewSet.create': lambda: (None, {
+        'pedido': _pedido_con_saldo(), 'monto': '1', 'metodo_pago': 'efectivo', 'concepto': 'Abono',
+    }),
+    'PagoPedidoViewSet.lote': lambda: (None, {'pagos': [{'pedido': _pedido_con_saldo(), 'monto': '1'}]}),
+    'PedidoViewSet.create': lambda: (None, {
+        'cliente': _ultimo(Cliente), 'fecha_entrega_prometida': timezone.now() + timedelta(days=3),
+        'tipo_bordado': 'computarizado', 'descripcion': 'Logo en gorra', 'precio_total': '50000',
+    }),
+    'PedidoViewSet.agregar_pago': lambda: (_pedido_con_saldo(), {'monto': '1'}),
+    'PedidoViewSet.cambiar_estado': lambda: (_ultimo(Pedido, estado='recibido'), {'estado': 'en_proceso'}),
+    'PedidoViewSet.marcar_entregados': lambda: (None, {
+        'pedido_ids': list(Pedido.objects.filter(estado='terminado').values_list('pk', flat=True))
+    }),
+    'ProductoViewSet.create': lambda: (None, {
+        'nombre': 'Hilo metalizado', 'categoria': _ultimo(Categoria),
+        'precio_compra': '1000', 'precio_venta': '2500',
+    }),
+    'ProductoViewSet.ajustar_stock': lambda: (_ultimo(Producto), {'nueva_cantidad': '40', 'motivo': 'Conteo'}),
+    'CategoriaViewSet.create': lambda: (None, {'nombre': f'Categoría {Categoria.objects.count()}'}),
+    'ClienteViewSet.create': lambda: (None, {
+        'nombre': 'Cliente medido', 'telefono': f'31{Cliente.objects.count():08d}',
+    }),
+    'MovimientoInventarioViewSet.create': lambda: (None, {
+        'producto': _ultimo(Producto), 'tipo_movimiento': 'salida_venta', 'cantidad': '1',
+        'cantidad_anterior': '41', 'cantidad_nueva': '40', 'motivo': 'Conteo',
+    }),
+    'CandidatoDuplicadoViewSet.descartar': lambda: (_ultimo(CandidatoDuplicado, descartado=False), None),
+}
+# Vista -> pk del detalle a consultar, cuando no basta con el último registro
+DETALLES = {
+    'ClienteViewSet.historial_pedidos': _cliente_con_mas_pedidos,
+}
+# Vista -> parámetros de la consulta, además de traer todas las filas en una página
+PARAMETROS = {
+    'BuscarViewSet.list': lambda: {'q': Cliente.objects.values_list('nombre', flat=True).first()[:4]},
+}
+
+
+class PresupuestoConsultasTests(TestCase):
+    """
+    Cada endpoint de la API hace un número fijo de consultas SQL: se mide con
+    los datos de ESCALA_PRESUPUESTO y con diez veces más, y el número no puede
+    crecer ni pasar del presupuesto en presupuesto_consultas.json. Un N+1
+    (p. ej. un serializer anidado sin select_related) falla aquí mostrando la
+    sentencia repetida. Con ACTUALIZAR_PRESUPUESTO_CONSULTAS=1 se reescribe el
+    archivo con lo medido, para revisar el cambio en el diff.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        self.creados = 0
+
+    def endpoints(self):
+        """{vista: (método, ruta con {pk} o sin él, modelo)} de las cuatro apps y la búsqueda"""
+        encontrados = {}
+        for ruta, vista in _rutas(get_resolver().url_patterns):
+            for metodo, accion in vista.actions.items():
+                nombre = f'{vista.cls.__name__}.{accion}'
+                if metodo in METODOS_MEDIDOS and nombre not in SIN_MEDIR:
+                    if metodo == 'post' and nombre not in ESCRITURAS:
+                        self.fail(f'{nombre} no tiene cuerpo en ESCRITURAS ni está en SIN_MEDIR')
+                    ruta_medida = '/' + re.sub(r'\(\?P<pk>[^)]*\)', '{pk}', ruta)
+                    modelo = getattr(vista.cls, 'queryset', None)
+                    encontrados[nombre] = (metodo, ruta_medida, modelo.model if modelo is not None else None)
+        return encontrados
+
+    def sembrar(self, veces):
+        escala = replace(
+            ESCALA_PRESUPUESTO, semilla=veces, **{
+                campo: getattr(ESCALA_PRESUPUESTO, campo) * veces
+                for campo in ('clientes', 'productos', 'pedidos', 'ventas')
+            }
+        )
+        datos_sinteticos.sembrar(escala)
+        clientes = list(Cliente.objects.order_by('-pk').values_list('pk', flat=True)[:2 * PARES_DUPLICADOS * veces])
+        CandidatoDuplicado.objects.bulk_create([
+            CandidatoDuplicado(cliente_id=b, duplicado_id=a, puntaje=0.9, motivos='nombre')
+            for a, b in zip(clientes[::2], clientes[1::2])
+        ])
+        # Algunos pedidos listos para entregar
+        Pedido.objects.filter(pk__in=Pedido.objects.order_by('-pk').values('pk')[:3 * veces]).update(estado='terminado')
+
+    def medir(self, nombre, metodo, ruta, modelo):
+        """(consultas, medición) de un request al endpoint"""
+        cuerpo = None
+        if metodo == 'post':
+            pk, cuerpo = ESCRITURAS[nombre]()
+        else:
+            pk = DETALLES[nombre]() if nombre in DETALLES else _ultimo(modelo) if modelo else None
+        parametros = {'page_size': 500, **PARAMETROS.get(nombre, lambda: {})()}
+
+        # Sin caché ni índice de búsqueda, para medir las consultas que hace de verdad
+        cache.clear()
+        indice.descartar()
+        medida = medicion.Medicion()
+        with ExitStack() as pila:
+            for conexion in connections.all():
+                pila.enter_context(conexion.execute_wrapper(medida))
+            if metodo == 'get':
+                response = self.client.get(ruta.format(pk=pk), parametros)
+            else:
+                response = self.client.post(ruta.format(pk=pk), cuerpo, format='json')
+        self.assertLess(response.status_code, 300, f'{nombre}: {response.status_code} {response.content[:300]}')
+        return medida.consultas, medida
+
+    def medir_todos(self, endpoints):
+        return {nombre: self.medir(nombre, *datos) for nombre, datos in sorted(endpoints.items())}
+
+    def test_consultas_constantes_y_dentro_del_presupuesto(self):
+        endpoints = self.endpoints()
+        self.sembrar(1)
+        base = self.medir_todos(endpoints)
+        self.sembrar(9)
+        grande = self.medir_todos(endpoints)
+
+        medido = {nombre: max(base[nombre][0], grande[nombre][0]) for nombre in endpoints}
+        if os.environ.get('ACTUALIZAR_PRESUPUESTO_CONSULTAS') == '1':
+            ARCHIVO_PRESUPUESTO.write_text(json.dumps(dict(sorted(medido.items())), indent=2) + '\n', encoding='utf-8', newline='\r\n')
+        presupuesto = json.loads(ARCHIVO_PRESUPUESTO.read_text(encoding='utf-8'))
+
+        problemas = []
+        for nombre in sorted(endpoints):
+            (antes, _), (despues, medida) = base[nombre], grande[nombre]
+            if despues > antes:
+                problemas.append(f'{nombre}: {antes} consultas con 1x y {despues} con 10x')
+            elif nombre not in presupuesto:
+                problemas.append(f'{nombre}: sin presupuesto en {ARCHIVO_PRESUPUESTO.name}')
+                continue
+            elif medido[nombre] > presupuesto[nombre]:
+                problemas.append(f'{nombre}: {medido[nombre]} consultas, presupuesto {presupuesto[nombre]}')
+            else:
+                continue
+            for sentencia in medida.repetidas() or medida.peores():
+                problemas.append(f'    {sentencia["veces"]}x {sentencia["sql"]}')
+        problemas.extend(
+            f'{nombre}: está en {ARCHIVO_PRESUPUESTO.name} pero ya no es un endpoint medido'
+            for nombre in sorted(presupuesto.keys() - endpoints.keys())
+        )
+        if problemas:
+            self.fail('\n' + '\n'.join(problemas))
@@ -16,6 +16,8 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path , include 
+from .metricas import vista_metricas
+from .views import BuscarViewSet
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -23,4 +25,6 @@ urlpatterns = [
     path('api/clientes/', include('clientes.urls')),            
     path('api/pedidos/', include('pedidos.urls')),            
     path('api/finanzas/', include('finanzas.urls')),          
+    path('api/buscar/', BuscarViewSet.as_view({'get': 'list'}), name='buscar'),
+    path('metrics', vista_metricas, name='metricas'),
 ]
@@ -0,0 +1,24 @@
+from rest_framework import viewsets, status
+from rest_framework.response import Response
+
+from .autocompletar import indice, TIPOS, LIMITE_POR_DEFECTO, LIMITE_MAXIMO
+
+
+class BuscarViewSet(viewsets.ViewSet):
+    """Búsqueda global (typeahead) de clientes, productos y pedidos"""
+
+    def list(self, request):
+        texto = request.query_params.get('q', '')
+        tipos = [t for t in request.query_params.get('tipos', '').split(',') if t]
+
+        if any(tipo not in TIPOS for tipo in tipos):
+            return Response(
+                {'error': f'Tipo inválido. Opciones: {", ".join(TIPOS)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limite = min(int(request.query_params.get('limite', LIMITE_POR_DEFECTO)), LIMITE_MAXIMO)
+        except ValueError:
+            return Response({'error': 'limite debe ser un número'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(indice.buscar(texto, limite=max(limite, 1), tipos=tipos))
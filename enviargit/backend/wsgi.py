@@ -14,3 +14,15 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Precalentar la caché de los dashboards y el índice de búsqueda al iniciar cada worker
+from django.db import connections  # noqa: E402
+
+from backend.autocompletar import precargar  # noqa: E402
+from backend.cache import precalentar  # noqa: E402
+
+precalentar()
+precargar()
+# Con `gunicorn --preload` los workers se bifurcan de este proceso: que no
+# hereden la conexión SQLite abierta por el precalentamiento
+connections.close_all()
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ClientesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'clientes'
+
+    def ready(self):
+        from django.db.models.signals import post_migrate
+        from . import busqueda, metricas
+        metricas.conectar_senales()
+        post_migrate.connect(busqueda.restaurar_triggers, sender=self)
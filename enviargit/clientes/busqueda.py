@@ -0,0 +1,189 @@
+"""
+Búsqueda de clientes con índices FTS5 de SQLite
+
+- `clientes_busqueda`: nombre, email y dirección, con contenido externo en
+  clientes_cliente y tokens sin tildes ("Muñoz" encuentra "munoz"). Cada
+  palabra buscada se trata como prefijo.
+- `clientes_busqueda_telefono`: el teléfono canónico (solo dígitos, con
+  código de país) con el tokenizador trigram, que encuentra cualquier
+  fragmento de 3 o más dígitos (prefijo, sufijo o intermedio) sin importar
+  espacios o guiones.
+
+Los triggers de la base de datos mantienen ambos índices al insertar, editar
+o borrar clientes, incluso con bulk_create o update(). Las migraciones que
+reconstruyen la tabla clientes_cliente en SQLite borran los triggers: se
+vuelven a crear al final de cada `migrate` (`restaurar_triggers`, conectado en
+clientes/apps.py) y también con el comando `reconstruir_busqueda`.
+"""
+import re
+
+from django.db import connection, connections
+from django.db.models import Case, IntegerField, Value, When
+
+# Máximo de coincidencias que se ordenan por relevancia
+LIMITE_RESULTADOS = 500
+
+# Mínimo de dígitos para buscar por teléfono (el tokenizador trigram necesita 3)
+MIN_DIGITOS = 3
+
+SEPARADORES_TELEFONO = [' ', '-', '(', ')', '+', '.', '/']
+
+
+def _telefono_sql(fila):
+    """
+    Teléfono a indexar: la columna canónica, o los dígitos del teléfono si
+    aún no se calculó (duplicados pendientes de `fusionar_clientes`)
+    """
+    expresion = f'{fila}telefono'
+    for separador in SEPARADORES_TELEFONO:
+        expresion = f"replace({expresion}, '{separador}', '')"
+    return f'coalesce({fila}telefono_canonico, {expresion})'
+
+
+SQL_CREAR_TABLAS = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clientes_busqueda USING fts5(
+        nombre, email, direccion,
+        content='clientes_cliente', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clientes_busqueda_telefono USING fts5(
+        telefono, tokenize='trigram'
+    )
+    """,
+]
+
+SQL_BORRAR_TABLAS = [
+    'DROP TABLE IF EXISTS clientes_busqueda',
+    'DROP TABLE IF EXISTS clientes_busqueda_telefono',
+]
+
+SQL_BORRAR_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ai',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ad',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_au',
+]
+
+SQL_TRIGGERS = [
+    f"""
+    CREATE TRIGGER clientes_busqueda_ai AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+        VALUES (new.id, {_telefono_sql('new.')});
+    END
+    """,
+    """
+    CREATE TRIGGER clientes_busqueda_ad AFTER DELETE ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        DELETE FROM clientes_busqueda_telefono WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_au
+    AFTER UPDATE OF nombre, email, direccion, telefono, telefono_canonico
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        UPDATE clientes_busqueda_telefono SET telefono = {_telefono_sql('new.')}
+        WHERE rowid = new.id;
+    END
+    """,
+]
+
+SQL_RECONSTRUIR = [
+    "INSERT INTO clientes_busqueda(clientes_busqueda) VALUES ('rebuild')",
+    'DELETE FROM clientes_busqueda_telefono',
+    f"""
+    INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+    SELECT id, {_telefono_sql('')} FROM clientes_cliente
+    """,
+]
+
+
+def _ejecutar(sentencias, using='default'):
+    with connections[using].cursor() as cursor:
+        for sql in sentencias:
+            cursor.execute(sql)
+
+
+def crear_triggers(using='default'):
+    _ejecutar(SQL_BORRAR_TRIGGERS + SQL_TRIGGERS, using)
+
+
+def restaurar_triggers(using='default', **kwargs):
+    """Receptor de post_migrate: recrear los triggers si existen los índices FTS5"""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'clientes_busqueda'")
+        if cursor.fetchone() is None:
+            return
+    crear_triggers(using)
+
+
+def reconstruir():
+    """Crear lo que falte y recalcular ambos índices desde clientes_cliente"""
+    _ejecutar(SQL_CREAR_TABLAS)
+    crear_triggers()
+    _ejecutar(SQL_RECONSTRUIR)
+
+
+def solo_digitos(texto):
+    return re.sub(r'\D', '', texto or '')
+
+
+def consulta_texto(texto):
+    """
+    Expresión MATCH de FTS5: cada palabra entre comillas (así los caracteres
+    especiales de la sintaxis no rompen la consulta) y como prefijo.
+    """
+    palabras = re.findall(r'\w+', texto or '')
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def buscar_ids(texto, limite=LIMITE_RESULTADOS):
+    """
+    Ids de clientes que coinciden con `texto`, del más al menos relevante.
+    Las coincidencias por teléfono van primero; luego el orden de bm25, que
+    pesa más el nombre que el email y la dirección.
+    """
+    ids = []
+    with connection.cursor() as cursor:
+        digitos = solo_digitos(texto)
+        if len(digitos) >= MIN_DIGITOS:
+            cursor.execute(
+                'SELECT rowid FROM clientes_busqueda_telefono '
+                'WHERE telefono MATCH %s ORDER BY rank LIMIT %s',
+                [f'"{digitos}"', limite]
+            )
+            ids += [fila[0] for fila in cursor.fetchall()]
+
+        consulta = consulta_texto(texto)
+        if consulta:
+            cursor.execute(
+                'SELECT rowid FROM clientes_busqueda '
+                'WHERE clientes_busqueda MATCH %s '
+                'ORDER BY bm25(clientes_busqueda, 10.0, 2.0, 1.0) LIMIT %s',
+                [consulta, limite]
+            )
+            ids += [fila[0] for fila in cursor.fetchall()]
+
+    return list(dict.fromkeys(ids))[:limite]
+
+
+def filtrar(queryset, texto):
+    """
+    Restringir el queryset a los clientes que coinciden con `texto` y anotar
+    `relevancia` (0 = mejor coincidencia) para ordenar los resultados.
+    """
+    ids = buscar_ids(texto)
+    if not ids:
+        return queryset.none().annotate(relevancia=Value(0, output_field=IntegerField()))
+    return queryset.filter(pk__in=ids).annotate(relevancia=Case(
+        *[When(pk=pk, then=Value(posicion)) for posicion, pk in enumerate(ids)],
+        output_field=IntegerField()
+    ))
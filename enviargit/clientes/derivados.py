@@ -0,0 +1,81 @@
+"""
+Campos derivados de Cliente calculados en SQL
+
+Las propiedades del modelo (dias_desde_registro, dias_sin_comprar,
+es_cliente_nuevo, necesita_atencion) llaman a timezone.now() cada una y por
+cada fila. Para los listados se anotan en la consulta contra un único `ahora`
+por request, con las mismas reglas, y los filtros ?nuevo y
+?necesita_atencion usan las mismas condiciones sobre los índices de
+fecha_registro y (activo, -ultima_compra).
+"""
+from datetime import timedelta
+
+from django.db.models import BooleanField, Case, DateTimeField, F, Func, IntegerField, Q, Value, When
+
+DIAS_CLIENTE_NUEVO = 30
+DIAS_SIN_COMPRAR_ATENCION = 90
+
+
+class DiasDesde(Func):
+    """(ahora - fecha).days en SQLite; NULL si la fecha es NULL"""
+    template = 'CAST(julianday(%(expressions)s) AS INTEGER)'
+    arg_joiner = ') - julianday('
+    output_field = IntegerField()
+
+    def __init__(self, fecha, ahora):
+        super().__init__(Value(ahora, output_field=DateTimeField()), F(fecha))
+
+
+def es_nuevo(ahora):
+    """dias_desde_registro <= 30, es decir, registrado hace menos de 31 días"""
+    return Q(fecha_registro__gt=ahora - timedelta(days=DIAS_CLIENTE_NUEVO + 1))
+
+
+def necesita_atencion(ahora):
+    """dias_sin_comprar > 90, es decir, la última compra fue hace 91 días o más"""
+    return Q(ultima_compra__lte=ahora - timedelta(days=DIAS_SIN_COMPRAR_ATENCION + 1))
+
+
+# Orden del índice (activo, -ultima_compra) recorrido hacia atrás
+ORDEN_ATENCION = ['ultima_compra', '-id']
+
+
+def filtrar_necesita_atencion(queryset, ahora, activos=True):
+    """
+    Clientes activos (o inactivos) que necesitan atención, por el índice
+    (activo, -ultima_compra). Se filtra con `activo IN (...)` y no con
+    activo=True porque Django escribe el booleano como `WHERE activo`, que
+    SQLite no usa para buscar en el índice.
+    """
+    return queryset.filter(necesita_atencion(ahora), activo__in=[activos])
+
+
+def _condicion(q):
+    return Case(When(q, then=Value(True)), default=Value(False), output_field=BooleanField())
+
+
+# Columnas que necesita ClienteListaSerializer
+CAMPOS_LISTA = [
+    'id', 'nombre', 'telefono', 'email', 'direccion', 'tipo_cliente', 'descuento_especial',
+    'fecha_registro', 'ultima_compra', 'activo', 'notas', 'fecha_actualizacion',
+    'total_pedidos', 'total_facturado', 'total_pagado', 'saldo_pendiente',
+    'total_ventas', 'total_comprado', 'primera_compra', 'segmento',
+]
+
+CAMPOS_DERIVADOS = ['dias_desde_registro', 'dias_sin_comprar', 'es_cliente_nuevo', 'necesita_atencion']
+
+
+def filas_lista(queryset, ahora):
+    """
+    Diccionarios con CAMPOS_LISTA, las anotaciones que ya tenga el queryset
+    (p. ej. `relevancia`, que usa el cursor) y los cuatro campos derivados
+    con los nombres de las propiedades. Se usa values() porque esos nombres
+    no se pueden asignar sobre instancias de Cliente.
+    """
+    return queryset.annotate(
+        dias_desde_registro=DiasDesde('fecha_registro', ahora),
+        dias_sin_comprar=DiasDesde('ultima_compra', ahora),
+        es_cliente_nuevo=_condicion(es_nuevo(ahora)),
+        necesita_atencion=_condicion(necesita_atencion(ahora)),
+    ).values(*CAMPOS_LISTA, *queryset.query.annotations, *CAMPOS_DERIVADOS)
+
@@ -0,0 +1,197 @@
+"""
+Detección de clientes posiblemente duplicados ("Dotaciones Yazz" y
+"Dotaciones Yaz S.A.S")
+
+Comparar todos contra todos es O(n²). En su lugar cada cliente se ubica en
+bloques por claves baratas y solo se comparan los clientes que comparten un
+bloque:
+
+- clave fonética de las dos primeras palabras del nombre, y de la primera y
+  la última (sin tildes, sin S.A.S/Ltda, z = s, v = b, sin vocales...)
+- los últimos 7 dígitos del teléfono canónico
+- el email completo sin el dominio si es de un proveedor gratuito, o el
+  dominio si es de una empresa
+
+Cada par se califica con el coeficiente de Dice entre los bigramas de letras
+de los nombres normalizados (una intersección de conjuntos precalculados por
+cliente, que no depende del orden de las palabras), más un extra si coinciden
+teléfono o email. La lectura es una sola consulta; los bloques se pueden
+repartir en varios procesos. El comando
+`detectar_duplicados` guarda los pares en CandidatoDuplicado para revisarlos
+en /api/clientes/duplicados/.
+"""
+import re
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import CandidatoDuplicado, Cliente
+
+UMBRAL = 0.85
+EXTRA_CONTACTO = 0.15
+# Bloques más grandes se omiten: son claves demasiado comunes para distinguir
+MAX_BLOQUE = 300
+DIGITOS_TELEFONO = 7
+
+PALABRAS_IGNORADAS = {
+    'sas', 'sa', 'ltda', 'cia', 'eu', 'y', 'e', 'de', 'del', 'la', 'las', 'el', 'los',
+}
+PROVEEDORES_EMAIL = {
+    'gmail.com', 'hotmail.com', 'hotmail.es', 'outlook.com', 'outlook.es', 'yahoo.com',
+    'yahoo.es', 'live.com', 'icloud.com',
+}
+
+_FONETICA = [
+    (re.compile(r'ch'), 'x'),
+    (re.compile(r'qu'), 'k'),
+    (re.compile(r'c(?=[ei])'), 's'),
+    (re.compile(r'g(?=[ei])'), 'j'),
+    (re.compile(r'z'), 's'),
+    (re.compile(r'c'), 'k'),
+    (re.compile(r'll'), 'y'),
+    (re.compile(r'[vw]'), 'b'),
+    (re.compile(r'h'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def palabras(nombre):
+    """Palabras del nombre en minúsculas, sin tildes ni S.A.S, Ltda, de, la..."""
+    texto = _sin_tildes(nombre).lower().replace('.', '')
+    return [p for p in re.split(r'[^a-z0-9ñ]+', texto) if p and p not in PALABRAS_IGNORADAS]
+
+
+@lru_cache(maxsize=50000)  # Los nombres y apellidos se repiten mucho
+def clave_fonetica(palabra):
+    """Primera letra más las consonantes, con las reglas de sonido del español"""
+    for patron, reemplazo in _FONETICA:
+        palabra = patron.sub(reemplazo, palabra)
+    return palabra[:1] + re.sub(r'[aeiouy]', '', palabra[1:])
+
+
+def claves(nombre, telefono, email):
+    """Claves de bloque de un cliente"""
+    resultado = set()
+    fonetica = [clave_fonetica(p) for p in palabras(nombre)]
+    if fonetica:
+        resultado.add('n:' + ' '.join(fonetica[:2]))
+        resultado.add('n:' + ' '.join([fonetica[0], fonetica[-1]]))
+    if telefono and len(telefono) >= DIGITOS_TELEFONO:
+        resultado.add('t:' + telefono[-DIGITOS_TELEFONO:])
+    if email and '@' in email:
+        usuario, dominio = email.rsplit('@', 1)
+        resultado.add('e:' + (usuario if dominio in PROVEEDORES_EMAIL else dominio))
+    return resultado
+
+
+def bigramas(nombre):
+    """Conjunto de pares de letras del nombre normalizado, con los bordes de palabra"""
+    texto = ' ' + ' '.join(palabras(nombre)) + ' '
+    return frozenset(texto[i:i + 2] for i in range(len(texto) - 1))
+
+
+def similitud(a, b):
+    """Coeficiente de Dice 0-1 entre dos conjuntos de bigramas"""
+    if not a or not b:
+        return 0.0
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+def comparar_bloques(bloques, umbral=UMBRAL):
+    """
+    Pares (id_menor, id_mayor, puntaje, motivos) dentro de cada bloque.
+    Cada cliente es (id, bigramas del nombre, teléfono, email).
+    Función de módulo para poder correr en otro proceso.
+    """
+    pares = {}
+    for bloque in bloques:
+        for i, a in enumerate(bloque):
+            for b in bloque[i + 1:]:
+                par = (a[0], b[0]) if a[0] < b[0] else (b[0], a[0])
+                if par in pares:
+                    continue
+                motivos = []
+                if a[2] and a[2][-DIGITOS_TELEFONO:] == b[2][-DIGITOS_TELEFONO:]:
+                    motivos.append('telefono')
+                if a[3] and a[3] == b[3]:
+                    motivos.append('email')
+                nombre = similitud(a[1], b[1])
+                puntaje = min(1.0, nombre + EXTRA_CONTACTO * len(motivos))
+                if puntaje >= umbral:
+                    if nombre >= umbral:
+                        motivos.insert(0, 'nombre')
+                    pares[par] = (round(puntaje, 3), ','.join(motivos))
+    return [(a, b, puntaje, motivos) for (a, b), (puntaje, motivos) in pares.items()]
+
+
+def bloques():
+    """Lista de bloques (de 2 a MAX_BLOQUE clientes) y cuántos se omitieron por grandes"""
+    por_clave = defaultdict(list)
+    for pk, nombre, telefono, email in Cliente.objects.values_list(
+        'id', 'nombre', 'telefono_canonico', 'email'
+    ).iterator(chunk_size=5000):
+        cliente = (pk, bigramas(nombre), telefono or '', email or '')
+        for clave in claves(nombre, telefono, email):
+            por_clave[clave].append(cliente)
+
+    grandes = sum(1 for clientes in por_clave.values() if len(clientes) > MAX_BLOQUE)
+    return [c for c in por_clave.values() if 1 < len(c) <= MAX_BLOQUE], grandes
+
+
+def candidatos(umbral=UMBRAL, procesos=1):
+    """
+    Retorna (pares, estadísticas). Los pares van ordenados por puntaje y cada
+    uno es (cliente_id menor, cliente_id mayor, puntaje, motivos).
+    """
+    lista, omitidos = bloques()
+    if procesos > 1 and len(lista) > procesos:
+        # Repartir los bloques intercalados para equilibrar la carga
+        partes = [lista[i::procesos * 4] for i in range(procesos * 4)]
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            resultados = pool.map(comparar_bloques, partes, [umbral] * len(partes))
+            pares = [par for resultado in resultados for par in resultado]
+    else:
+        pares = comparar_bloques(lista, umbral)
+
+    # Un mismo par puede aparecer en varios bloques (o partes)
+    unicos = {}
+    for a, b, puntaje, motivos in pares:
+        if (a, b) not in unicos or unicos[(a, b)][0] < puntaje:
+            unicos[(a, b)] = (puntaje, motivos)
+    pares = sorted(
+        ((a, b, puntaje, motivos) for (a, b), (puntaje, motivos) in unicos.items()),
+        key=lambda par: (-par[2], par[0], par[1])
+    )
+    return pares, {
+        'bloques': len(lista),
+        'bloques_omitidos': omitidos,
+        'comparaciones': sum(len(c) * (len(c) - 1) // 2 for c in lista),
+    }
+
+
+@transaction.atomic
+def guardar(pares):
+    """
+    Reemplazar los candidatos pendientes. Los pares descartados en la revisión
+    se conservan y no se vuelven a proponer. Retorna cuántos se crearon.
+    """
+    descartados = set(CandidatoDuplicado.objects.filter(descartado=True).values_list('cliente_id', 'duplicado_id'))
+    CandidatoDuplicado.objects.filter(descartado=False).delete()
+    ahora = timezone.now()
+    nuevos = CandidatoDuplicado.objects.bulk_create([
+        CandidatoDuplicado(
+            cliente_id=a, duplicado_id=b, puntaje=puntaje, motivos=motivos, fecha_deteccion=ahora
+        )
+        for a, b, puntaje, motivos in pares
+        if (a, b) not in descartados
+    ], batch_size=1000)
+    return len(nuevos)
@@ -0,0 +1,84 @@
+"""
+Fusión de clientes duplicados
+
+Con el índice único de telefono_canonico ya no se pueden crear duplicados
+por teléfono; los que existían antes de la columna quedaron con
+telefono_canonico en NULL (ver la migración 0004). grupos_duplicados() los
+agrupa con el cliente que tiene el mismo número para `fusionar_clientes`.
+
+fusionar() también la usa la revisión de candidatos por nombre parecido
+(CandidatoDuplicadoViewSet.fusionar), donde el duplicado suele tener otro
+teléfono: ese número queda en las notas del principal.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+
+from backend.autocompletar import invalidar_indice
+from backend.cache import invalidar
+from .models import Cliente, telefono_canonico
+from . import metricas
+
+
+def grupos_duplicados():
+    """
+    Lista de (telefono_canonico, principal_id, [duplicado_id, ...]).
+    El principal es el cliente que ya tiene el número canónico o, si ninguno
+    lo tiene, el registrado primero.
+    """
+    pendientes = defaultdict(list)
+    for pk, telefono in Cliente.objects.filter(
+        telefono_canonico__isnull=True
+    ).order_by('fecha_registro', 'id').values_list('id', 'telefono'):
+        pendientes[telefono_canonico(telefono)].append(pk)
+
+    principales = dict(Cliente.objects.filter(
+        telefono_canonico__in=list(pendientes)
+    ).values_list('telefono_canonico', 'id'))
+
+    grupos = []
+    for canonico, ids in pendientes.items():
+        principal = principales.get(canonico)
+        if principal is None:
+            principal, ids = ids[0], ids[1:]
+        grupos.append((canonico, principal, ids))
+    return grupos
+
+
+@transaction.atomic
+def fusionar(canonico, principal_id, duplicado_ids):
+    """
+    Pasar pedidos y ventas de los duplicados al principal, completar los datos
+    que le falten y borrar los duplicados.
+    """
+    from finanzas.models import VentaDirecta
+    from pedidos.models import Pedido
+
+    Pedido.objects.filter(cliente_id__in=duplicado_ids).update(cliente_id=principal_id)
+    VentaDirecta.objects.filter(cliente_id__in=duplicado_ids).update(cliente_id=principal_id)
+
+    principal = Cliente.objects.get(pk=principal_id)
+    duplicados = list(Cliente.objects.filter(pk__in=duplicado_ids).order_by('fecha_registro', 'id'))
+
+    cambios = {'telefono_canonico': canonico or None}
+    for campo in ('email', 'direccion'):
+        if not getattr(principal, campo):
+            cambios[campo] = next((getattr(d, campo) for d in duplicados if getattr(d, campo)), '')
+    notas = [principal.notas] + [d.notas for d in duplicados]
+    # Un número distinto es otro contacto válido del cliente: no perderlo al borrar
+    notas += [
+        f'Otro teléfono: {d.telefono}' for d in duplicados
+        if telefono_canonico(d.telefono) != telefono_canonico(principal.telefono)
+    ]
+    cambios['notas'] = '\n'.join(nota for nota in notas if nota)
+
+    # Borrar antes de actualizar: el email pasa del duplicado al principal
+    Cliente.objects.filter(pk__in=duplicado_ids).delete()
+    Cliente.objects.filter(pk=principal_id).update(**cambios)
+    # Métricas y última compra con los pedidos y ventas que recibió
+    metricas.actualizar([principal_id])
+
+    # update() no dispara las señales de la caché ni del índice (los pedidos cambian de cliente)
+    invalidar('clientes', 'pedidos', 'finanzas')
+    invalidar_indice()
+
@@ -0,0 +1,277 @@
+"""
+Importación masiva de clientes desde CSV o XLSX
+
+El archivo se lee fila por fila y se procesa en lotes. Por cada lote:
+normalizar y validar las filas en Python, detectar duplicados dentro del
+archivo (teléfono o email ya vistos en filas anteriores) y contra la base de
+datos con una sola consulta, y crear las filas válidas con bulk_create.
+Así se evitan las 6+ consultas por cliente de ClienteSerializer + full_clean().
+
+Las filas con errores no detienen la importación: se devuelven en el reporte
+con su número de fila (la fila 1 es el encabezado).
+"""
+import csv
+import io
+import re
+import unicodedata
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from backend.autocompletar import invalidar_indice
+from backend.cache import invalidar
+from .models import Cliente, telefono_canonico
+
+TAMANO_LOTE = 1000
+
+# Encabezado normalizado -> campo del modelo
+COLUMNAS = {
+    'nombre': 'nombre',
+    'cliente': 'nombre',
+    'telefono': 'telefono',
+    'celular': 'telefono',
+    'email': 'email',
+    'correo': 'email',
+    'direccion': 'direccion',
+    'tipo': 'tipo_cliente',
+    'tipo_cliente': 'tipo_cliente',
+    'descuento': 'descuento_especial',
+    'descuento_especial': 'descuento_especial',
+    'notas': 'notas',
+}
+
+# Se acepta el valor o la etiqueta: "mayorista" o "Mayorista"
+TIPOS_CLIENTE = {
+    clave: valor
+    for valor, etiqueta in Cliente.TIPO_CLIENTE_CHOICES
+    for clave in (valor, etiqueta.lower())
+}
+
+
+class ArchivoInvalido(Exception):
+    """El archivo no se puede leer o no tiene las columnas requeridas"""
+
+
+def _sin_tildes(texto):
+    texto = unicodedata.normalize('NFKD', texto)
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def _columna(encabezado):
+    clave = re.sub(r'\W+', '_', _sin_tildes(str(encabezado or '')).strip().lower()).strip('_')
+    return COLUMNAS.get(clave)
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)  # Excel guarda los teléfonos como números
+    return str(valor).strip()
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    muestra = texto.read(4096)
+    texto.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t')
+    except csv.Error:
+        dialecto = csv.excel
+    yield from csv.reader(texto, dialecto)
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ArchivoInvalido('Para importar archivos .xlsx instale openpyxl (pip install openpyxl)')
+    libro = load_workbook(archivo, read_only=True, data_only=True)
+    try:
+        yield from libro.active.iter_rows(values_only=True)
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """
+    Generador de (número de fila, dict con los campos del modelo) a partir de
+    un archivo binario. El formato se decide por la extensión de `nombre`.
+    """
+    if nombre.lower().endswith('.xlsx'):
+        filas = _filas_xlsx(archivo)
+    elif nombre.lower().endswith(('.csv', '.txt')):
+        filas = _filas_csv(archivo)
+    else:
+        raise ArchivoInvalido('Formato no soportado. Use un archivo .csv o .xlsx')
+
+    try:
+        encabezado = next(filas)
+    except StopIteration:
+        raise ArchivoInvalido('El archivo está vacío')
+    except (UnicodeDecodeError, ValueError) as e:
+        raise ArchivoInvalido(f'No se pudo leer el archivo: {e}')
+
+    campos = [_columna(columna) for columna in encabezado]
+    faltantes = {'nombre', 'telefono'} - set(campos)
+    if faltantes:
+        raise ArchivoInvalido(f'Faltan columnas requeridas: {", ".join(sorted(faltantes))}')
+
+    numero = 1
+    try:
+        for numero, fila in enumerate(filas, start=2):
+            if not any(_texto(valor) for valor in fila):
+                continue
+            yield numero, {
+                campo: _texto(valor) for campo, valor in zip(campos, fila) if campo
+            }
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise ArchivoInvalido(f'No se pudo leer el archivo después de la fila {numero}: {e}')
+
+
+def normalizar(datos):
+    """
+    Aplicar las mismas reglas de limpieza y validación que ClienteSerializer
+    y Cliente.save(), sin consultas. Retorna (campos, errores).
+    """
+    errores = {}
+    campos = {
+        'direccion': datos.get('direccion', ''),
+        'notas': datos.get('notas', ''),
+    }
+
+    nombre = datos.get('nombre', '').strip()
+    if len(nombre) < 2:
+        errores['nombre'] = 'El nombre debe tener al menos 2 caracteres'
+    elif len(nombre) > 100:
+        errores['nombre'] = 'El nombre no puede tener más de 100 caracteres'
+    campos['nombre'] = nombre.title()
+
+    telefono = datos.get('telefono', '').strip()
+    digitos = re.sub(r'\D', '', telefono)
+    if not telefono:
+        errores['telefono'] = 'El teléfono es requerido'
+    elif len(digitos) < 7:
+        errores['telefono'] = 'El teléfono debe tener al menos 7 dígitos'
+    elif len(digitos) > 15 or len(telefono) > 20:
+        errores['telefono'] = 'El teléfono no puede tener más de 15 dígitos'
+    campos['telefono'] = telefono
+    campos['telefono_canonico'] = telefono_canonico(telefono) or None
+
+    email = datos.get('email', '').strip().lower()
+    if email:
+        try:
+            validate_email(email)
+        except ValidationError:
+            errores['email'] = 'Email inválido'
+    campos['email'] = email
+
+    tipo = datos.get('tipo_cliente', '').strip().lower() or 'particular'
+    if tipo not in TIPOS_CLIENTE:
+        errores['tipo_cliente'] = f'Tipo de cliente inválido. Opciones: {[v for v, _ in Cliente.TIPO_CLIENTE_CHOICES]}'
+    campos['tipo_cliente'] = TIPOS_CLIENTE.get(tipo, 'particular')
+
+    try:
+        descuento = Decimal(datos.get('descuento_especial', '').replace('%', '').strip() or '0')
+        if not 0 <= descuento <= 100:
+            raise InvalidOperation
+        campos['descuento_especial'] = descuento
+    except InvalidOperation:
+        errores['descuento_especial'] = 'El descuento debe estar entre 0% y 100%'
+
+    return campos, errores
+
+
+def _en_lotes(iterable, tamano):
+    lote = []
+    for elemento in iterable:
+        lote.append(elemento)
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def _existentes(validas):
+    """Teléfonos y emails de las filas que ya están en la base de datos (una consulta)"""
+    telefonos = {campos['telefono_canonico'] for _, campos in validas}
+    emails = {campos['email'] for _, campos in validas if campos['email']}
+    existentes = Cliente.objects.filter(
+        Q(telefono_canonico__in=telefonos) | Q(email__in=emails)
+    ).values_list('telefono_canonico', 'email')
+    telefonos_bd, emails_bd = set(), set()
+    for telefono, email in existentes:
+        telefonos_bd.add(telefono)
+        emails_bd.add(email)
+    return telefonos_bd, emails_bd
+
+
+def importar(filas, tamano_lote=TAMANO_LOTE, simular=False):
+    """
+    Importar las filas de leer_filas(). Con `simular` solo se valida.
+    Retorna {'filas', 'creados', 'errores': [{'fila', 'errores'}]}.
+    """
+    vistos_telefono, vistos_email = {}, {}
+    reporte = {'filas': 0, 'creados': 0, 'errores': []}
+
+    for lote in _en_lotes(filas, tamano_lote):
+        reporte['filas'] += len(lote)
+        validas = []
+        for numero, datos in lote:
+            campos, errores = normalizar(datos)
+            # Duplicados dentro del archivo
+            if 'telefono' not in errores and campos['telefono_canonico'] in vistos_telefono:
+                errores['telefono'] = f'Teléfono repetido en la fila {vistos_telefono[campos["telefono_canonico"]]}'
+            if campos['email'] and 'email' not in errores and campos['email'] in vistos_email:
+                errores['email'] = f'Email repetido en la fila {vistos_email[campos["email"]]}'
+            if errores:
+                reporte['errores'].append({'fila': numero, 'errores': errores})
+                continue
+            vistos_telefono[campos['telefono_canonico']] = numero
+            if campos['email']:
+                vistos_email[campos['email']] = numero
+            validas.append((numero, campos))
+
+        reporte['creados'] += _crear_lote(validas, reporte['errores'], simular)
+
+    reporte['errores'].sort(key=lambda e: e['fila'])
+    if reporte['creados'] and not simular:
+        # bulk_create no dispara las señales de la caché ni del índice de búsqueda
+        invalidar('clientes')
+        invalidar_indice()
+    return reporte
+
+
+def _crear_lote(validas, errores, simular):
+    """Descartar los duplicados contra la base de datos y crear el resto"""
+    for _ in range(2):
+        telefonos_bd, emails_bd = _existentes(validas) if validas else (set(), set())
+        nuevas = []
+        for numero, campos in validas:
+            duplicado = {}
+            if campos['telefono_canonico'] in telefonos_bd:
+                duplicado['telefono'] = 'Ya existe un cliente con este teléfono'
+            if campos['email'] and campos['email'] in emails_bd:
+                duplicado['email'] = 'Ya existe un cliente con este email'
+            if duplicado:
+                errores.append({'fila': numero, 'errores': duplicado})
+            else:
+                nuevas.append((numero, campos))
+
+        if simular or not nuevas:
+            return len(nuevas)
+        try:
+            with transaction.atomic():
+                Cliente.objects.bulk_create([Cliente(**campos) for _, campos in nuevas])
+            return len(nuevas)
+        except IntegrityError:
+            # Otro proceso creó alguno de estos clientes después de la consulta
+            validas = nuevas
+
+    errores.extend({'fila': numero, 'errores': {'telefono': 'No se pudo crear por un conflicto concurrente'}}
+                   for numero, _ in validas)
+    return 0
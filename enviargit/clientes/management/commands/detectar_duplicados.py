@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes import duplicados
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = (
+        'Busca clientes con nombres parecidos, mismo teléfono o email y guarda los pares '
+        'para revisarlos en /api/clientes/duplicados/'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--umbral', type=float, default=duplicados.UMBRAL,
+            help=f'Similitud mínima de 0 a 1 (por defecto {duplicados.UMBRAL})'
+        )
+        parser.add_argument(
+            '--procesos', type=int, default=1,
+            help='Repartir la comparación de bloques en N procesos'
+        )
+        parser.add_argument(
+            '--listar', type=int, default=20,
+            help='Cuántos pares mostrar (0 para ninguno)'
+        )
+        parser.add_argument(
+            '--simular', action='store_true',
+            help='Solo mostrar los pares, sin guardarlos'
+        )
+
+    def handle(self, *args, **options):
+        if not 0 < options['umbral'] <= 1:
+            raise CommandError('El umbral debe estar entre 0 y 1')
+
+        inicio = time.perf_counter()
+        pares, estadisticas = duplicados.candidatos(options['umbral'], max(options['procesos'], 1))
+        segundos = time.perf_counter() - inicio
+
+        mostrar = pares[:options['listar']]
+        nombres = dict(Cliente.objects.filter(
+            pk__in=[pk for a, b, _, _ in mostrar for pk in (a, b)]
+        ).values_list('id', 'nombre'))
+        for a, b, puntaje, motivos in mostrar:
+            self.stdout.write(f'  {puntaje:.2f} #{a} {nombres[a]} ~ #{b} {nombres[b]} ({motivos})')
+
+        self.stdout.write(
+            f'{estadisticas["bloques"]} bloque(s), {estadisticas["comparaciones"]} comparaciones, '
+            f'{estadisticas["bloques_omitidos"]} bloque(s) omitidos por grandes ({segundos:.2f} s)'
+        )
+        if options['simular']:
+            self.stdout.write(f'{len(pares)} par(es) encontrados (sin guardar)')
+        else:
+            creados = duplicados.guardar(pares)
+            self.stdout.write(self.style.SUCCESS(f'{creados} par(es) pendientes de revisión'))
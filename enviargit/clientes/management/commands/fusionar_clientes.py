@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from clientes import fusion
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = 'Busca clientes con el mismo teléfono canónico y los fusiona en el más antiguo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--aplicar', action='store_true',
+            help='Fusionar los duplicados. Sin esta opción solo se listan'
+        )
+
+    def handle(self, *args, **options):
+        grupos = fusion.grupos_duplicados()
+        nombres = dict(Cliente.objects.filter(
+            pk__in=[pk for _, principal, ids in grupos for pk in [principal, *ids]]
+        ).values_list('id', 'nombre'))
+
+        for canonico, principal, ids in grupos:
+            if ids:
+                duplicados = ', '.join(f'#{pk} {nombres[pk]}' for pk in ids)
+                self.stdout.write(f'  +{canonico}: #{principal} {nombres[principal]} <- {duplicados}')
+
+        if options['aplicar']:
+            for canonico, principal, ids in grupos:
+                fusion.fusionar(canonico, principal, ids)
+            self.stdout.write(self.style.SUCCESS(
+                f'{sum(len(ids) for _, _, ids in grupos)} cliente(s) duplicado(s) fusionado(s)'
+            ))
+        else:
+            self.stdout.write(
+                f'{sum(len(ids) for _, _, ids in grupos)} cliente(s) duplicado(s). '
+                'Use --aplicar para fusionarlos'
+            )
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes import importacion
+
+
+class Command(BaseCommand):
+    help = 'Importa clientes desde un archivo CSV o XLSX (columnas: nombre, telefono, email, direccion, tipo, descuento, notas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .xlsx')
+        parser.add_argument(
+            '--lote', type=int, default=importacion.TAMANO_LOTE,
+            help=f'Filas por lote (por defecto {importacion.TAMANO_LOTE})'
+        )
+        parser.add_argument('--simular', action='store_true', help='Solo validar, sin crear clientes')
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                reporte = importacion.importar(
+                    importacion.leer_filas(archivo, options['archivo']),
+                    tamano_lote=options['lote'], simular=options['simular']
+                )
+        except OSError as e:
+            raise CommandError(f'No se pudo abrir el archivo: {e}')
+        except importacion.ArchivoInvalido as e:
+            raise CommandError(str(e))
+
+        for error in reporte['errores']:
+            detalle = '; '.join(f'{campo}: {mensaje}' for campo, mensaje in error['errores'].items())
+            self.stdout.write(f'  Fila {error["fila"]}: {detalle}')
+
+        accion = 'se crearían' if options['simular'] else 'creados'
+        self.stdout.write(self.style.SUCCESS(
+            f'{reporte["filas"]} fila(s) leídas, {reporte["creados"]} cliente(s) {accion}, '
+            f'{len(reporte["errores"])} con errores'
+        ))
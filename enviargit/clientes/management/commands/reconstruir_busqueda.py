@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from clientes import busqueda
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = 'Recrea los triggers y recalcula los índices FTS5 de búsqueda de clientes'
+
+    def handle(self, *args, **options):
+        busqueda.reconstruir()
+        self.stdout.write(self.style.SUCCESS(
+            f'Índice de búsqueda reconstruido: {Cliente.objects.count()} cliente(s)'
+        ))
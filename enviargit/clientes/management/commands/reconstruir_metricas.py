@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from clientes import metricas
+
+
+class Command(BaseCommand):
+    help = 'Recalcula o verifica las métricas acumuladas de los clientes (pedidos, pagos, ventas y fechas de compra)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Solo comparar las métricas guardadas contra pedidos y ventas, sin modificarlas'
+        )
+
+    def handle(self, *args, **options):
+        if not options['verificar']:
+            with transaction.atomic():
+                clientes = metricas.reconstruir()
+            self.stdout.write(f'Métricas recalculadas: {clientes} cliente(s)')
+
+        diferencias = metricas.diferencias()
+        for cliente_id, campo, guardado, esperado in diferencias:
+            self.stdout.write(f'  Cliente {cliente_id} {campo}: esperado={esperado} guardado={guardado}')
+
+        if diferencias:
+            raise CommandError(f'{len(diferencias)} diferencia(s) entre las métricas y las tablas de pedidos y ventas')
+
+        self.stdout.write(self.style.SUCCESS('Métricas de clientes verificadas'))
@@ -0,0 +1,28 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from clientes.models import Cliente
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el segmento RFM (recencia, frecuencia, monto) de todos los clientes. Pensado para correr cada noche'
+
+    def handle(self, *args, **options):
+        try:
+            from clientes import segmentacion
+        except ImportError:
+            raise CommandError('La segmentación requiere numpy (pip install numpy)')
+
+        inicio = time.perf_counter()
+        resultado = segmentacion.segmentar()
+        segundos = time.perf_counter() - inicio
+
+        nombres = dict(Cliente.SEGMENTO_CHOICES)
+        for segmento, total in sorted(resultado['por_segmento'].items(), key=lambda s: -s[1]):
+            self.stdout.write(f'  {nombres.get(segmento, segmento)}: {total}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{resultado["clientes"]} cliente(s) segmentados, {resultado["cambios"]} cambiaron de segmento '
+            f'({segundos:.2f} s)'
+        ))
@@ -0,0 +1,145 @@
+"""
+Métricas acumuladas de cada cliente (columnas desnormalizadas de Cliente)
+
+- total_pedidos, total_facturado, total_pagado y saldo_pendiente: pedidos no
+  cancelados (precio_total y adelanto_pagado)
+- total_ventas: ventas directas; total_comprado = total_facturado + total_ventas
+- primera_compra y ultima_compra: fechas de pedidos no cancelados y ventas
+
+Cada escritura recalcula solo los clientes afectados con un UPDATE de
+subconsultas correlacionadas, que leen los pedidos y ventas de ese cliente por
+el índice de cliente_id, en la misma transacción: las señales de Pedido y
+VentaDirecta para save() y delete(), y llamadas directas a `actualizar()`
+desde los update() de finanzas/pagos.py y clientes/fusion.py. El comando
+`reconstruir_metricas` recalcula o verifica todos los clientes.
+
+No se invalida la caché del dominio clientes: ningún payload cacheado usa
+estas columnas, y cada pedido o pago ya invalida pedidos/finanzas.
+"""
+from decimal import Decimal
+
+from django.db.models import (
+    Count, DateTimeField, DecimalField, F, IntegerField, Max, Min, OuterRef, Subquery, Sum, Value
+)
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from finanzas.models import VentaDirecta
+from pedidos.models import Pedido
+from .models import Cliente
+
+CAMPOS = [
+    'total_pedidos', 'total_facturado', 'total_pagado', 'saldo_pendiente',
+    'total_ventas', 'total_comprado', 'primera_compra', 'ultima_compra',
+]
+
+_DINERO = DecimalField(max_digits=14, decimal_places=2)
+_FECHA = DateTimeField()
+
+
+def _agregado(queryset, agregado, output_field, defecto=None):
+    """(SELECT agregado FROM ... WHERE cliente_id = clientes_cliente.id)"""
+    subconsulta = Subquery(
+        queryset.filter(cliente_id=OuterRef('pk')).order_by().values('cliente_id').annotate(
+            valor=agregado
+        ).values('valor'),
+        output_field=output_field
+    )
+    if defecto is None:
+        return subconsulta
+    return Coalesce(subconsulta, Value(defecto), output_field=output_field)
+
+
+def _menor(a, b):
+    """MIN(a, b) ignorando NULL (Least de SQLite devuelve NULL si alguno lo es)"""
+    return Least(Coalesce(a, b), Coalesce(b, a), output_field=_FECHA)
+
+
+def _mayor(a, b):
+    return Greatest(Coalesce(a, b), Coalesce(b, a), output_field=_FECHA)
+
+
+def expresiones():
+    """Campo -> expresión que lo calcula desde pedidos y ventas"""
+    pedidos = Pedido.objects.exclude(estado='cancelado')
+    ventas = VentaDirecta.objects.all()
+    cero = Decimal('0')
+
+    facturado = _agregado(pedidos, Sum('precio_total'), _DINERO, cero)
+    total_ventas = _agregado(ventas, Sum('total'), _DINERO, cero)
+    return {
+        'total_pedidos': _agregado(pedidos, Count('id'), IntegerField(), 0),
+        'total_facturado': facturado,
+        'total_pagado': _agregado(pedidos, Sum('adelanto_pagado'), _DINERO, cero),
+        'saldo_pendiente': _agregado(pedidos, Sum(F('precio_total') - F('adelanto_pagado')), _DINERO, cero),
+        'total_ventas': total_ventas,
+        'total_comprado': facturado + total_ventas,
+        'primera_compra': _menor(
+            _agregado(pedidos, Min('fecha_pedido'), _FECHA), _agregado(ventas, Min('fecha_venta'), _FECHA)
+        ),
+        'ultima_compra': _mayor(
+            _agregado(pedidos, Max('fecha_pedido'), _FECHA), _agregado(ventas, Max('fecha_venta'), _FECHA)
+        ),
+    }
+
+
+def actualizar(cliente_ids):
+    """
+    Recalcular las métricas de los clientes indicados (ids o un queryset de
+    ids) con un solo UPDATE. Retorna cuántos clientes se actualizaron.
+    """
+    if isinstance(cliente_ids, (list, set, tuple)):
+        cliente_ids = [pk for pk in cliente_ids if pk is not None]
+        if not cliente_ids:
+            return 0
+    return Cliente.objects.filter(pk__in=cliente_ids).update(**expresiones())
+
+
+def reconstruir():
+    """Recalcular todos los clientes. Retorna cuántos se actualizaron"""
+    return Cliente.objects.update(**expresiones())
+
+
+def diferencias():
+    """Lista de (cliente_id, campo, guardado, esperado) donde las columnas no coinciden"""
+    calculados = {f'calculado_{campo}': expresion for campo, expresion in expresiones().items()}
+    filas = Cliente.objects.annotate(**calculados).values('id', *CAMPOS, *calculados).order_by('id')
+    return [
+        (fila['id'], campo, fila[campo], fila[f'calculado_{campo}'])
+        for fila in filas.iterator()
+        for campo in CAMPOS
+        if fila[campo] != fila[f'calculado_{campo}']
+    ]
+
+
+# --- Señales ---------------------------------------------------------------
+
+def _cliente_anterior(sender, instance, raw=False, **kwargs):
+    """Si la fila cambia de cliente, el anterior también se recalcula"""
+    if raw or not instance.pk:
+        return
+    instance._cliente_anterior = sender.objects.filter(pk=instance.pk).values_list(
+        'cliente_id', flat=True
+    ).first()
+
+
+def _al_guardar(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    actualizar({instance.cliente_id, getattr(instance, '_cliente_anterior', None)})
+    instance._cliente_anterior = None
+
+
+def _al_borrar(sender, instance, origin=None, **kwargs):
+    # Al borrar el cliente se borran en cascada sus pedidos: no hay nada que recalcular
+    if isinstance(origin, Cliente) or getattr(origin, 'model', None) is Cliente:
+        return
+    actualizar([instance.cliente_id])
+
+
+def conectar_senales():
+    for modelo in (Pedido, VentaDirecta):
+        nombre = modelo.__name__
+        pre_save.connect(_cliente_anterior, sender=modelo, dispatch_uid=f'metricas_anterior_{nombre}')
+        post_save.connect(_al_guardar, sender=modelo, dispatch_uid=f'metricas_guardar_{nombre}')
+        post_delete.connect(_al_borrar, sender=modelo, dispatch_uid=f'metricas_borrar_{nombre}')
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-fecha_registro', '-id'], name='clientes_cl_fecha_r_540479_idx'),
+        ),
+    ]
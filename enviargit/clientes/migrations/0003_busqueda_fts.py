@@ -0,0 +1,73 @@
+from django.db import migrations
+
+# SQL tal como quedó en esta migración; la definición vigente está en clientes/busqueda.py
+SOLO_DIGITOS_NEW = (
+    "replace(replace(replace(replace(replace(replace(replace("
+    "new.telefono, ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), '/', '')"
+)
+
+CREAR = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clientes_busqueda USING fts5(
+        nombre, email, direccion,
+        content='clientes_cliente', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS clientes_busqueda_telefono USING fts5(
+        telefono, tokenize='trigram'
+    )
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_ai AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+        VALUES (new.id, {SOLO_DIGITOS_NEW});
+    END
+    """,
+    """
+    CREATE TRIGGER clientes_busqueda_ad AFTER DELETE ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        DELETE FROM clientes_busqueda_telefono WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_au AFTER UPDATE OF nombre, email, direccion, telefono
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        UPDATE clientes_busqueda_telefono SET telefono = {SOLO_DIGITOS_NEW}
+        WHERE rowid = new.id;
+    END
+    """,
+    "INSERT INTO clientes_busqueda(clientes_busqueda) VALUES ('rebuild')",
+    f"""
+    INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+    SELECT id, {SOLO_DIGITOS_NEW.replace('new.', '')} FROM clientes_cliente
+    """,
+]
+
+BORRAR = [
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ai',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ad',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_au',
+    'DROP TABLE IF EXISTS clientes_busqueda',
+    'DROP TABLE IF EXISTS clientes_busqueda_telefono',
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        # Índices FTS5 de búsqueda (ver clientes/busqueda.py)
+        migrations.RunSQL(sql=CREAR, reverse_sql=BORRAR),
+    ]
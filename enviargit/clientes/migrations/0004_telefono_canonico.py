@@ -0,0 +1,119 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:14
+
+import re
+
+from django.db import migrations, models
+
+CODIGO_PAIS = '57'
+
+SOLO_DIGITOS = (
+    "replace(replace(replace(replace(replace(replace(replace("
+    "{fila}telefono, ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), '/', '')"
+)
+
+
+def _telefono_sql(fila):
+    return f"coalesce({fila}telefono_canonico, {SOLO_DIGITOS.format(fila=fila)})"
+
+
+# El índice de teléfonos pasa a usar la columna canónica
+TRIGGERS = [
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ai',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_au',
+    f"""
+    CREATE TRIGGER clientes_busqueda_ai AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+        VALUES (new.id, {_telefono_sql('new.')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_au
+    AFTER UPDATE OF nombre, email, direccion, telefono, telefono_canonico
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        UPDATE clientes_busqueda_telefono SET telefono = {_telefono_sql('new.')}
+        WHERE rowid = new.id;
+    END
+    """,
+]
+
+TRIGGERS_ANTERIORES = [
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ai',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_au',
+    f"""
+    CREATE TRIGGER clientes_busqueda_ai AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+        VALUES (new.id, {SOLO_DIGITOS.format(fila='new.')});
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_au AFTER UPDATE OF nombre, email, direccion, telefono
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        UPDATE clientes_busqueda_telefono SET telefono = {SOLO_DIGITOS.format(fila='new.')}
+        WHERE rowid = new.id;
+    END
+    """,
+]
+
+
+def telefono_canonico(telefono):
+    # Copia de clientes.models.telefono_canonico al momento de esta migración
+    telefono = (telefono or '').strip()
+    digitos = re.sub(r'\D', '', telefono)
+    if telefono.startswith('+'):
+        return digitos
+    if digitos.startswith('00'):
+        return digitos[2:]
+    if len(digitos) == 10:
+        return CODIGO_PAIS + digitos
+    return digitos
+
+
+def calcular_canonicos(apps, schema_editor):
+    """
+    Llenar telefono_canonico. Si dos clientes tienen el mismo número, solo el
+    más antiguo lo recibe; los demás quedan en NULL para `fusionar_clientes`.
+    """
+    Cliente = apps.get_model('clientes', 'Cliente')
+    vistos = set()
+    pendientes = []
+    for cliente in Cliente.objects.order_by('fecha_registro', 'id').only('id', 'telefono').iterator():
+        canonico = telefono_canonico(cliente.telefono) or None
+        if canonico in vistos:
+            continue
+        vistos.add(canonico)
+        cliente.telefono_canonico = canonico
+        pendientes.append(cliente)
+    Cliente.objects.bulk_update(pendientes, ['telefono_canonico'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0003_busqueda_fts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='telefono_canonico',
+            field=models.CharField(editable=False, help_text='Dígitos del teléfono con código de país, para detectar duplicados y búsquedas exactas', max_length=20, null=True),
+        ),
+        migrations.RunSQL(sql=TRIGGERS, reverse_sql=TRIGGERS_ANTERIORES),
+        migrations.RunPython(calcular_canonicos, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='cliente',
+            constraint=models.UniqueConstraint(condition=models.Q(('telefono_canonico__isnull', False)), fields=('telefono_canonico',), name='telefono_canonico_unico'),
+        ),
+    ]
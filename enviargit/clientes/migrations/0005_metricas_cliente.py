@@ -0,0 +1,134 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:21
+
+from django.db import migrations, models
+
+SOLO_DIGITOS = (
+    "replace(replace(replace(replace(replace(replace(replace("
+    "{fila}telefono, ' ', ''), '-', ''), '(', ''), ')', ''), '+', ''), '.', ''), '/', '')"
+)
+
+
+def _telefono_sql(fila):
+    return f"coalesce({fila}telefono_canonico, {SOLO_DIGITOS.format(fila=fila)})"
+
+
+# Agregar columnas NOT NULL reconstruye la tabla en SQLite y borra los
+# triggers de la búsqueda: se vuelven a crear (los mismos de la 0004)
+TRIGGERS = [
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ai',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_ad',
+    'DROP TRIGGER IF EXISTS clientes_busqueda_au',
+    f"""
+    CREATE TRIGGER clientes_busqueda_ai AFTER INSERT ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        INSERT INTO clientes_busqueda_telefono(rowid, telefono)
+        VALUES (new.id, {_telefono_sql('new.')});
+    END
+    """,
+    """
+    CREATE TRIGGER clientes_busqueda_ad AFTER DELETE ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        DELETE FROM clientes_busqueda_telefono WHERE rowid = old.id;
+    END
+    """,
+    f"""
+    CREATE TRIGGER clientes_busqueda_au
+    AFTER UPDATE OF nombre, email, direccion, telefono, telefono_canonico
+    ON clientes_cliente BEGIN
+        INSERT INTO clientes_busqueda(clientes_busqueda, rowid, nombre, email, direccion)
+        VALUES ('delete', old.id, old.nombre, old.email, old.direccion);
+        INSERT INTO clientes_busqueda(rowid, nombre, email, direccion)
+        VALUES (new.id, new.nombre, new.email, new.direccion);
+        UPDATE clientes_busqueda_telefono SET telefono = {_telefono_sql('new.')}
+        WHERE rowid = new.id;
+    END
+    """,
+]
+
+_PEDIDOS = "FROM pedidos_pedido p WHERE p.cliente_id = clientes_cliente.id AND p.estado != 'cancelado'"
+_VENTAS = "FROM finanzas_ventadirecta v WHERE v.cliente_id = clientes_cliente.id"
+
+# Mismo cálculo que clientes/metricas.py al momento de esta migración
+CALCULAR_METRICAS = f"""
+    UPDATE clientes_cliente SET
+        total_pedidos = (SELECT COUNT(*) {_PEDIDOS}),
+        total_facturado = coalesce((SELECT SUM(p.precio_total) {_PEDIDOS}), 0),
+        total_pagado = coalesce((SELECT SUM(p.adelanto_pagado) {_PEDIDOS}), 0),
+        saldo_pendiente = coalesce((SELECT SUM(p.precio_total - p.adelanto_pagado) {_PEDIDOS}), 0),
+        total_ventas = coalesce((SELECT SUM(v.total) {_VENTAS}), 0),
+        total_comprado = coalesce((SELECT SUM(p.precio_total) {_PEDIDOS}), 0)
+                       + coalesce((SELECT SUM(v.total) {_VENTAS}), 0),
+        primera_compra = (
+            SELECT MIN(fecha) FROM (
+                SELECT MIN(p.fecha_pedido) AS fecha {_PEDIDOS}
+                UNION ALL SELECT MIN(v.fecha_venta) {_VENTAS}
+            )
+        ),
+        ultima_compra = (
+            SELECT MAX(fecha) FROM (
+                SELECT MAX(p.fecha_pedido) AS fecha {_PEDIDOS}
+                UNION ALL SELECT MAX(v.fecha_venta) {_VENTAS}
+            )
+        )
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0004_telefono_canonico'),
+        ('finanzas', '0003_indices_paginacion'),
+        ('pedidos', '0003_indice_estado_entrega'),
+    ]
+
+    operations = [
+        # Al revertir, quitar las columnas también borra los triggers
+        migrations.RunSQL(sql=migrations.RunSQL.noop, reverse_sql=TRIGGERS),
+        migrations.AddField(
+            model_name='cliente',
+            name='primera_compra',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Fecha de la primera compra (pedido o venta directa)', null=True),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='saldo_pendiente',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Lo que falta por pagar de los pedidos no cancelados', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_comprado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Pedidos facturados más ventas directas', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_facturado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma del precio de los pedidos no cancelados', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_pagado',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma de lo abonado a los pedidos no cancelados', max_digits=14),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_pedidos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Pedidos no cancelados'),
+        ),
+        migrations.AddField(
+            model_name='cliente',
+            name='total_ventas',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, help_text='Suma de las ventas directas', max_digits=14),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-total_comprado', '-id'], name='clientes_cl_total_c_e1f498_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['-saldo_pendiente', '-id'], name='clientes_cl_saldo_p_0c4912_idx'),
+        ),
+        migrations.RunSQL(sql=TRIGGERS, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(sql=CALCULAR_METRICAS, reverse_sql=migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0005_metricas_cliente'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='cliente',
+            name='segmento',
+            field=models.CharField(blank=True, choices=[('campeon', 'Campeón'), ('leal', 'Leal'), ('prometedor', 'Prometedor'), ('regular', 'Regular'), ('en_riesgo', 'En riesgo'), ('perdido', 'Perdido'), ('sin_compras', 'Sin compras')], default='', editable=False, help_text='Segmento RFM del último cálculo de `segmentar_clientes` (vacío si no se ha calculado)', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='cliente',
+            index=models.Index(fields=['segmento', '-fecha_registro', '-id'], name='clientes_cl_segment_c08636_idx'),
+        ),
+    ]
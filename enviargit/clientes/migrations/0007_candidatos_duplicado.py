@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:31
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0006_segmento_rfm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CandidatoDuplicado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('puntaje', models.FloatField(help_text='Similitud de 0 a 1')),
+                ('motivos', models.CharField(help_text='Qué coincide: nombre, telefono y/o email, separados por coma', max_length=50)),
+                ('descartado', models.BooleanField(default=False, help_text='Revisado y no es duplicado: no se vuelve a proponer')),
+                ('fecha_deteccion', models.DateTimeField(default=django.utils.timezone.now)),
+                ('cliente', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clientes.cliente')),
+                ('duplicado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='clientes.cliente')),
+            ],
+            options={
+                'verbose_name_plural': 'Candidatos a duplicado',
+                'indexes': [models.Index(fields=['descartado', '-puntaje', '-id'], name='clientes_ca_descart_edcc4c_idx')],
+                'constraints': [models.UniqueConstraint(fields=('cliente', 'duplicado'), name='candidato_duplicado_unico')],
+            },
+        ),
+    ]
@@ -4,6 +4,26 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.core.exceptions import ValidationError
 import re
 
+CODIGO_PAIS = '57'  # Colombia
+
+
+def telefono_canonico(telefono):
+    """
+    Solo dígitos, con código de país (estilo E.164 sin el +):
+    "300 123-4567", "+57 3001234567" y "003573001234567" -> "573001234567".
+    Los números de 10 dígitos sin indicativo se asumen colombianos.
+    """
+    telefono = (telefono or '').strip()
+    digitos = re.sub(r'\D', '', telefono)
+    if telefono.startswith('+'):
+        return digitos
+    if digitos.startswith('00'):
+        return digitos[2:]
+    if len(digitos) == 10:
+        return CODIGO_PAIS + digitos
+    return digitos
+
+
 class Cliente(models.Model):
     TIPO_CLIENTE_CHOICES = [
         ('particular', 'Particular'),
@@ -11,6 +31,17 @@ class Cliente(models.Model):
         ('mayorista', 'Mayorista'),
     ]
     
+    # Segmentos RFM (recencia, frecuencia, monto), ver clientes/segmentacion.py
+    SEGMENTO_CHOICES = [
+        ('campeon', 'Campeón'),
+        ('leal', 'Leal'),
+        ('prometedor', 'Prometedor'),
+        ('regular', 'Regular'),
+        ('en_riesgo', 'En riesgo'),
+        ('perdido', 'Perdido'),
+        ('sin_compras', 'Sin compras'),
+    ]
+    
     # Información básica
     nombre = models.CharField(
         max_length=100, 
@@ -23,6 +54,12 @@ class Cliente(models.Model):
         db_index=True,
         help_text="Teléfono único del cliente"
     )
+    telefono_canonico = models.CharField(
+        max_length=20,
+        null=True,
+        editable=False,
+        help_text="Dígitos del teléfono con código de país, para detectar duplicados y búsquedas exactas"
+    )
     email = models.EmailField(
         blank=True, 
         db_index=True,
@@ -63,6 +100,62 @@ class Cliente(models.Model):
         blank=True,
         help_text="Fecha de la última compra realizada"
     )
+    primera_compra = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Fecha de la primera compra (pedido o venta directa)"
+    )
+    
+    # Métricas acumuladas: las mantiene clientes/metricas.py, no se editan a mano
+    total_pedidos = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Pedidos no cancelados"
+    )
+    total_facturado = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Suma del precio de los pedidos no cancelados"
+    )
+    total_pagado = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Suma de lo abonado a los pedidos no cancelados"
+    )
+    saldo_pendiente = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Lo que falta por pagar de los pedidos no cancelados"
+    )
+    total_ventas = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Suma de las ventas directas"
+    )
+    total_comprado = models.DecimalField(
+        max_digits=14,
+        decimal_places=2,
+        default=0,
+        editable=False,
+        help_text="Pedidos facturados más ventas directas"
+    )
+    segmento = models.CharField(
+        max_length=20,
+        choices=SEGMENTO_CHOICES,
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Segmento RFM del último cálculo de `segmentar_clientes` (vacío si no se ha calculado)"
+    )
     
     # Estado
     activo = models.BooleanField(
@@ -99,12 +192,10 @@ class Cliente(models.Model):
             if len(telefono_limpio) < 7:
                 errors['telefono'] = 'El teléfono debe tener al menos 7 dígitos'
             
-            # Verificar duplicados
-            if self.pk:  # Si estamos editando
-                if Cliente.objects.filter(telefono=self.telefono).exclude(pk=self.pk).exists():
-                    errors['telefono'] = 'Ya existe un cliente con este teléfono'
-            else:  # Si estamos creando
-                if Cliente.objects.filter(telefono=self.telefono).exists():
+            # Verificar duplicados por el número canónico ("300 123 4567" = "3001234567")
+            if not self._duplicado_sin_fusionar():
+                self.telefono_canonico = telefono_canonico(self.telefono) or None
+                if Cliente.objects.filter(telefono_canonico=self.telefono_canonico).exclude(pk=self.pk).exists():
                     errors['telefono'] = 'Ya existe un cliente con este teléfono'
         
         # Validar email
@@ -125,6 +216,25 @@ class Cliente(models.Model):
         if errors:
             raise ValidationError(errors)
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Para saber al guardar si cambió el teléfono (ver _duplicado_sin_fusionar)
+        instance._telefono_guardado = instance.__dict__.get('telefono')
+        return instance
+    
+    def _duplicado_sin_fusionar(self):
+        """
+        Duplicado anterior al índice único (telefono_canonico en NULL, ver la
+        migración 0004) que se guarda sin cambiar el teléfono: conserva el NULL
+        para poder editarlo hasta que `fusionar_clientes` lo fusione.
+        """
+        guardado = getattr(self, '_telefono_guardado', None)
+        return (
+            self.pk is not None and self.telefono_canonico is None and guardado is not None
+            and guardado.strip() == (self.telefono or '').strip()
+        )
+    
     def save(self, *args, **kwargs):
         """⭐ MEJORADO: Limpiar datos antes de guardar"""
         # Limpiar y formatear datos
@@ -133,6 +243,8 @@ class Cliente(models.Model):
         
         if self.telefono:
             self.telefono = self.telefono.strip()
+        if not self._duplicado_sin_fusionar():
+            self.telefono_canonico = telefono_canonico(self.telefono) or None
         
         if self.email:
             self.email = self.email.strip().lower()
@@ -175,8 +287,9 @@ class Cliente(models.Model):
     @property
     def necesita_atencion(self):
         """⭐ NUEVO: Cliente que necesita atención (mucho tiempo sin comprar)"""
-        if self.dias_sin_comprar:
-            return self.dias_sin_comprar > 90  # Más de 3 meses sin comprar
+        dias = self.dias_sin_comprar
+        if dias:
+            return dias > 90  # Más de 3 meses sin comprar
         return False
     
     def calcular_descuento(self, monto_base):
@@ -218,6 +331,10 @@ class Cliente(models.Model):
             models.Index(fields=['tipo_cliente', 'activo']),
             models.Index(fields=['-fecha_registro']),
             models.Index(fields=['activo', '-ultima_compra']),
+            models.Index(fields=['-fecha_registro', '-id']),  # Paginación por cursor
+            models.Index(fields=['-total_comprado', '-id']),  # Mejores clientes
+            models.Index(fields=['-saldo_pendiente', '-id']),  # Clientes con más deuda
+            models.Index(fields=['segmento', '-fecha_registro', '-id']),  # Filtro ?segmento= paginado
         ]
         
         # ⭐ NUEVO: Restricciones a nivel de base de datos
@@ -230,9 +347,48 @@ class Cliente(models.Model):
                 fields=['telefono'],
                 name='telefono_unico'
             ),
+            # Parcial: los duplicados anteriores a la columna quedan en NULL
+            # hasta que `fusionar_clientes` los une
+            models.UniqueConstraint(
+                fields=['telefono_canonico'],
+                condition=models.Q(telefono_canonico__isnull=False),
+                name='telefono_canonico_unico'
+            ),
             models.UniqueConstraint(
                 fields=['email'],
                 condition=models.Q(email__isnull=False) & ~models.Q(email=''),
                 name='email_unico_no_vacio'
             ),
-        ]
\ No newline at end of file
+        ]
+
+
+class CandidatoDuplicado(models.Model):
+    """
+    Par de clientes que probablemente son el mismo, encontrado por el comando
+    `detectar_duplicados` (ver clientes/duplicados.py) para revisión manual
+    """
+    # El de menor id (el registrado primero) queda como principal al fusionar
+    cliente = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='+')
+    duplicado = models.ForeignKey(Cliente, on_delete=models.CASCADE, related_name='+')
+    puntaje = models.FloatField(help_text="Similitud de 0 a 1")
+    motivos = models.CharField(
+        max_length=50,
+        help_text="Qué coincide: nombre, telefono y/o email, separados por coma"
+    )
+    descartado = models.BooleanField(
+        default=False,
+        help_text="Revisado y no es duplicado: no se vuelve a proponer"
+    )
+    fecha_deteccion = models.DateTimeField(default=timezone.now)
+    
+    def __str__(self):
+        return f"#{self.cliente_id} ~ #{self.duplicado_id} ({self.puntaje:.2f})"
+    
+    class Meta:
+        verbose_name_plural = "Candidatos a duplicado"
+        indexes = [
+            models.Index(fields=['descartado', '-puntaje', '-id']),  # Revisión paginada por cursor
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['cliente', 'duplicado'], name='candidato_duplicado_unico'),
+        ]
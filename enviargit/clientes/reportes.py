@@ -0,0 +1,60 @@
+"""
+Consultas agregadas para las estadísticas de clientes
+"""
+from datetime import timedelta
+
+from django.db.models import Count
+from django.utils import timezone
+
+from backend.cache import en_cache
+from .models import CandidatoDuplicado, Cliente
+from . import derivados
+
+
+@en_cache('clientes.estadisticas', dominios=['clientes'])
+def estadisticas_clientes():
+    """Totales y distribución por tipo de cliente"""
+    total_clientes = Cliente.objects.count()
+    clientes_activos = Cliente.objects.filter(activo=True).count()
+    clientes_nuevos_mes = Cliente.objects.filter(
+        fecha_registro__gte=timezone.now() - timedelta(days=30)
+    ).count()
+    
+    # Clientes por tipo
+    por_tipo = Cliente.objects.values('tipo_cliente').annotate(
+        total=Count('id')
+    ).order_by('tipo_cliente')
+    
+    # Clientes por segmento RFM (comando segmentar_clientes)
+    por_segmento = Cliente.objects.values('segmento').annotate(
+        total=Count('id')
+    ).order_by('segmento')
+    
+    return {
+        'total_clientes': total_clientes,
+        'clientes_activos': clientes_activos,
+        'clientes_nuevos_mes': clientes_nuevos_mes,
+        'distribucion_por_tipo': list(por_tipo),
+        'distribucion_por_segmento': list(por_segmento)
+    }
+
+
+def consultas_por_fecha(hoy=None):
+    """
+    Filtros ?nuevo, ?necesita_atencion y ?segmento del listado de clientes,
+    los mejores clientes por métricas acumuladas y la revisión de duplicados.
+    El comando `verificar_planes` revisa que ninguna recorra la tabla completa.
+    """
+    ahora = timezone.now()
+    return {
+        'top_comprado': Cliente.objects.filter(total_comprado__gt=0).order_by('-total_comprado', '-id')[:10],
+        'top_saldo': Cliente.objects.filter(saldo_pendiente__gt=0).order_by('-saldo_pendiente', '-id')[:10],
+        'segmento': Cliente.objects.filter(segmento__in=['en_riesgo']).order_by('-fecha_registro', '-id'),
+        'nuevos': Cliente.objects.filter(derivados.es_nuevo(ahora)).order_by('-fecha_registro', '-id'),
+        'necesitan_atencion': derivados.filtrar_necesita_atencion(
+            Cliente.objects.all(), ahora
+        ).order_by(*derivados.ORDEN_ATENCION),
+        'duplicados_pendientes': CandidatoDuplicado.objects.filter(
+            descartado__in=[False]
+        ).order_by('-puntaje', '-id'),
+    }
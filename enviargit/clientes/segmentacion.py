@@ -0,0 +1,115 @@
+"""
+Segmentación RFM de clientes: recencia, frecuencia y monto
+
+Pensada para correr cada noche (comando `segmentar_clientes`). Lee todo en
+dos consultas con values_list: recencia y monto salen de las métricas
+acumuladas de Cliente (clientes/metricas.py) y la frecuencia suma los pedidos
+no cancelados y las ventas directas de cada cliente. Los puntajes 1-5 son
+quintiles calculados con NumPy sobre todos los clientes con compras a la vez,
+sin recorrer objetos en Python. Solo se escriben los clientes cuyo segmento
+cambió, con un UPDATE ... WHERE id IN (...) por segmento y lote, en una sola
+transacción.
+"""
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from backend.cache import invalidar
+from finanzas.models import VentaDirecta
+from .derivados import DiasDesde
+from .models import Cliente
+
+# Ids por UPDATE: por debajo del límite de 999 parámetros de SQLite
+TAMANO_LOTE = 900
+
+SIN_COMPRAS = 'sin_compras'
+SEGMENTO_POR_DEFECTO = 'regular'
+
+
+def puntajes(valores):
+    """
+    Quintil 1-5 de cada valor según su percentil. Los empates reciben el rango
+    promedio, así que si la mayoría compró una sola vez todos quedan con el
+    mismo puntaje (bajo) en lugar de repartirse al azar.
+    """
+    _, inversos, conteos = np.unique(valores, return_inverse=True, return_counts=True)
+    rango_promedio = np.cumsum(conteos) - (conteos - 1) / 2
+    percentil = rango_promedio[inversos] / len(valores)
+    return np.clip(np.ceil(percentil * 5), 1, 5).astype(np.int8)
+
+
+def segmentos(r, f, m):
+    """Segmento de cada cliente a partir de sus puntajes (el primero que cumpla)"""
+    reglas = [
+        ('campeon', (r >= 4) & (f >= 4) & (m >= 4)),
+        ('leal', (r >= 3) & (f >= 4)),
+        ('prometedor', (r >= 4) & (f <= 2)),
+        ('en_riesgo', (r <= 2) & ((f >= 3) | (m >= 4))),
+        ('perdido', r <= 2),
+    ]
+    return np.select([condicion for _, condicion in reglas], [nombre for nombre, _ in reglas],
+                     default=SEGMENTO_POR_DEFECTO)
+
+
+def _columnas(ahora):
+    """Arreglos alineados por id de cliente (ordenados por id)"""
+    filas = list(Cliente.objects.order_by('id').values_list(
+        'id', DiasDesde('ultima_compra', ahora), 'total_pedidos', 'total_comprado', 'segmento'
+    ))
+    ids, dias, pedidos, comprado, actuales = zip(*filas) if filas else ([],) * 5
+    ids = np.array(ids, dtype=np.int64)
+
+    # Frecuencia: pedidos (ya contados en las métricas) más ventas directas
+    ventas = np.array(
+        VentaDirecta.objects.filter(cliente__isnull=False).values_list('cliente_id', flat=True),
+        dtype=np.int64
+    )
+    frecuencia = np.array(pedidos, dtype=np.int64)
+    frecuencia += np.bincount(np.searchsorted(ids, ventas), minlength=len(ids))[:len(ids)]
+
+    return (
+        ids,
+        np.array(dias, dtype=np.float64),  # None (sin compras) -> nan
+        frecuencia,
+        np.array(comprado, dtype=np.float64),
+        np.array(actuales, dtype=object),
+    )
+
+
+def calcular(ahora=None):
+    """Retorna (ids, segmento nuevo, segmento actual) de todos los clientes"""
+    ids, dias, frecuencia, monto, actuales = _columnas(ahora or timezone.now())
+
+    nuevos = np.full(len(ids), SIN_COMPRAS, dtype=object)
+    con_compras = ~np.isnan(dias)
+    if con_compras.any():
+        r = 6 - puntajes(dias[con_compras])  # Menos días sin comprar = mejor
+        f = puntajes(frecuencia[con_compras])
+        m = puntajes(monto[con_compras])
+        nuevos[con_compras] = segmentos(r, f, m)
+    return ids, nuevos, actuales
+
+
+def guardar(ids, nuevos, actuales):
+    """Escribir solo los segmentos que cambiaron. Retorna cuántos clientes cambiaron"""
+    cambiaron = nuevos != actuales
+    with transaction.atomic():
+        for segmento in np.unique(nuevos[cambiaron]):
+            pks = ids[cambiaron & (nuevos == segmento)].tolist()
+            for inicio in range(0, len(pks), TAMANO_LOTE):
+                Cliente.objects.filter(pk__in=pks[inicio:inicio + TAMANO_LOTE]).update(segmento=segmento)
+    if cambiaron.any():
+        invalidar('clientes')  # update() no dispara las señales de la caché
+    return int(cambiaron.sum())
+
+
+def segmentar(ahora=None):
+    """Calcular y guardar. Retorna {'clientes', 'cambios', 'por_segmento'}"""
+    ids, nuevos, actuales = calcular(ahora)
+    cambios = guardar(ids, nuevos, actuales)
+    nombres, conteos = np.unique(nuevos, return_counts=True) if len(ids) else ([], [])
+    return {
+        'clientes': len(ids),
+        'cambios': cambios,
+        'por_segmento': {str(nombre): int(conteo) for nombre, conteo in zip(nombres, conteos)},
+    }
@@ -1,9 +1,19 @@
 from rest_framework import serializers
 from django.utils import timezone
-from .models import Cliente
+from .models import CandidatoDuplicado, Cliente, telefono_canonico
+
+# Métricas acumuladas (solo lectura, ver clientes/metricas.py)
+CAMPOS_METRICAS = [
+    'total_pedidos', 'total_facturado', 'total_pagado', 'saldo_pendiente',
+    'total_ventas', 'total_comprado', 'primera_compra',
+]
+
+# Segmento RFM (solo lectura, ver clientes/segmentacion.py)
+CAMPOS_SEGMENTO = ['segmento', 'segmento_display']
 
 class ClienteSerializer(serializers.ModelSerializer):
     tipo_cliente_display = serializers.CharField(source='get_tipo_cliente_display', read_only=True)
+    segmento_display = serializers.CharField(source='get_segmento_display', read_only=True)
     
     # ⭐ NUEVO: Campos calculados
     nombre_corto = serializers.ReadOnlyField()
@@ -21,7 +31,7 @@ class ClienteSerializer(serializers.ModelSerializer):
             'fecha_registro', 'ultima_compra', 'activo', 'notas',
             'dias_desde_registro', 'dias_sin_comprar', 'es_cliente_nuevo', 'necesita_atencion',
             'fecha_actualizacion'
-        ]
+        ] + CAMPOS_METRICAS + CAMPOS_SEGMENTO
         read_only_fields = ['fecha_registro', 'fecha_actualizacion']
     
     def validate_nombre(self, value):
@@ -55,15 +65,17 @@ class ClienteSerializer(serializers.ModelSerializer):
         if len(telefono_limpio) > 15:
             raise serializers.ValidationError("El teléfono no puede tener más de 15 dígitos")
         
-        # Verificar duplicados
+        # Verificar duplicados por el número canónico (usa el índice único)
         instance = getattr(self, 'instance', None)
-        queryset = Cliente.objects.filter(telefono=value)
+        if instance and instance.telefono_canonico is None and instance.telefono.strip() == value:
+            return value  # Duplicado sin fusionar que se edita sin cambiar el teléfono
+        queryset = Cliente.objects.filter(telefono_canonico=telefono_canonico(value))
         
         if instance:
             queryset = queryset.exclude(pk=instance.pk)
         
-        if queryset.exists():
-            cliente_existente = queryset.first()
+        cliente_existente = queryset.only('nombre').first()
+        if cliente_existente:
             raise serializers.ValidationError(
                 f"Ya existe un cliente con este teléfono: {cliente_existente.nombre}"
             )
@@ -143,6 +155,54 @@ class ClienteSerializer(serializers.ModelSerializer):
         
         return super().update(instance, validated_data)
 
+class ClienteListaSerializer(serializers.BaseSerializer):
+    """
+    Solo lectura, para el listado: recibe las filas de derivados.filas_lista()
+    con los campos derivados ya calculados en SQL y produce la misma salida
+    que ClienteSerializer sin instanciar un campo por atributo y por fila.
+    """
+    _fecha = serializers.DateTimeField()
+    _descuento = serializers.DecimalField(max_digits=5, decimal_places=2)
+    _dinero = serializers.DecimalField(max_digits=14, decimal_places=2)
+    _tipos = dict(Cliente.TIPO_CLIENTE_CHOICES)
+    _segmentos = dict(Cliente.SEGMENTO_CHOICES)
+    
+    def _fecha_o_none(self, valor):
+        return self._fecha.to_representation(valor) if valor else None
+    
+    def to_representation(self, fila):
+        nombre = fila['nombre']
+        return {
+            'id': fila['id'],
+            'nombre': nombre,
+            'nombre_corto': f"{nombre[:27]}..." if len(nombre) > 30 else nombre,
+            'telefono': fila['telefono'],
+            'email': fila['email'],
+            'direccion': fila['direccion'],
+            'tipo_cliente': fila['tipo_cliente'],
+            'tipo_cliente_display': self._tipos.get(fila['tipo_cliente'], fila['tipo_cliente']),
+            'descuento_especial': self._descuento.to_representation(fila['descuento_especial']),
+            'tiene_descuento': fila['descuento_especial'] > 0,
+            'fecha_registro': self._fecha_o_none(fila['fecha_registro']),
+            'ultima_compra': self._fecha_o_none(fila['ultima_compra']),
+            'activo': fila['activo'],
+            'notas': fila['notas'],
+            'dias_desde_registro': fila['dias_desde_registro'],
+            'dias_sin_comprar': fila['dias_sin_comprar'],
+            'es_cliente_nuevo': fila['es_cliente_nuevo'],
+            'necesita_atencion': fila['necesita_atencion'],
+            'fecha_actualizacion': self._fecha_o_none(fila['fecha_actualizacion']),
+            'total_pedidos': fila['total_pedidos'],
+            'total_facturado': self._dinero.to_representation(fila['total_facturado']),
+            'total_pagado': self._dinero.to_representation(fila['total_pagado']),
+            'saldo_pendiente': self._dinero.to_representation(fila['saldo_pendiente']),
+            'total_ventas': self._dinero.to_representation(fila['total_ventas']),
+            'total_comprado': self._dinero.to_representation(fila['total_comprado']),
+            'primera_compra': self._fecha_o_none(fila['primera_compra']),
+            'segmento': fila['segmento'],
+            'segmento_display': self._segmentos.get(fila['segmento'], fila['segmento']),
+        }
+
 class ClienteResumenSerializer(serializers.ModelSerializer):
     """⭐ MEJORADO: Serializer simplificado para listas y selecciones"""
     tipo_cliente_display = serializers.CharField(source='get_tipo_cliente_display', read_only=True)
@@ -155,6 +215,13 @@ class ClienteResumenSerializer(serializers.ModelSerializer):
             'descuento_especial', 'tiene_descuento', 'activo'
         ]
 
+class ClienteMetricasSerializer(serializers.ModelSerializer):
+    """Mejores clientes: métricas acumuladas sin campos calculados"""
+    class Meta:
+        model = Cliente
+        fields = ['id', 'nombre', 'telefono', 'tipo_cliente', 'ultima_compra'] + CAMPOS_METRICAS
+        read_only_fields = fields
+
 class ClienteEstadisticasSerializer(serializers.Serializer):
     """⭐ NUEVO: Serializer para estadísticas de cliente"""
     total_pedidos = serializers.IntegerField()
@@ -176,4 +243,18 @@ class ClienteConCalculosSerializer(ClienteSerializer):
             ejemplo_calculo = instance.calcular_descuento(100000)  # Ejemplo con $100,000
             data['ejemplo_descuento'] = ejemplo_calculo
         
-        return data
\ No newline at end of file
+        return data
+
+class CandidatoDuplicadoSerializer(serializers.ModelSerializer):
+    """Par de posibles duplicados para la revisión (ver clientes/duplicados.py)"""
+    cliente = ClienteResumenSerializer(read_only=True)
+    duplicado = ClienteResumenSerializer(read_only=True)
+    motivos = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = CandidatoDuplicado
+        fields = ['id', 'cliente', 'duplicado', 'puntaje', 'motivos', 'descartado', 'fecha_deteccion']
+        read_only_fields = fields
+    
+    def get_motivos(self, obj):
+        return obj.motivos.split(',') if obj.motivos else []
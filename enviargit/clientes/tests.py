@@ -1,3 +1,517 @@
+from datetime import timedelta
+from decimal import Decimal
+from importlib.util import find_spec
+from io import BytesIO, StringIO
+from unittest import skipUnless
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import Cliente, telefono_canonico
+from .serializers import ClienteSerializer
+from . import importacion
+
+
+class ClientesTestCase(TestCase):
+    url = '/api/clientes/clientes/'
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def crear_clientes(self, n, **kwargs):
+        inicio = Cliente.objects.count()
+        return [
+            Cliente.objects.create(nombre=f'Cliente {i}', telefono=f'300{i:07d}', **kwargs)
+            for i in range(inicio, inicio + n)
+        ]
+
+
+class PaginacionTests(ClientesTestCase):
+    def test_cursor_recorre_todas_las_filas_sin_repetir(self):
+        clientes = self.crear_clientes(7)
+
+        ids = []
+        response = self.client.get(self.url, {'page_size': 3})
+        while True:
+            self.assertLessEqual(len(response.data['results']), 3)
+            ids += [c['id'] for c in response.data['results']]
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+
+        esperado = sorted(clientes, key=lambda c: (c.fecha_registro, c.id), reverse=True)
+        self.assertEqual(ids, [c.id for c in esperado])
+
+    def test_modo_sin_paginar(self):
+        self.crear_clientes(3)
+        response = self.client.get(self.url, {'paginar': 'false'})
+        self.assertIsInstance(response.data, list)
+        self.assertEqual(len(response.data), 3)
+
+
+class BusquedaTests(ClientesTestCase):
+    def buscar(self, texto):
+        response = self.client.get(self.url, {'buscar': texto, 'paginar': 'false'})
+        self.assertEqual(response.status_code, 200)
+        return [c['nombre'] for c in response.data]
+
+    def test_sin_tildes_y_por_prefijo(self):
+        Cliente.objects.create(nombre='José Muñoz', telefono='3001112233')
+        Cliente.objects.create(nombre='Ana Torres', telefono='3004445566')
+
+        self.assertEqual(self.buscar('munoz'), ['José Muñoz'])
+        self.assertEqual(self.buscar('JOS mu'), ['José Muñoz'])
+        self.assertEqual(self.buscar('"tor'), ['Ana Torres'])
+
+    def test_telefono_con_separadores_prefijo_y_sufijo(self):
+        Cliente.objects.create(nombre='José Muñoz', telefono='300 111-2233')
+
+        self.assertEqual(self.buscar('300-111'), ['José Muñoz'])
+        self.assertEqual(self.buscar('2233'), ['José Muñoz'])
+        self.assertEqual(self.buscar('12'), [])
+
+    def test_nombre_pesa_mas_que_email(self):
+        Cliente.objects.create(nombre='Carlos Ruiz', telefono='3001112233', email='marta@correo.com')
+        Cliente.objects.create(nombre='Marta Gil', telefono='3004445566')
+
+        self.assertEqual(self.buscar('marta'), ['Marta Gil', 'Carlos Ruiz'])
+
+        # El cursor también sigue el orden por relevancia
+        pagina = self.client.get(self.url, {'buscar': 'marta', 'page_size': 1}).data
+        self.assertEqual(pagina['results'][0]['nombre'], 'Marta Gil')
+        pagina = self.client.get(pagina['next']).data
+        self.assertEqual(pagina['results'][0]['nombre'], 'Carlos Ruiz')
+
+    def test_indice_sigue_ediciones_y_borrados(self):
+        cliente = Cliente.objects.create(nombre='Ana Torres', telefono='3001112233')
+        cliente.nombre = 'Ana Gómez'
+        cliente.save()
+        self.assertEqual(self.buscar('torres'), [])
+        self.assertEqual(self.buscar('gomez'), ['Ana Gómez'])
+
+        cliente.delete()
+        self.assertEqual(self.buscar('gomez'), [])
+        self.assertEqual(self.buscar('1112233'), [])
+
+    def test_comando_reconstruye_el_indice(self):
+        Cliente.objects.create(nombre='Ana Torres', telefono='3001112233')
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM clientes_busqueda_telefono')
+
+        call_command('reconstruir_busqueda', stdout=StringIO())
+
+        self.assertEqual(self.buscar('1112233'), ['Ana Torres'])
+
+
+class ImportacionTests(ClientesTestCase):
+    url_importar = '/api/clientes/clientes/importar/'
+
+    def importar(self, contenido, nombre='clientes.csv', **datos):
+        archivo = SimpleUploadedFile(nombre, contenido.encode('utf-8'))
+        return self.client.post(self.url_importar, {'archivo': archivo, **datos}, format='multipart')
+
+    def test_crea_validos_y_reporta_errores_por_fila(self):
+        Cliente.objects.create(nombre='Ya Existe', telefono='3009999999', email='ya@correo.com')
+        contenido = (
+            'Nombre;Teléfono;Correo;Tipo;Descuento\n'
+            'ana torres;300 111 2233;ANA@correo.com;Mayorista;10%\n'
+            'Luis;3001112234;;particular;\n'
+            'Repetida;300 111 2233;;;\n'
+            'Duplicada;3009999999;;;\n'
+            'Mal Email;3001112235;no-es-email;;\n'
+            'X;12;;;\n'
+        )
+
+        response = self.importar(contenido)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['creados'], 2)
+        self.assertEqual(
+            [(e['fila'], sorted(e['errores'])) for e in response.data['errores']],
+            [(4, ['telefono']), (5, ['telefono']), (6, ['email']), (7, ['nombre', 'telefono'])]
+        )
+        ana = Cliente.objects.get(telefono='300 111 2233')
+        self.assertEqual((ana.nombre, ana.email, ana.tipo_cliente), ('Ana Torres', 'ana@correo.com', 'mayorista'))
+
+    def test_una_consulta_por_lote(self):
+        filas = ''.join(f'Cliente {i},301{i:07d}\n' for i in range(30))
+        archivo = BytesIO(f'nombre,telefono\n{filas}'.encode('utf-8'))
+
+        # Por lote: una consulta de duplicados y un INSERT (más el savepoint)
+        with CaptureQueriesContext(connection) as consultas:
+            reporte = importacion.importar(importacion.leer_filas(archivo, 'clientes.csv'), tamano_lote=10)
+
+        self.assertEqual(reporte['creados'], 30)
+        self.assertEqual(len([c for c in consultas if c['sql'].startswith('SELECT')]), 3)
+        self.assertEqual(len([c for c in consultas if c['sql'].startswith('INSERT')]), 3)
+
+    def test_simular_no_crea_nada(self):
+        response = self.importar('nombre,telefono\nAna,3001112233\n', simular='true')
+        self.assertEqual(response.data['creados'], 1)
+        self.assertFalse(Cliente.objects.exists())
+
+    def test_columnas_requeridas(self):
+        response = self.importar('nombre,email\nAna,ana@correo.com\n')
+        self.assertEqual(response.status_code, 400)
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl no está instalado')
+    def test_xlsx(self):
+        from openpyxl import Workbook
+        libro = Workbook()
+        libro.active.append(['Nombre', 'Telefono'])
+        libro.active.append(['Ana Torres', 3001112233])
+        contenido = BytesIO()
+        libro.save(contenido)
+
+        archivo = SimpleUploadedFile('clientes.xlsx', contenido.getvalue())
+        response = self.client.post(self.url_importar, {'archivo': archivo}, format='multipart')
+
+        self.assertEqual(response.data['creados'], 1)
+        self.assertTrue(Cliente.objects.filter(telefono='3001112233').exists())
+
+
+class TelefonoCanonicoTests(ClientesTestCase):
+    def test_formatos_equivalentes_son_duplicados(self):
+        Cliente.objects.create(nombre='Ana Torres', telefono='300 111 2233')
+
+        response = self.client.post(self.url, {'nombre': 'Otra Ana', 'telefono': '+57 300-111-2233'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('telefono', response.data)
+        self.assertEqual(telefono_canonico('(300) 111 2233'), '573001112233')
+        self.assertEqual(telefono_canonico('0057 300 111 2233'), '573001112233')
+
+    def test_busqueda_exacta_por_telefono(self):
+        ana = Cliente.objects.create(nombre='Ana Torres', telefono='300 111 2233')
+        Cliente.objects.create(nombre='Luis Gil', telefono='3001112234')
+
+        response = self.client.get(self.url, {'telefono': '3001112233', 'paginar': 'false'})
+
+        self.assertEqual([c['id'] for c in response.data], [ana.id])
+        plan = Cliente.objects.filter(telefono_canonico='573001112233').explain()
+        self.assertIn('telefono_canonico_unico', plan)
+
+    def test_duplicado_sin_fusionar_se_puede_editar(self):
+        Cliente.objects.create(nombre='Ana Torres', telefono='300 111 2233')
+        duplicado, = Cliente.objects.bulk_create([Cliente(nombre='Ana T.', telefono='3001112233')])
+
+        duplicado = Cliente.objects.get(pk=duplicado.pk)
+        duplicado.activo = False
+        duplicado.save()
+        duplicado.refresh_from_db()
+        self.assertEqual((duplicado.activo, duplicado.telefono_canonico), (False, None))
+
+        response = self.client.put(
+            f'{self.url}{duplicado.pk}/', {'nombre': 'Ana Torres B', 'telefono': '3001112233'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+
+        # Cambiar el teléfono sí vuelve a validar el número canónico
+        duplicado.telefono = '+57 300 111 2233'
+        with self.assertRaises(ValidationError):
+            duplicado.save()
+        duplicado.telefono = '3009998877'
+        duplicado.save()
+        self.assertEqual(duplicado.telefono_canonico, '573009998877')
+
+    def test_fusionar_duplicados_mueve_pedidos_y_ventas(self):
+        from finanzas.models import VentaDirecta
+        from pedidos.models import Pedido
+
+        ana = Cliente.objects.create(nombre='Ana Torres', telefono='300 111 2233')
+        # Duplicados anteriores a la columna canónica (sin número canónico)
+        duplicados = Cliente.objects.bulk_create([
+            Cliente(nombre='Ana T.', telefono='3001112233', email='ana@correo.com', notas='Prefiere WhatsApp'),
+            Cliente(nombre='Ana Torres', telefono='+57 300 111 2233'),
+        ])
+        for cliente in duplicados:
+            Pedido.objects.create(
+                cliente=cliente, fecha_entrega_prometida=timezone.now(), tipo_bordado='manual',
+                descripcion='Parche', precio_total=Decimal('1000')
+            )
+        VentaDirecta.objects.create(cliente=duplicados[0], subtotal=10, total=10, metodo_pago='efectivo')
+
+        salida = StringIO()
+        call_command('fusionar_clientes', stdout=salida)
+        self.assertEqual(Cliente.objects.count(), 3)  # Sin --aplicar solo lista
+
+        call_command('fusionar_clientes', '--aplicar', stdout=salida)
+
+        self.assertEqual(list(Cliente.objects.values_list('id', flat=True)), [ana.id])
+        ana.refresh_from_db()
+        self.assertEqual((ana.email, ana.notas), ('ana@correo.com', 'Prefiere WhatsApp'))
+        self.assertEqual(Pedido.objects.filter(cliente=ana).count(), 2)
+        self.assertEqual(VentaDirecta.objects.filter(cliente=ana).count(), 1)
+
+
+class CamposDerivadosTests(ClientesTestCase):
+    def crear(self, nombre, registro_hace, compra_hace=None, **kwargs):
+        """Cliente registrado hace `registro_hace` y con última compra hace `compra_hace`"""
+        ahora = timezone.now()
+        cliente = Cliente.objects.create(nombre=nombre, telefono=f'300{Cliente.objects.count():07d}', **kwargs)
+        Cliente.objects.filter(pk=cliente.pk).update(
+            fecha_registro=ahora - registro_hace,
+            ultima_compra=ahora - compra_hace if compra_hace is not None else None,
+        )
+        return cliente
+
+    def listar(self, **params):
+        response = self.client.get(self.url, {'paginar': 'false', **params})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_listado_igual_a_las_propiedades(self):
+        hora = timedelta(hours=1)
+        self.crear('Nuevo', timedelta(days=31) - hora, descuento_especial=5)
+        self.crear('Ya No Es Nuevo', timedelta(days=31) + hora, timedelta(days=91) - hora)
+        self.crear('Sin Comprar', timedelta(days=400), timedelta(days=91) + hora)
+
+        esperado = {
+            c.id: ClienteSerializer(c).data for c in Cliente.objects.all()
+        }
+        listado = self.listar()
+
+        self.assertEqual(len(listado), 3)
+        for fila in listado:
+            self.assertEqual(dict(fila), dict(esperado[fila['id']]))
+        por_nombre = {c['nombre']: c for c in listado}
+        self.assertTrue(por_nombre['Nuevo']['es_cliente_nuevo'])
+        self.assertFalse(por_nombre['Ya No Es Nuevo']['es_cliente_nuevo'])
+        self.assertEqual(por_nombre['Ya No Es Nuevo']['dias_sin_comprar'], 90)
+        self.assertFalse(por_nombre['Ya No Es Nuevo']['necesita_atencion'])
+        self.assertTrue(por_nombre['Sin Comprar']['necesita_atencion'])
+        self.assertIsNone(por_nombre['Nuevo']['dias_sin_comprar'])
+
+    def test_filtros_nuevo_y_necesita_atencion(self):
+        self.crear('Nuevo', timedelta(days=2))
+        self.crear('Antiguo', timedelta(days=300), timedelta(days=120))
+        self.crear('Mas Antiguo', timedelta(days=300), timedelta(days=200))
+        self.crear('Inactivo', timedelta(days=300), timedelta(days=150), activo=False)
+        self.crear('Reciente', timedelta(days=300), timedelta(days=10))
+
+        nombres = lambda filas: [c['nombre'] for c in filas]
+        self.assertEqual(nombres(self.listar(nuevo='true')), ['Nuevo'])
+        # Solo activos, primero el que lleva más tiempo sin comprar
+        self.assertEqual(nombres(self.listar(necesita_atencion='true')), ['Mas Antiguo', 'Antiguo'])
+        self.assertEqual(nombres(self.listar(necesita_atencion='true', activo='false')), ['Inactivo'])
+        self.assertEqual(
+            sorted(nombres(self.listar(necesita_atencion='false'))), ['Nuevo', 'Reciente']
+        )
+
+    def test_una_consulta_por_pagina(self):
+        for i in range(20):
+            self.crear(f'Cliente {i}', timedelta(days=i * 10), timedelta(days=i * 7))
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(self.url, {'page_size': 10})
+
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(len(consultas), 1)
+
+
+class MetricasTests(ClientesTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ana = Cliente.objects.create(nombre='Ana Torres', telefono='3001112233')
+
+    def pedido(self, precio, cliente=None, **kwargs):
+        from pedidos.models import Pedido
+        return Pedido.objects.create(
+            cliente=cliente or self.ana, fecha_entrega_prometida=timezone.now(), tipo_bordado='manual',
+            descripcion='Parche', precio_total=Decimal(precio), **kwargs
+        )
+
+    def metricas(self, cliente=None):
+        cliente = cliente or self.ana
+        cliente.refresh_from_db()
+        return (cliente.total_pedidos, cliente.total_facturado, cliente.total_pagado,
+                cliente.saldo_pendiente, cliente.total_ventas, cliente.total_comprado)
+
+    def test_pedidos_pagos_y_ventas_actualizan_las_metricas(self):
+        from finanzas.models import VentaDirecta
+        from finanzas.pagos import registrar_pago
+
+        primero = self.pedido('100000', fecha_pedido=timezone.now() - timedelta(days=10))
+        segundo = self.pedido('50000', adelanto_pagado=Decimal('10000'))
+        registrar_pago({'monto': '30000'}, pedido=primero.pk)
+        VentaDirecta.objects.create(cliente=self.ana, subtotal=20000, total=20000, metodo_pago='efectivo')
+
+        self.assertEqual(self.metricas(), (2, 150000, 40000, 110000, 20000, 170000))
+        self.assertEqual(self.ana.primera_compra, primero.fecha_pedido)
+
+        # Cancelar o borrar un pedido lo saca de las métricas
+        segundo.estado = 'cancelado'
+        segundo.save()
+        self.assertEqual(self.metricas(), (1, 100000, 30000, 70000, 20000, 120000))
+        primero.delete()
+        self.assertEqual(self.metricas(), (0, 0, 0, 0, 20000, 20000))
+
+        call_command('reconstruir_metricas', '--verificar', stdout=StringIO())
+
+    def test_cambiar_de_cliente_recalcula_ambos(self):
+        luis = Cliente.objects.create(nombre='Luis Gil', telefono='3004445566')
+        pedido = self.pedido('80000')
+
+        pedido.cliente = luis
+        pedido.save()
+
+        self.assertEqual(self.metricas()[:2], (0, 0))
+        self.assertEqual(self.metricas(luis)[:2], (1, 80000))
+
+    def test_comando_detecta_y_corrige_diferencias(self):
+        self.pedido('80000')
+        Cliente.objects.filter(pk=self.ana.pk).update(total_facturado=1, total_pedidos=0)
+
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_metricas', '--verificar', stdout=StringIO())
+
+        call_command('reconstruir_metricas', stdout=StringIO())
+        self.assertEqual(self.metricas()[:2], (1, 80000))
+
+    def test_historial_paginado_con_consultas_constantes(self):
+        for i in range(5):
+            self.pedido(f'{(i + 1) * 1000}')
+        url = f'{self.url}{self.ana.pk}/historial_pedidos/'
+
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url, {'page_size': 2})
+
+        self.assertEqual(len(response.data['pedidos']), 2)
+        self.assertEqual(response.data['estadisticas']['total_pedidos'], 5)
+        self.assertEqual(response.data['estadisticas']['total_gastado'], Decimal('15000'))
+        self.assertLessEqual(len(consultas), 3)
+
+        ids = [p['id'] for p in response.data['pedidos']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            ids += [p['id'] for p in response.data['pedidos']]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_historial_pendientes_sin_cancelados(self):
+        self.pedido('1000')
+        self.pedido('2000', estado='entregado')
+        self.pedido('3000', estado='cancelado')
+
+        response = self.client.get(f'{self.url}{self.ana.pk}/historial_pedidos/')
+        self.assertEqual(response.data['estadisticas']['total_pedidos'], 2)
+        self.assertEqual(response.data['estadisticas']['pedidos_pendientes'], 1)
+
+    def test_top_clientes_por_el_indice(self):
+        luis = Cliente.objects.create(nombre='Luis Gil', telefono='3004445566')
+        Cliente.objects.create(nombre='Sin Compras', telefono='3007778899')
+        self.pedido('50000')
+        self.pedido('90000', cliente=luis, adelanto_pagado=Decimal('90000'))
+
+        response = self.client.get(f'{self.url}top/')
+        self.assertEqual([c['nombre'] for c in response.data], ['Luis Gil', 'Ana Torres'])
+
+        response = self.client.get(f'{self.url}top/', {'orden': 'saldo'})
+        self.assertEqual([c['nombre'] for c in response.data], ['Ana Torres'])
+
+        plan = Cliente.objects.filter(total_comprado__gt=0).order_by('-total_comprado', '-id')[:10].explain()
+        self.assertIn('clientes_cl_total_c', plan)
+        self.assertEqual(self.client.get(f'{self.url}top/', {'orden': 'x'}).status_code, 400)
+
+
+@skipUnless(find_spec('numpy'), 'numpy no está instalado')
+class SegmentacionTests(ClientesTestCase):
+    def metricas(self, cliente, dias, pedidos, comprado):
+        Cliente.objects.filter(pk=cliente.pk).update(
+            ultima_compra=timezone.now() - timedelta(days=dias),
+            total_pedidos=pedidos, total_comprado=Decimal(comprado)
+        )
+
+    def test_puntajes_por_quintil_con_empates(self):
+        from . import segmentacion
+
+        self.assertEqual(segmentacion.puntajes([10, 20, 30, 40, 50]).tolist(), [1, 2, 3, 4, 5])
+        # Empatados: todos reciben el puntaje del rango promedio
+        self.assertEqual(segmentacion.puntajes([1, 1, 1, 1, 9]).tolist(), [3, 3, 3, 3, 5])
+
+    def test_segmentar_guarda_solo_los_cambios(self):
+        from . import segmentacion
+
+        clientes = self.crear_clientes(6)
+        for i, cliente in enumerate(clientes[:5]):
+            # El primero compró hace poco, seguido y por más dinero; el último, lo contrario
+            self.metricas(cliente, dias=1 + i * 100, pedidos=10 - i * 2, comprado=100000 - i * 20000)
+
+        resultado = segmentacion.segmentar()
+        segmentos = dict(Cliente.objects.values_list('pk', 'segmento'))
+        self.assertEqual(segmentos[clientes[0].pk], 'campeon')
+        self.assertEqual(segmentos[clientes[4].pk], 'perdido')
+        self.assertEqual(segmentos[clientes[5].pk], 'sin_compras')
+        self.assertEqual(resultado['cambios'], 6)
+        self.assertEqual(sum(resultado['por_segmento'].values()), 6)
+
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(segmentacion.segmentar()['cambios'], 0)
+        self.assertFalse([q for q in consultas if q['sql'].startswith('UPDATE')])
+
+    def test_filtro_y_estadisticas_por_segmento(self):
+        ana, luis, _ = self.crear_clientes(3)
+        Cliente.objects.filter(pk=ana.pk).update(segmento='campeon')
+        Cliente.objects.filter(pk=luis.pk).update(segmento='en_riesgo')
+
+        response = self.client.get(self.url, {'segmento': 'campeon,en_riesgo'})
+        self.assertEqual({c['id'] for c in response.data['results']}, {ana.pk, luis.pk})
+        self.assertEqual(response.data['results'][0]['segmento_display'], 'En riesgo')
+
+        response = self.client.get(f'{self.url}estadisticas/')
+        self.assertIn({'segmento': 'campeon', 'total': 1}, response.data['distribucion_por_segmento'])
+
+    def test_comando(self):
+        self.crear_clientes(2)
+        salida = StringIO()
+        call_command('segmentar_clientes', stdout=salida)
+        self.assertIn('Sin compras: 2', salida.getvalue())
+
+
+class DuplicadosTests(ClientesTestCase):
+    url_duplicados = '/api/clientes/duplicados/'
+
+    def setUp(self):
+        super().setUp()
+        self.yazz = Cliente.objects.create(nombre='Dotaciones Yazz', telefono='3001112233')
+        self.yaz = Cliente.objects.create(nombre='Dotaciones Yaz S.A.S', telefono='6014445566')
+        Cliente.objects.create(nombre='Bordados Luna', telefono='3007778899')
+
+    def test_claves_foneticas(self):
+        from . import duplicados
+
+        self.assertEqual(duplicados.clave_fonetica('yazz'), duplicados.clave_fonetica('yas'))
+        self.assertEqual(duplicados.clave_fonetica('vasquez'), duplicados.clave_fonetica('basques'))
+        self.assertEqual(duplicados.palabras('Dotaciones Yáz S.A.S'), ['dotaciones', 'yaz'])
+
+    def test_encuentra_el_par_solo_dentro_de_bloques(self):
+        from . import duplicados
+
+        pares, estadisticas = duplicados.candidatos()
+        self.assertEqual([(a, b) for a, b, _, _ in pares], [(self.yazz.pk, self.yaz.pk)])
+        self.assertEqual(pares[0][3], 'nombre')
+        self.assertEqual(estadisticas['comparaciones'], 1)
+
+    def test_revision_descartar_y_fusionar(self):
+        call_command('detectar_duplicados', stdout=StringIO())
+        response = self.client.get(self.url_duplicados)
+        candidato = response.data['results'][0]
+        self.assertEqual(candidato['cliente']['id'], self.yazz.pk)
+
+        self.client.post(f'{self.url_duplicados}{candidato["id"]}/descartar/')
+        self.assertEqual(self.client.get(self.url_duplicados).data['results'], [])
+        # Los descartados no se vuelven a proponer
+        call_command('detectar_duplicados', stdout=StringIO())
+        self.assertEqual(self.client.get(self.url_duplicados).data['results'], [])
 
-# Create your tests here.
+        response = self.client.post(f'{self.url_duplicados}{candidato["id"]}/fusionar/')
+        self.assertEqual(response.data['id'], self.yazz.pk)
+        self.assertFalse(Cliente.objects.filter(pk=self.yaz.pk).exists())
+        # El teléfono del duplicado no se pierde
+        self.assertIn('6014445566', response.data['notas'])
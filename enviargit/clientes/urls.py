@@ -1,9 +1,10 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ClienteViewSet
+from .views import CandidatoDuplicadoViewSet, ClienteViewSet
 
 router = DefaultRouter()
 router.register(r'clientes', ClienteViewSet)
+router.register(r'duplicados', CandidatoDuplicadoViewSet)
 
 urlpatterns = [
     path('', include(router.urls)),
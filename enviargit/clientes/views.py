@@ -1,38 +1,87 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Count, Sum
+from rest_framework.parsers import MultiPartParser
 from django.utils import timezone
-from datetime import timedelta
-from .models import Cliente
-from .serializers import ClienteSerializer, ClienteResumenSerializer
+from .models import CandidatoDuplicado, Cliente, telefono_canonico
+from .serializers import (
+    CandidatoDuplicadoSerializer, ClienteSerializer, ClienteListaSerializer, ClienteResumenSerializer,
+    ClienteMetricasSerializer
+)
+from backend.paginacion import CursorPorOrden
+from backend.routers import en_reportes
+from .reportes import estadisticas_clientes
+from . import busqueda, derivados, fusion, importacion
+
+# ?orden= del endpoint de mejores clientes -> columna con índice (-columna, -id)
+ORDENES_TOP = {
+    'comprado': 'total_comprado',
+    'saldo': 'saldo_pendiente',
+}
+LIMITE_TOP = 100
 
 class ClienteViewSet(viewsets.ModelViewSet):
     queryset = Cliente.objects.all()
     serializer_class = ClienteSerializer
+    ordering = ['-fecha_registro', '-id']
+    
+    def get_serializer_class(self):
+        if self.action == 'list':
+            return ClienteListaSerializer
+        return ClienteSerializer
     
     def get_queryset(self):
         queryset = Cliente.objects.all()
+        # Un solo "ahora" para los filtros y los campos derivados de todo el request
+        ahora = timezone.now()
         
         # Filtros opcionales
         activo = self.request.query_params.get('activo', None)
         tipo = self.request.query_params.get('tipo', None)
         buscar = self.request.query_params.get('buscar', None)
+        telefono = self.request.query_params.get('telefono', None)
+        nuevo = self.request.query_params.get('nuevo', None)
+        necesita_atencion = self.request.query_params.get('necesita_atencion', None)
+        segmento = self.request.query_params.get('segmento', None)
         
-        if activo is not None:
-            queryset = queryset.filter(activo=activo.lower() == 'true')
+        if necesita_atencion is not None and necesita_atencion.lower() == 'true':
+            # De la compra más antigua a la más reciente; por defecto solo activos
+            activos = activo is None or activo.lower() == 'true'
+            queryset = derivados.filtrar_necesita_atencion(queryset, ahora, activos)
+            self.ordering = derivados.ORDEN_ATENCION
+        else:
+            if activo is not None:
+                queryset = queryset.filter(activo=activo.lower() == 'true')
+            if necesita_atencion is not None:
+                queryset = queryset.exclude(derivados.necesita_atencion(ahora))
+        
+        if nuevo is not None:
+            # Índice de fecha_registro
+            if nuevo.lower() == 'true':
+                queryset = queryset.filter(derivados.es_nuevo(ahora))
+            else:
+                queryset = queryset.exclude(derivados.es_nuevo(ahora))
         
         if tipo:
             queryset = queryset.filter(tipo_cliente=tipo)
         
+        if segmento:
+            # ?segmento=campeon,leal; índice (segmento, -fecha_registro)
+            queryset = queryset.filter(segmento__in=segmento.split(','))
+        
+        if telefono:
+            # Búsqueda exacta por el índice único del número canónico
+            queryset = queryset.filter(telefono_canonico=telefono_canonico(telefono))
+        
         if buscar:
-            queryset = queryset.filter(
-                Q(nombre__icontains=buscar) |
-                Q(telefono__icontains=buscar) |
-                Q(email__icontains=buscar)
-            )
+            # Índice FTS5: ordenar por relevancia en lugar de fecha de registro
+            self.ordering = ['relevancia', '-id']
+            queryset = busqueda.filtrar(queryset, buscar)
         
-        return queryset.order_by('-fecha_registro')
+        queryset = queryset.order_by(*self.ordering)
+        if self.action == 'list':
+            return derivados.filas_lista(queryset, ahora)
+        return queryset
     
     @action(detail=False, methods=['get'])
     def resumen(self, request):
@@ -41,48 +90,125 @@ class ClienteViewSet(viewsets.ModelViewSet):
         serializer = ClienteResumenSerializer(clientes, many=True)
         return Response(serializer.data)
     
+    @action(detail=False, methods=['post'], parser_classes=[MultiPartParser])
+    def importar(self, request):
+        """
+        Importar clientes desde un archivo CSV o XLSX (campo `archivo`).
+        Con `simular=true` solo valida y devuelve el reporte sin crear nada.
+        """
+        archivo = request.FILES.get('archivo')
+        if not archivo:
+            return Response(
+                {'error': 'Debe adjuntar un archivo en el campo "archivo"'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        simular = request.data.get('simular', '').lower() == 'true'
+        try:
+            reporte = importacion.importar(
+                importacion.leer_filas(archivo, archivo.name), simular=simular
+            )
+        except importacion.ArchivoInvalido as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        reporte['simulado'] = simular
+        return Response(reporte, status=status.HTTP_200_OK if simular else status.HTTP_201_CREATED)
+    
     @action(detail=False, methods=['get'])
+    @en_reportes
     def estadisticas(self, request):
         """Estadísticas de clientes"""
-        total_clientes = Cliente.objects.count()
-        clientes_activos = Cliente.objects.filter(activo=True).count()
-        clientes_nuevos_mes = Cliente.objects.filter(
-            fecha_registro__gte=timezone.now() - timedelta(days=30)
-        ).count()
-        
-        # Clientes por tipo
-        por_tipo = Cliente.objects.values('tipo_cliente').annotate(
-            total=Count('id')
-        ).order_by('tipo_cliente')
+        return Response(estadisticas_clientes())
+    
+    @action(detail=False, methods=['get'])
+    @en_reportes
+    def top(self, request):
+        """
+        Mejores clientes por una métrica acumulada, leyendo solo `limite` filas
+        del índice. ?orden=comprado (por defecto) o saldo; ?limite=10 (máximo 100)
+        """
+        orden = request.query_params.get('orden', 'comprado')
+        if orden not in ORDENES_TOP:
+            return Response(
+                {'error': f'Orden inválido. Opciones: {", ".join(ORDENES_TOP)}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limite = min(max(int(request.query_params.get('limite', 10)), 1), LIMITE_TOP)
+        except ValueError:
+            limite = 10
         
-        return Response({
-            'total_clientes': total_clientes,
-            'clientes_activos': clientes_activos,
-            'clientes_nuevos_mes': clientes_nuevos_mes,
-            'distribucion_por_tipo': list(por_tipo)
-        })
+        columna = ORDENES_TOP[orden]
+        clientes = Cliente.objects.filter(**{f'{columna}__gt': 0}).order_by(f'-{columna}', '-id')[:limite]
+        return Response(ClienteMetricasSerializer(clientes, many=True).data)
     
     @action(detail=True, methods=['get'])
     def historial_pedidos(self, request, pk=None):
-        """Historial de pedidos de un cliente"""
+        """
+        Historial de pedidos de un cliente, paginado por cursor (?page_size,
+        ?cursor; ?paginar=false para todos). Los totales salen de las métricas
+        acumuladas del cliente.
+        """
         cliente = self.get_object()
         from pedidos.models import Pedido
         from pedidos.serializers import PedidoResumenSerializer
         
-        pedidos = Pedido.objects.filter(cliente=cliente).order_by('-fecha_pedido')
-        serializer = PedidoResumenSerializer(pedidos, many=True)
-        
-        # Estadísticas del cliente
-        total_pedidos = pedidos.count()
-        total_gastado = pedidos.aggregate(Sum('precio_total'))['precio_total__sum'] or 0
-        pedidos_pendientes = pedidos.exclude(estado='entregado').count()
+        pedidos = Pedido.objects.filter(cliente=cliente).select_related('cliente')
+        paginador = CursorPorOrden()
+        paginador.ordering = ('-fecha_pedido', '-id')
+        pagina = paginador.paginate_queryset(pedidos, request)
+        if pagina is None:  # ?paginar=false
+            pagina, siguiente, anterior = pedidos.order_by(*paginador.ordering), None, None
+        else:
+            siguiente, anterior = paginador.get_next_link(), paginador.get_previous_link()
         
         return Response({
             'cliente': ClienteSerializer(cliente).data,
-            'pedidos': serializer.data,
+            'pedidos': PedidoResumenSerializer(pagina, many=True).data,
+            'next': siguiente,
+            'previous': anterior,
             'estadisticas': {
-                'total_pedidos': total_pedidos,
-                'total_gastado': total_gastado,
-                'pedidos_pendientes': pedidos_pendientes
+                'total_pedidos': cliente.total_pedidos,
+                'total_gastado': cliente.total_facturado,
+                'total_pagado': cliente.total_pagado,
+                'saldo_pendiente': cliente.saldo_pendiente,
+                # Como total_pedidos, sin los cancelados
+                'pedidos_pendientes': pedidos.exclude(estado__in=['entregado', 'cancelado']).count()
             }
-        })
\ No newline at end of file
+        })
+
+
+class CandidatoDuplicadoViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Revisión de posibles clientes duplicados, del más al menos parecido.
+    Los pares los calcula el comando `detectar_duplicados`; por defecto se
+    listan los pendientes (?descartados=true para los descartados).
+    """
+    queryset = CandidatoDuplicado.objects.all()
+    serializer_class = CandidatoDuplicadoSerializer
+    ordering = ['-puntaje', '-id']
+    
+    def get_queryset(self):
+        descartados = self.request.query_params.get('descartados', 'false').lower() == 'true'
+        # `descartado IN (...)` para que SQLite busque en el índice (ver derivados.py)
+        queryset = CandidatoDuplicado.objects.select_related('cliente', 'duplicado')
+        if self.action == 'list':
+            queryset = queryset.filter(descartado__in=[descartados])
+        return queryset.order_by(*self.ordering)
+    
+    @action(detail=True, methods=['post'])
+    def descartar(self, request, pk=None):
+        """No son el mismo cliente: no se vuelve a proponer"""
+        candidato = self.get_object()
+        candidato.descartado = True
+        candidato.save(update_fields=['descartado'])
+        return Response(self.get_serializer(candidato).data)
+    
+    @action(detail=True, methods=['post'])
+    def fusionar(self, request, pk=None):
+        """Fusionar el duplicado en el cliente registrado primero (su teléfono queda en las notas)"""
+        candidato = self.get_object()
+        principal = candidato.cliente
+        fusion.fusionar(principal.telefono_canonico, principal.pk, [candidato.duplicado_id])
+        principal.refresh_from_db()
+        return Response(ClienteSerializer(principal).data)
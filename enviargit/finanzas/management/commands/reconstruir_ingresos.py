@@ -0,0 +1,57 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Min
+from django.utils import timezone
+
+from finanzas import rollup
+from finanzas.models import VentaDirecta, PagoPedido
+
+
+def _fecha(valor):
+    try:
+        return date.fromisoformat(valor)
+    except ValueError:
+        raise CommandError(f'Fecha inválida "{valor}". Use el formato AAAA-MM-DD')
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye o verifica el resumen diario de ingresos (IngresoDiario) para un rango de fechas'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', type=_fecha, help='Fecha inicial (AAAA-MM-DD). Por defecto, la primera venta o pago')
+        parser.add_argument('--hasta', type=_fecha, help='Fecha final inclusive (AAAA-MM-DD). Por defecto, hoy')
+        parser.add_argument(
+            '--verificar', action='store_true',
+            help='Solo comparar el resumen contra las tablas crudas, sin modificarlo'
+        )
+
+    def handle(self, *args, **options):
+        hasta = options['hasta'] or timezone.localdate()
+        desde = options['desde'] or self._primera_fecha() or hasta
+
+        if desde > hasta:
+            raise CommandError('--desde no puede ser posterior a --hasta')
+
+        if not options['verificar']:
+            filas = rollup.reconstruir(desde, hasta)
+            self.stdout.write(f'Resumen reconstruido del {desde} al {hasta}: {filas} fila(s)')
+
+        diferencias = rollup.diferencias(desde, hasta)
+        for (fecha, fuente, metodo_pago), esperado, guardado in diferencias:
+            self.stdout.write(
+                f'  {fecha} {fuente} {metodo_pago}: esperado={esperado} guardado={guardado}'
+            )
+
+        if diferencias:
+            raise CommandError(f'{len(diferencias)} diferencia(s) entre el resumen y las tablas crudas')
+
+        self.stdout.write(self.style.SUCCESS(f'Resumen verificado del {desde} al {hasta}'))
+
+    def _primera_fecha(self):
+        primeras = [
+            VentaDirecta.objects.aggregate(primera=Min('fecha_venta'))['primera'],
+            PagoPedido.objects.aggregate(primera=Min('fecha_pago'))['primera'],
+        ]
+        primeras = [timezone.localdate(fecha) for fecha in primeras if fecha]
+        return min(primeras) if primeras else None
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finanzas', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IngresoDiario',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField()),
+                ('fuente', models.CharField(choices=[('venta_directa', 'Venta Directa'), ('pago_pedido', 'Pago de Pedido')], max_length=20)),
+                ('metodo_pago', models.CharField(max_length=20)),
+                ('total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('descuento', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+            ],
+            options={
+                'verbose_name_plural': 'Ingresos Diarios',
+                'ordering': ['fecha'],
+                'constraints': [models.UniqueConstraint(fields=('fecha', 'fuente', 'metodo_pago'), name='ingreso_diario_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+        ('finanzas', '0002_ingresodiario'),
+        ('inventario', '0002_indices_paginacion'),
+        ('pedidos', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='movimientoinventario',
+            index=models.Index(fields=['-fecha', '-id'], name='finanzas_mo_fecha_f3d64f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pagopedido',
+            index=models.Index(fields=['-fecha_pago', '-id'], name='finanzas_pa_fecha_p_9f8c2e_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ventadirecta',
+            index=models.Index(fields=['-fecha_venta', '-id'], name='finanzas_ve_fecha_v_9f0670_idx'),
+        ),
+    ]
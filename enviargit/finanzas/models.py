@@ -31,12 +31,24 @@ class VentaDirecta(models.Model):
     # Notas
     notas = models.TextField(blank=True)
     
+    def save(self, *args, **kwargs):
+        # Atómico para que el resumen diario (IngresoDiario) se actualice en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+    
     def __str__(self):
         cliente_nombre = self.cliente.nombre if self.cliente else "Cliente General"
         return f"Venta {self.id} - {cliente_nombre} - ${self.total}"
     
     class Meta:
         verbose_name_plural = "Ventas Directas"
+        indexes = [
+            models.Index(fields=['-fecha_venta', '-id']),  # Paginación por cursor
+        ]
 
 class DetalleVentaDirecta(models.Model):
     """
@@ -101,11 +113,23 @@ class PagoPedido(models.Model):
     concepto = models.CharField(max_length=100)  # "Adelanto", "Pago final", etc.
     notas = models.TextField(blank=True)
     
+    def save(self, *args, **kwargs):
+        # Atómico para que el resumen diario (IngresoDiario) se actualice en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+    
     def __str__(self):
         return f"Pago {self.pedido} - ${self.monto} - {self.concepto}"
     
     class Meta:
         verbose_name_plural = "Pagos de Pedidos"
+        indexes = [
+            models.Index(fields=['-fecha_pago', '-id']),  # Paginación por cursor
+        ]
 
 class MovimientoInventario(models.Model):
     """
@@ -134,4 +158,39 @@ class MovimientoInventario(models.Model):
     
     class Meta:
         verbose_name_plural = "Movimientos de Inventario"
-        ordering = ['-fecha']
\ No newline at end of file
+        ordering = ['-fecha']
+        indexes = [
+            models.Index(fields=['-fecha', '-id']),  # Paginación por cursor
+        ]
+
+class IngresoDiario(models.Model):
+    """
+    Resumen diario de ingresos por fuente y método de pago.
+    Se mantiene incrementalmente desde las señales de VentaDirecta y PagoPedido
+    (ver finanzas/rollup.py) para que los reportes lean O(días) filas.
+    """
+    FUENTE_CHOICES = [
+        ('venta_directa', 'Venta Directa'),
+        ('pago_pedido', 'Pago de Pedido'),
+    ]
+    
+    fecha = models.DateField()  # Fecha local (America/Bogota)
+    fuente = models.CharField(max_length=20, choices=FUENTE_CHOICES)
+    metodo_pago = models.CharField(max_length=20)
+    
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    cantidad = models.PositiveIntegerField(default=0)  # Número de ventas o pagos
+    descuento = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    def __str__(self):
+        return f"{self.fecha} - {self.get_fuente_display()} ({self.metodo_pago}) - ${self.total}"
+    
+    class Meta:
+        verbose_name_plural = "Ingresos Diarios"
+        ordering = ['fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['fecha', 'fuente', 'metodo_pago'],
+                name='ingreso_diario_unico'
+            ),
+        ]
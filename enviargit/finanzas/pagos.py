@@ -0,0 +1,170 @@
+"""
+Registro de pagos de pedidos
+
+Los pagos suben `Pedido.adelanto_pagado` con un UPDATE condicional
+(`adelanto_pagado = adelanto_pagado + monto WHERE adelanto_pagado + monto <=
+precio_total`) en la misma transacción que inserta el pago, así que dos
+cajeros pagando el mismo pedido no pierden actualizaciones ni pueden pagar de
+más. Lo usan PagoPedidoViewSet.create, PedidoViewSet.agregar_pago y el
+registro por lotes para la conciliación de transferencias.
+"""
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from backend import metricas as medidores
+from backend.cache import invalidar
+from clientes import metricas
+from pedidos.models import Pedido
+from .models import PagoPedido
+from . import rollup
+
+
+class PagoRechazado(Exception):
+    """Ningún pago del lote se registró; `errores` tiene un mensaje por pedido rechazado"""
+
+    def __init__(self, errores):
+        self.errores = errores
+        super().__init__('; '.join(e['mensaje'] for e in errores))
+
+
+class _SaldoInsuficiente(Exception):
+    pass
+
+
+def leer_pago(datos, pedido=None):
+    """
+    Normalizar un pago del request: dict con pedido, monto, metodo_pago,
+    concepto, notas y fecha_pago. Lanza ValueError si faltan datos.
+    """
+    pedido = pedido or datos.get('pedido')
+    if not pedido:
+        raise ValueError('Pedido es requerido')
+    try:
+        monto = Decimal(str(datos.get('monto')))
+    except InvalidOperation:
+        raise ValueError('Monto es requerido')
+    if not monto.is_finite() or monto <= 0:
+        raise ValueError('El monto debe ser mayor a cero')
+
+    metodos = dict(PagoPedido.METODO_PAGO_CHOICES)
+    metodo_pago = datos.get('metodo_pago') or 'efectivo'
+    if metodo_pago not in metodos:
+        raise ValueError(f'Método de pago inválido. Opciones: {", ".join(metodos)}')
+
+    return {
+        'pedido': int(pedido),
+        'monto': monto,
+        'metodo_pago': metodo_pago,
+        'concepto': datos.get('concepto') or 'Pago parcial',
+        'notas': datos.get('notas') or '',
+        'fecha_pago': _fecha_pago(datos.get('fecha_pago')),
+    }
+
+
+def _fecha_pago(valor):
+    if not valor:
+        return timezone.now()
+    if isinstance(valor, str):
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            raise ValueError(f'Fecha de pago inválida: {valor}')
+        valor = fecha
+    return valor if timezone.is_aware(valor) else timezone.make_aware(valor)
+
+
+def _montos_por_pedido(pagos):
+    montos = defaultdict(Decimal)
+    for pago in pagos:
+        montos[pago['pedido']] += pago['monto']
+    return dict(montos)
+
+
+def _monto_por_pedido(montos):
+    """CASE id WHEN ... THEN monto END"""
+    return Case(
+        *[When(pk=pk, then=Value(monto)) for pk, monto in montos.items()],
+        output_field=DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def _rechazados(montos):
+    """Pedidos que no existen o cuyo saldo no alcanza para el monto"""
+    pedidos = Pedido.objects.in_bulk(list(montos))
+    errores = []
+    for pedido_id, monto in montos.items():
+        pedido = pedidos.get(pedido_id)
+        if pedido is None:
+            errores.append({
+                'pedido': pedido_id, 'saldo_pendiente': None, 'monto': monto,
+                'mensaje': f'Pedido con ID {pedido_id} no encontrado'
+            })
+        elif monto > pedido.saldo_pendiente:
+            errores.append({
+                'pedido': pedido_id, 'saldo_pendiente': pedido.saldo_pendiente, 'monto': monto,
+                'mensaje': f'El monto no puede ser mayor al saldo pendiente del pedido '
+                           f'{pedido_id} ({pedido.saldo_pendiente})'
+            })
+    return errores
+
+
+def registrar_pagos(pagos):
+    """
+    Registrar varios pagos (ya normalizados con leer_pago) en una transacción.
+    Si algún pedido no existe o quedaría pagado de más no se registra ninguno
+    y se lanza PagoRechazado con todos los pedidos rechazados.
+    Retorna los PagoPedido creados, en el mismo orden.
+    """
+    montos = _montos_por_pedido(pagos)
+
+    try:
+        with transaction.atomic():
+            actualizados = Pedido.objects.filter(
+                pk__in=montos,
+                adelanto_pagado__lte=F('precio_total') - _monto_por_pedido(montos)
+            ).update(adelanto_pagado=F('adelanto_pagado') + _monto_por_pedido(montos))
+            if actualizados != len(montos):
+                # Revertir antes de leer los saldos para el mensaje de error
+                raise _SaldoInsuficiente
+
+            creados = PagoPedido.objects.bulk_create([PagoPedido(
+                pedido_id=pago['pedido'], monto=pago['monto'], metodo_pago=pago['metodo_pago'],
+                concepto=pago['concepto'], notas=pago['notas'], fecha_pago=pago['fecha_pago']
+            ) for pago in pagos])
+            _actualizar_resumen(creados)
+            # update() no dispara las señales que mantienen las métricas del cliente
+            metricas.actualizar(Pedido.objects.filter(pk__in=montos).values('cliente_id'))
+    except _SaldoInsuficiente:
+        pass
+    else:
+        # bulk_create y update() no disparan las señales de la caché
+        invalidar('pedidos', 'finanzas')
+        transaction.on_commit(lambda: medidores.contar('bordados_pagos_registrados_total', len(creados)))
+        return creados
+
+    raise PagoRechazado(_rechazados(montos) or [{
+        'pedido': None, 'saldo_pendiente': None, 'monto': None,
+        'mensaje': 'Los saldos cambiaron mientras se registraban los pagos, intente de nuevo'
+    }])
+
+
+def registrar_pago(datos, pedido=None):
+    """Registrar un solo pago. Retorna el PagoPedido creado"""
+    return registrar_pagos([leer_pago(datos, pedido)])[0]
+
+
+def _actualizar_resumen(pagos):
+    """Sumar a IngresoDiario lo que las señales de post_save habrían sumado"""
+    por_clave = defaultdict(lambda: [Decimal('0'), 0, Decimal('0')])
+    for pago in pagos:
+        clave, (monto, cantidad, descuento) = rollup.aporte(pago)
+        acumulado = por_clave[clave]
+        acumulado[0] += monto
+        acumulado[1] += cantidad
+        acumulado[2] += descuento
+    for clave, valores in por_clave.items():
+        rollup.aplicar(clave, tuple(valores))
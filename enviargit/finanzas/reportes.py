@@ -0,0 +1,196 @@
+"""
+Consultas agregadas para los reportes y el dashboard financiero
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DateField, DecimalField, ExpressionWrapper, F, Q, Sum
+from django.db.models.functions import Trunc
+from django.utils import timezone
+
+from backend.cache import DOMINIOS, en_cache
+from backend.fechas import rango_fechas
+from clientes.models import Cliente
+from inventario.models import Producto
+from pedidos.models import Pedido
+from .models import VentaDirecta, DetalleVentaDirecta, PagoPedido, IngresoDiario
+
+# Período de la API -> tipo de truncamiento en la base de datos
+PERIODOS = {
+    'dia': 'day',
+    'semana': 'week',  # Semana ISO (inicia el lunes)
+    'mes': 'month',
+}
+
+MAX_DIAS_SERIE = 3650  # Diez años; más allá la resta de fechas se desborda
+
+# Métrica de la API -> anotación por la que se ordena el ranking de productos
+METRICAS_PRODUCTOS = {
+    'ingresos': 'total_vendido',
+    'cantidad': 'cantidad_vendida',
+    'ganancia': 'ganancia',
+}
+
+
+def inicio_bucket(fecha, periodo):
+    """Fecha en la que empieza el bucket que contiene a `fecha`"""
+    if periodo == 'semana':
+        return fecha - timedelta(days=fecha.weekday())
+    if periodo == 'mes':
+        return fecha.replace(day=1)
+    return fecha
+
+
+def siguiente_bucket(fecha, periodo):
+    """Inicio del bucket siguiente a uno que empieza en `fecha`"""
+    if periodo == 'semana':
+        return fecha + timedelta(days=7)
+    if periodo == 'mes':
+        if fecha.month == 12:
+            return fecha.replace(year=fecha.year + 1, month=1)
+        return fecha.replace(month=fecha.month + 1)
+    return fecha + timedelta(days=1)
+
+
+def serie_ingresos(periodo='dia', dias=30, hoy=None):
+    """
+    Serie temporal de ingresos agrupada por día, semana ISO o mes.
+
+    Lee el resumen diario (IngresoDiario) con una sola consulta agrupada
+    por bucket y fuente, sin importar el número de días, y rellena con
+    ceros los buckets sin movimientos.
+    """
+    if periodo not in PERIODOS:
+        raise ValueError(f'Período inválido. Opciones: {", ".join(PERIODOS)}')
+    if dias > MAX_DIAS_SERIE:
+        raise ValueError(f'El máximo de días es {MAX_DIAS_SERIE}')
+
+    hoy = hoy or timezone.localdate()
+    desde = hoy - timedelta(days=max(dias, 1) - 1)
+
+    filas = IngresoDiario.objects.filter(
+        fecha__gte=desde, fecha__lte=hoy
+    ).annotate(
+        bucket=Trunc('fecha', PERIODOS[periodo], output_field=DateField())
+    ).values('bucket', 'fuente').annotate(
+        total=Sum('total')
+    ).order_by()
+
+    totales = {(fila['bucket'], fila['fuente']): fila['total'] or Decimal('0') for fila in filas}
+
+    serie = []
+    fecha = inicio_bucket(desde, periodo)
+    while fecha <= hoy:
+        ingresos_ventas = totales.get((fecha, 'venta_directa'), Decimal('0'))
+        ingresos_servicios = totales.get((fecha, 'pago_pedido'), Decimal('0'))
+        serie.append({
+            'fecha': fecha,
+            'ingresos_ventas': ingresos_ventas,
+            'ingresos_servicios': ingresos_servicios,
+            'total': ingresos_ventas + ingresos_servicios
+        })
+        fecha = siguiente_bucket(fecha, periodo)
+
+    return serie
+
+
+@en_cache('finanzas.resumen_general', dominios=DOMINIOS)
+def resumen_dashboard(hoy=None):
+    """
+    Métricas del dashboard financiero con una consulta de agregación
+    condicional por tabla: las ventanas de hoy, semana y mes se calculan
+    en un solo recorrido del rango [min(inicio_semana, inicio_mes), hoy].
+    """
+    hoy = hoy or timezone.localdate()
+    inicio_semana = hoy - timedelta(days=hoy.weekday())
+    inicio_mes = hoy.replace(day=1)
+
+    ingresos = IngresoDiario.objects.filter(
+        fecha__gte=min(inicio_semana, inicio_mes), fecha__lte=hoy
+    ).aggregate(
+        hoy=Sum('total', filter=Q(fecha=hoy)),
+        semana=Sum('total', filter=Q(fecha__gte=inicio_semana)),
+        mes=Sum('total', filter=Q(fecha__gte=inicio_mes)),
+    )
+
+    pedidos = Pedido.objects.aggregate(
+        pendiente_pago=Sum(
+            F('precio_total') - F('adelanto_pagado'),
+            filter=Q(adelanto_pagado__lt=F('precio_total'))
+        ),
+        en_proceso=Count('id', filter=Q(estado__in=['en_proceso', 'terminado'])),
+    )
+
+    productos_bajo_stock = Producto.objects.filter(
+        cantidad_actual__lte=F('stock_minimo')
+    ).count()
+
+    clientes_nuevos_mes = Cliente.objects.filter(
+        rango_fechas('fecha_registro', desde=inicio_mes)
+    ).count()
+
+    return {
+        'ingresos_hoy': ingresos['hoy'] or Decimal('0'),
+        'ingresos_semana': ingresos['semana'] or Decimal('0'),
+        'ingresos_mes': ingresos['mes'] or Decimal('0'),
+        'pedidos_pendientes_pago': pedidos['pendiente_pago'] or Decimal('0'),
+        'productos_bajo_stock': productos_bajo_stock,
+        'pedidos_en_proceso': pedidos['en_proceso'],
+        'clientes_nuevos_mes': clientes_nuevos_mes
+    }
+
+
+def ranking_productos(dias=30, metrica='ingresos', limite=10, categoria=None, hoy=None):
+    """
+    Productos más vendidos en ventas directas.
+
+    Agrupa por producto (no por nombre, que no es único), calcula la ganancia
+    con los precios del producto en la misma consulta y deja el ORDER BY y el
+    LIMIT a la base de datos: una sola consulta sin importar cuántos
+    productos distintos se vendieron.
+    """
+    if metrica not in METRICAS_PRODUCTOS:
+        raise ValueError(f'Métrica inválida. Opciones: {", ".join(METRICAS_PRODUCTOS)}')
+    if not 0 <= dias <= MAX_DIAS_SERIE:
+        raise ValueError(f'Los días deben estar entre 0 y {MAX_DIAS_SERIE}')
+
+    hoy = hoy or timezone.localdate()
+    # Subconsulta por id para que SQLite parta del índice de fecha_venta
+    # en lugar de recorrer todos los detalles en orden de producto
+    ventas = VentaDirecta.objects.filter(
+        rango_fechas('fecha_venta', desde=hoy - timedelta(days=dias))
+    ).values('id')
+    detalles = DetalleVentaDirecta.objects.filter(venta_id__in=ventas)
+    if categoria:
+        detalles = detalles.filter(producto__categoria_id=categoria)
+
+    ganancia_linea = ExpressionWrapper(
+        (F('producto__precio_venta') - F('producto__precio_compra')) * F('cantidad'),
+        output_field=DecimalField(max_digits=14, decimal_places=2)
+    )
+
+    return detalles.values(
+        'producto_id',
+        producto_nombre=F('producto__nombre'),
+        categoria_nombre=F('producto__categoria__nombre'),
+    ).annotate(
+        total_vendido=Sum('subtotal'),
+        cantidad_vendida=Sum('cantidad'),
+        ganancia=Sum(ganancia_linea),
+    ).order_by(f'-{METRICAS_PRODUCTOS[metrica]}', 'producto_id')[:limite]
+
+
+def consultas_por_fecha(hoy=None):
+    """
+    Consultas de reportes y listados filtradas por rango de fechas.
+    El comando `verificar_planes` revisa que ninguna recorra la tabla completa.
+    """
+    hoy = hoy or timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    return {
+        'ingresos_mes': IngresoDiario.objects.filter(fecha__gte=inicio_mes, fecha__lte=hoy),
+        'ventas_del_dia': VentaDirecta.objects.filter(rango_fechas('fecha_venta', hoy, hoy)),
+        'pagos_del_dia': PagoPedido.objects.filter(rango_fechas('fecha_pago', hoy, hoy)),
+        'productos_mas_vendidos': ranking_productos(hoy=hoy),
+        'clientes_nuevos_mes': Cliente.objects.filter(rango_fechas('fecha_registro', desde=inicio_mes)),
+    }
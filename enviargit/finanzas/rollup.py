@@ -0,0 +1,156 @@
+"""
+Mantenimiento del resumen diario de ingresos (IngresoDiario)
+
+Cada venta directa o pago de pedido aporta a una fila (fecha local, fuente,
+método de pago). Las señales de finanzas/signals.py aplican los cambios de
+forma incremental dentro de la misma transacción del guardado, y el comando
+`reconstruir_ingresos` recalcula o verifica un rango contra las tablas crudas.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import VentaDirecta, PagoPedido, IngresoDiario
+from backend.fechas import inicio_dia_local
+
+# fuente -> (modelo, campo de fecha, campo de monto, campo de descuento)
+FUENTES = {
+    'venta_directa': (VentaDirecta, 'fecha_venta', 'total', 'descuento'),
+    'pago_pedido': (PagoPedido, 'fecha_pago', 'monto', None),
+}
+
+FUENTE_POR_MODELO = {modelo: fuente for fuente, (modelo, *_) in FUENTES.items()}
+
+CERO = Decimal('0')
+
+
+def _fecha_local(valor):
+    if timezone.is_naive(valor):
+        valor = timezone.make_aware(valor)
+    return timezone.localdate(valor)
+
+
+def aporte(instance):
+    """
+    Clave y valores con los que una venta o pago contribuye al resumen:
+    ((fecha, fuente, metodo_pago), (total, cantidad, descuento))
+    """
+    fuente = FUENTE_POR_MODELO[type(instance)]
+    _, campo_fecha, campo_monto, campo_descuento = FUENTES[fuente]
+    clave = (_fecha_local(getattr(instance, campo_fecha)), fuente, instance.metodo_pago)
+    descuento = Decimal(str(getattr(instance, campo_descuento))) if campo_descuento else CERO
+    return clave, (Decimal(str(getattr(instance, campo_monto))), 1, descuento)
+
+
+def aporte_guardado(modelo, pk):
+    """Aporte de la fila tal como está hoy en la base de datos (None si no existe)"""
+    instance = modelo.objects.filter(pk=pk).first()
+    return aporte(instance) if instance else None
+
+
+def aplicar(clave, valores, signo=1):
+    """Sumar (signo=1) o restar (signo=-1) un aporte a su fila del resumen"""
+    fecha, fuente, metodo_pago = clave
+    total, cantidad, descuento = (v * signo for v in valores)
+    filtro = {'fecha': fecha, 'fuente': fuente, 'metodo_pago': metodo_pago}
+
+    with transaction.atomic():
+        actualizadas = IngresoDiario.objects.filter(**filtro).update(
+            total=F('total') + total,
+            cantidad=F('cantidad') + cantidad,
+            descuento=F('descuento') + descuento
+        )
+        if not actualizadas and signo > 0:
+            try:
+                with transaction.atomic():
+                    IngresoDiario.objects.create(
+                        **filtro, total=total, cantidad=cantidad, descuento=descuento
+                    )
+            except IntegrityError:
+                # Otra transacción creó la fila entre el UPDATE y el INSERT
+                aplicar(clave, valores, signo)
+        elif signo < 0:
+            IngresoDiario.objects.filter(**filtro, cantidad=0).delete()
+
+
+def registrar_cambio(anterior, nuevo):
+    """Reemplazar el aporte anterior de una fila por el nuevo (cualquiera puede ser None)"""
+    if anterior == nuevo:
+        return
+    with transaction.atomic():
+        if anterior:
+            aplicar(*anterior, signo=-1)
+        if nuevo:
+            aplicar(*nuevo)
+
+
+def agregados_crudos(desde, hasta):
+    """
+    Totales por (fecha, fuente, metodo_pago) calculados directamente desde
+    VentaDirecta y PagoPedido para el rango de fechas locales [desde, hasta].
+    """
+    tz = timezone.get_current_timezone()
+    inicio = inicio_dia_local(desde)
+    fin = inicio_dia_local(hasta + timedelta(days=1))
+    resultado = {}
+
+    for fuente, (modelo, campo_fecha, campo_monto, campo_descuento) in FUENTES.items():
+        agregados = {'suma_total': Sum(campo_monto), 'tickets': Count('id')}
+        if campo_descuento:
+            agregados['suma_descuento'] = Sum(campo_descuento)
+
+        filas = modelo.objects.filter(**{
+            f'{campo_fecha}__gte': inicio,
+            f'{campo_fecha}__lt': fin,
+        }).annotate(
+            dia=TruncDate(campo_fecha, tzinfo=tz)
+        ).values('dia', 'metodo_pago').annotate(**agregados).order_by()
+
+        for fila in filas:
+            resultado[(fila['dia'], fuente, fila['metodo_pago'])] = (
+                fila['suma_total'] or CERO,
+                fila['tickets'],
+                fila.get('suma_descuento') or CERO
+            )
+
+    return resultado
+
+
+def agregados_resumen(desde, hasta):
+    """Mismo formato que agregados_crudos pero leyendo IngresoDiario"""
+    filas = IngresoDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta, cantidad__gt=0)
+    return {
+        (fila.fecha, fila.fuente, fila.metodo_pago): (fila.total, fila.cantidad, fila.descuento)
+        for fila in filas
+    }
+
+
+@transaction.atomic
+def reconstruir(desde, hasta):
+    """Borrar y recalcular el resumen del rango. Retorna el número de filas creadas"""
+    IngresoDiario.objects.filter(fecha__gte=desde, fecha__lte=hasta).delete()
+    filas = [
+        IngresoDiario(
+            fecha=fecha, fuente=fuente, metodo_pago=metodo_pago,
+            total=total, cantidad=cantidad, descuento=descuento
+        )
+        for (fecha, fuente, metodo_pago), (total, cantidad, descuento)
+        in agregados_crudos(desde, hasta).items()
+    ]
+    IngresoDiario.objects.bulk_create(filas, batch_size=500)
+    return len(filas)
+
+
+def diferencias(desde, hasta):
+    """Lista de (clave, esperado, guardado) donde el resumen no coincide con las tablas crudas"""
+    esperado = agregados_crudos(desde, hasta)
+    guardado = agregados_resumen(desde, hasta)
+    return [
+        (clave, esperado.get(clave), guardado.get(clave))
+        for clave in sorted(set(esperado) | set(guardado))
+        if esperado.get(clave) != guardado.get(clave)
+    ]
@@ -53,18 +53,20 @@ class MovimientoInventarioSerializer(serializers.ModelSerializer):
 
 # Serializers para reportes y dashboard
 class ResumenFinancieroSerializer(serializers.Serializer):
-    """Para el dashboard financiero"""
-    ingresos_hoy = serializers.DecimalField(max_digits=10, decimal_places=2)
-    ingresos_semana = serializers.DecimalField(max_digits=10, decimal_places=2)
-    ingresos_mes = serializers.DecimalField(max_digits=10, decimal_places=2)
-    pedidos_pendientes_pago = serializers.DecimalField(max_digits=10, decimal_places=2)
+    """Para el dashboard financiero (sumas: mismos dígitos que IngresoDiario)"""
+    ingresos_hoy = serializers.DecimalField(max_digits=14, decimal_places=2)
+    ingresos_semana = serializers.DecimalField(max_digits=14, decimal_places=2)
+    ingresos_mes = serializers.DecimalField(max_digits=14, decimal_places=2)
+    pedidos_pendientes_pago = serializers.DecimalField(max_digits=14, decimal_places=2)
     productos_bajo_stock = serializers.IntegerField()
     pedidos_en_proceso = serializers.IntegerField()
     clientes_nuevos_mes = serializers.IntegerField()
 
 class ProductoVentasSerializer(serializers.Serializer):
     """Para reporte de productos más vendidos"""
+    producto_id = serializers.IntegerField()
     producto_nombre = serializers.CharField()
-    total_vendido = serializers.DecimalField(max_digits=10, decimal_places=2)
-    cantidad_vendida = serializers.DecimalField(max_digits=8, decimal_places=2)
-    ganancia = serializers.DecimalField(max_digits=10, decimal_places=2)
\ No newline at end of file
+    categoria_nombre = serializers.CharField()
+    total_vendido = serializers.DecimalField(max_digits=14, decimal_places=2)
+    cantidad_vendida = serializers.DecimalField(max_digits=12, decimal_places=2)
+    ganancia = serializers.DecimalField(max_digits=14, decimal_places=2)
\ No newline at end of file
@@ -0,0 +1,32 @@
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import VentaDirecta, PagoPedido
+from . import rollup
+
+
+@receiver(pre_save, sender=VentaDirecta)
+@receiver(pre_save, sender=PagoPedido)
+def guardar_aporte_anterior(sender, instance, raw=False, **kwargs):
+    """Recordar cómo contribuía la fila al resumen antes de editarla"""
+    if raw:
+        return
+    instance._aporte_anterior = rollup.aporte_guardado(sender, instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=VentaDirecta)
+@receiver(post_save, sender=PagoPedido)
+def actualizar_resumen_al_guardar(sender, instance, raw=False, **kwargs):
+    """Mantener IngresoDiario al crear o editar ventas y pagos"""
+    if raw:
+        return
+    anterior = getattr(instance, '_aporte_anterior', None)
+    rollup.registrar_cambio(anterior, rollup.aporte(instance))
+    instance._aporte_anterior = None
+
+
+@receiver(post_delete, sender=VentaDirecta)
+@receiver(post_delete, sender=PagoPedido)
+def actualizar_resumen_al_borrar(sender, instance, **kwargs):
+    """Descontar del resumen las ventas y pagos eliminados"""
+    rollup.registrar_cambio(rollup.aporte(instance), None)
@@ -1,3 +1,409 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from backend import escritura
+from clientes.models import Cliente
+from inventario.models import Categoria, Producto
+from pedidos.models import Pedido
+from .models import VentaDirecta, DetalleVentaDirecta, PagoPedido, MovimientoInventario, IngresoDiario
+from . import rollup
+from .reportes import serie_ingresos
+
+
+def fecha_local(anio, mes, dia, hora=12):
+    return timezone.make_aware(datetime(anio, mes, dia, hora), timezone.get_current_timezone())
+
+
+class FinanzasTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.cliente = Cliente.objects.create(nombre='Ana Torres', telefono='3001234567')
+        self.pedido = Pedido.objects.create(
+            cliente=self.cliente,
+            fecha_entrega_prometida=timezone.now() + timedelta(days=5),
+            tipo_bordado='computarizado',
+            descripcion='Logo bordado',
+            precio_total=Decimal('500000'),
+        )
+
+    def crear_venta(self, fecha, total):
+        return VentaDirecta.objects.create(
+            fecha_venta=fecha, subtotal=total, total=total, metodo_pago='efectivo'
+        )
+
+    def crear_producto(self, nombre, precio_compra, precio_venta, categoria=None, cantidad=100):
+        categoria = categoria or Categoria.objects.get_or_create(nombre='Hilos')[0]
+        return Producto.objects.create(
+            nombre=nombre, categoria=categoria, cantidad_actual=Decimal(cantidad),
+            precio_compra=Decimal(precio_compra), precio_venta=Decimal(precio_venta)
+        )
+
+    def vender(self, producto, cantidad, fecha=None):
+        subtotal = producto.precio_venta * cantidad
+        venta = self.crear_venta(fecha or timezone.now(), subtotal)
+        return DetalleVentaDirecta.objects.create(
+            venta=venta, producto=producto, cantidad=Decimal(cantidad),
+            precio_unitario=producto.precio_venta, subtotal=subtotal
+        )
+
+    def crear_pago(self, fecha, monto):
+        return PagoPedido.objects.create(
+            pedido=self.pedido, fecha_pago=fecha, monto=monto,
+            metodo_pago='efectivo', concepto='Adelanto'
+        )
+
+
+
+class IngresosPorPeriodoTests(FinanzasTestCase):
+    url = '/api/finanzas/dashboard/ingresos_por_periodo/'
+
+    def test_serie_diaria_rellena_dias_vacios(self):
+        hoy = timezone.localdate()
+        self.crear_venta(timezone.now(), Decimal('1000'))
+        self.crear_pago(timezone.now() - timedelta(days=2), Decimal('500'))
+
+        response = self.client.get(self.url, {'dias': 7})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 7)
+        self.assertEqual(response.data[-1]['fecha'], hoy)
+        self.assertEqual(response.data[-1]['ingresos_ventas'], Decimal('1000'))
+        self.assertEqual(response.data[-3]['ingresos_servicios'], Decimal('500'))
+        self.assertEqual(response.data[0]['total'], Decimal('0'))
+
+    def test_dias_fuera_de_rango(self):
+        response = self.client.get(self.url, {'dias': 10 ** 9})
+        self.assertEqual(response.status_code, 400)
+
+    def test_consultas_constantes_sin_importar_los_dias(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'dias': 7})
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'dias': 365})
+
+    def test_buckets_por_mes_usan_hora_local(self):
+        # 23:00 del 31 de enero en Bogotá ya es 1 de febrero en UTC
+        self.crear_venta(fecha_local(2025, 1, 31, 23), Decimal('300'))
+        self.crear_venta(fecha_local(2025, 2, 3), Decimal('200'))
+
+        serie = serie_ingresos(periodo='mes', dias=60, hoy=datetime(2025, 2, 28).date())
+
+        por_mes = {fila['fecha'].month: fila['total'] for fila in serie}
+        self.assertEqual(por_mes[1], Decimal('300'))
+        self.assertEqual(por_mes[2], Decimal('200'))
+
+    def test_periodo_invalido(self):
+        response = self.client.get(self.url, {'periodo': 'anio'})
+        self.assertEqual(response.status_code, 400)
+
+
+class IngresoDiarioTests(FinanzasTestCase):
+    def fila(self, fuente, metodo_pago='efectivo'):
+        return IngresoDiario.objects.get(fecha=timezone.localdate(), fuente=fuente, metodo_pago=metodo_pago)
+
+    def test_crear_editar_y_borrar_mantienen_el_resumen(self):
+        venta = self.crear_venta(timezone.now(), Decimal('1000'))
+        self.crear_venta(timezone.now(), Decimal('500'))
+        self.assertEqual(self.fila('venta_directa').total, Decimal('1500'))
+        self.assertEqual(self.fila('venta_directa').cantidad, 2)
+
+        venta.metodo_pago = 'tarjeta'
+        venta.save()
+        self.assertEqual(self.fila('venta_directa').total, Decimal('500'))
+        self.assertEqual(self.fila('venta_directa', 'tarjeta').total, Decimal('1000'))
+
+        venta.delete()
+        self.assertFalse(IngresoDiario.objects.filter(metodo_pago='tarjeta').exists())
+
+    def test_borrar_pedido_descuenta_sus_pagos(self):
+        self.crear_pago(timezone.now(), Decimal('200'))
+        self.assertEqual(self.fila('pago_pedido').total, Decimal('200'))
+
+        self.pedido.delete()
+        self.assertFalse(IngresoDiario.objects.filter(fuente='pago_pedido').exists())
+
+    def test_comando_reconstruye_y_verifica(self):
+        self.crear_venta(timezone.now() - timedelta(days=3), Decimal('700'))
+        self.crear_pago(timezone.now(), Decimal('300'))
+        esperado = rollup.agregados_resumen(timezone.localdate() - timedelta(days=10), timezone.localdate())
+
+        IngresoDiario.objects.all().delete()
+        with self.assertRaises(CommandError):
+            call_command('reconstruir_ingresos', '--verificar', stdout=StringIO())
+
+        call_command('reconstruir_ingresos', stdout=StringIO())
+        self.assertEqual(
+            rollup.agregados_resumen(timezone.localdate() - timedelta(days=10), timezone.localdate()),
+            esperado
+        )
+
+
+class ResumenGeneralTests(FinanzasTestCase):
+    url = '/api/finanzas/dashboard/resumen_general/'
+
+    def test_ventanas_de_hoy_semana_y_mes(self):
+        self.crear_venta(timezone.now(), Decimal('1000'))
+        self.crear_pago(timezone.now(), Decimal('400'))
+        self.crear_venta(timezone.now() - timedelta(days=40), Decimal('9999'))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Decimal(response.data['ingresos_hoy']), Decimal('1400'))
+        self.assertEqual(Decimal(response.data['ingresos_semana']), Decimal('1400'))
+        self.assertEqual(Decimal(response.data['ingresos_mes']), Decimal('1400'))
+        self.assertEqual(Decimal(response.data['pedidos_pendientes_pago']), Decimal('500000'))
+        self.assertEqual(response.data['pedidos_en_proceso'], 0)
+        self.assertEqual(response.data['clientes_nuevos_mes'], 1)
+
+    def test_numero_de_consultas(self):
+        # Una consulta por tabla: IngresoDiario, Pedido, Producto y Cliente
+        with self.assertNumQueries(4):
+            self.client.get(self.url)
+
+    def test_cache_se_invalida_al_registrar_ventas(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        # La versión sube al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_venta(timezone.now(), Decimal('250'))
+
+        response = self.client.get(self.url)
+        self.assertEqual(Decimal(response.data['ingresos_hoy']), Decimal('250'))
+
+
+class ProductosMasVendidosTests(FinanzasTestCase):
+    url = '/api/finanzas/dashboard/productos_mas_vendidos/'
+
+    def setUp(self):
+        super().setUp()
+        # Dos productos con el mismo nombre no deben mezclarse
+        self.hilo_rojo = self.crear_producto('Hilo', '1000', '3000')
+        self.hilo_azul = self.crear_producto('Hilo', '1000', '1500')
+        self.gorra = self.crear_producto(
+            'Gorra', '5000', '8000', categoria=Categoria.objects.create(nombre='Prendas')
+        )
+        self.vender(self.hilo_rojo, 2)
+        self.vender(self.hilo_azul, 10)
+        self.vender(self.gorra, 1)
+
+    def test_ranking_por_metrica(self):
+        por_ingresos = self.client.get(self.url).data
+        self.assertEqual([p['producto_id'] for p in por_ingresos],
+                         [self.hilo_azul.id, self.gorra.id, self.hilo_rojo.id])
+
+        por_ganancia = self.client.get(self.url, {'metrica': 'ganancia'}).data
+        self.assertEqual(por_ganancia[0]['producto_id'], self.hilo_azul.id)
+        self.assertEqual(Decimal(por_ganancia[0]['ganancia']), Decimal('5000'))
+
+        por_cantidad = self.client.get(self.url, {'metrica': 'cantidad', 'limite': 1}).data
+        self.assertEqual(len(por_cantidad), 1)
+
+    def test_filtro_por_categoria(self):
+        response = self.client.get(self.url, {'categoria': self.gorra.categoria_id})
+        self.assertEqual([p['producto_nombre'] for p in response.data], ['Gorra'])
+
+    def test_dias_fuera_de_rango(self):
+        for dias in (10 ** 9, -10 ** 9):
+            response = self.client.get(self.url, {'dias': dias})
+            self.assertEqual(response.status_code, 400)
+
+    def test_una_sola_consulta(self):
+        for i in range(5):
+            self.vender(self.crear_producto(f'Producto {i}', '100', '200'), 1)
+        with self.assertNumQueries(1):
+            self.client.get(self.url)
+
+class ListadosConsultasConstantesTests(FinanzasTestCase):
+    def crear_ventas(self, n, lineas=3):
+        for _ in range(n):
+            venta = self.crear_venta(timezone.now(), Decimal('1000'))
+            for i in range(lineas):
+                producto = self.crear_producto(f'Producto {venta.id}-{i}', '100', '200')
+                DetalleVentaDirecta.objects.create(
+                    venta=venta, producto=producto, cantidad=Decimal('1'),
+                    precio_unitario=producto.precio_venta, subtotal=producto.precio_venta
+                )
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(consultas)
+
+    def test_ventas_directas(self):
+        url = '/api/finanzas/ventas-directas/'
+        self.crear_ventas(1)
+        con_una = self.contar_consultas(url)
+        self.crear_ventas(5)
+        self.assertEqual(self.contar_consultas(url), con_una)
+
+        venta = VentaDirecta.objects.first()
+        self.assertEqual(self.contar_consultas(f'{url}{venta.id}/'), con_una)
+
+    def test_movimientos_inventario(self):
+        url = '/api/finanzas/movimientos-inventario/'
+        self.crear_ventas(1)
+        con_una = self.contar_consultas(url)
+        self.crear_ventas(5)
+        self.assertEqual(self.contar_consultas(url), con_una)
+
+
+class FiltrosPorFechaTests(FinanzasTestCase):
+    url = '/api/finanzas/ventas-directas/'
+
+    def test_fecha_hasta_incluye_todo_el_dia_local(self):
+        # 23:00 en Bogotá ya es el día siguiente en UTC
+        self.crear_venta(fecha_local(2025, 3, 10, 23), Decimal('100'))
+        self.crear_venta(fecha_local(2025, 3, 11, 0), Decimal('200'))
+
+        response = self.client.get(self.url, {
+            'fecha_desde': '2025-03-10', 'fecha_hasta': '2025-03-10', 'paginar': 'false'
+        })
+
+        self.assertEqual([Decimal(v['total']) for v in response.data], [Decimal('100')])
+
+    def test_planes_de_consulta_usan_indices(self):
+        call_command('verificar_planes', stdout=StringIO())
+
+
+class RegistrarVentaTests(FinanzasTestCase):
+    url = '/api/finanzas/ventas-directas/'
+
+    def setUp(self):
+        super().setUp()
+        self.hilo = self.crear_producto('Hilo', '1000', '3000', cantidad=10)
+        self.gorra = self.crear_producto('Gorra', '5000', '8000', cantidad=2)
+
+    def vender_por_api(self, *lineas):
+        detalles = [
+            {'producto': p.id, 'cantidad': str(c), 'precio_unitario': str(p.precio_venta),
+             'subtotal': str(p.precio_venta * c)}
+            for p, c in lineas
+        ]
+        total = sum(Decimal(d['subtotal']) for d in detalles)
+        return self.client.post(self.url, {
+            'cliente': self.cliente.id, 'subtotal': str(total), 'total': str(total),
+            'metodo_pago': 'efectivo', 'detalles': detalles
+        }, format='json')
+
+    def test_descuenta_stock_y_registra_movimientos(self):
+        response = self.vender_por_api((self.hilo, 3), (self.gorra, 1), (self.hilo, 2))
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['detalles']), 3)
+        self.hilo.refresh_from_db()
+        self.assertEqual(self.hilo.cantidad_actual, Decimal('5'))
+        movimientos = MovimientoInventario.objects.filter(producto=self.hilo).order_by('id')
+        self.assertEqual(
+            [(m.cantidad_anterior, m.cantidad_nueva) for m in movimientos],
+            [(Decimal('10'), Decimal('7')), (Decimal('7'), Decimal('5'))]
+        )
+
+    def test_resultado_desconocido_no_invita_a_repetir(self):
+        with mock.patch.object(escritura, 'ejecutar', side_effect=escritura.ResultadoDesconocido):
+            response = self.vender_por_api((self.hilo, 1))
+        self.assertEqual(response.status_code, 503)
+        self.assertIn('Verifique antes de repetirla', response.data['error'])
+
+    def test_reporta_todas_las_lineas_sin_stock(self):
+        response = self.vender_por_api((self.hilo, 6), (self.gorra, 3), (self.hilo, 6))
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            sorted(f['producto'] for f in response.data['faltantes']),
+            sorted([self.hilo.id, self.gorra.id])
+        )
+        # No se guarda nada de la venta
+        self.hilo.refresh_from_db()
+        self.assertEqual(self.hilo.cantidad_actual, Decimal('10'))
+        self.assertFalse(VentaDirecta.objects.exists())
+        self.assertFalse(MovimientoInventario.objects.exists())
+
+    def test_consultas_constantes_sin_importar_las_lineas(self):
+        productos = [self.crear_producto(f'Producto {i}', '100', '200') for i in range(8)]
+        self.vender_por_api((self.hilo, 1))  # La fila del resumen diario ya existe
+
+        with CaptureQueriesContext(connection) as una:
+            self.vender_por_api((productos[0], 1))
+        with CaptureQueriesContext(connection) as ocho:
+            self.vender_por_api(*[(p, 1) for p in productos])
+
+        self.assertEqual(len(ocho), len(una))
+
+
+class RegistrarPagoTests(FinanzasTestCase):
+    url = '/api/finanzas/pagos-pedidos/'
+
+    def pagar(self, monto, pedido=None):
+        return self.client.post(self.url, {
+            'pedido': (pedido or self.pedido).id, 'monto': str(monto),
+            'metodo_pago': 'transferencia', 'concepto': 'Adelanto'
+        }, format='json')
+
+    def test_sube_el_adelanto_y_el_resumen_diario(self):
+        response = self.pagar('200000')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['pedido_saldo_actualizado'], '300000.00')
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.adelanto_pagado, Decimal('200000'))
+        ingreso = IngresoDiario.objects.get(fuente='pago_pedido')
+        self.assertEqual((ingreso.total, ingreso.cantidad), (Decimal('200000'), 1))
+
+    def test_rechaza_pagar_de_mas(self):
+        self.pagar('400000')
+        response = self.pagar('100001')
+
+        self.assertEqual(response.status_code, 400)
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.adelanto_pagado, Decimal('400000'))
+        self.assertEqual(PagoPedido.objects.count(), 1)
+
+    def test_agregar_pago_desde_pedidos(self):
+        url = f'/api/pedidos/pedidos/{self.pedido.id}/agregar_pago/'
+        response = self.client.post(url, {'monto': '500000'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['esta_pagado'])
+        response = self.client.post(url, {'monto': '1'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_lote_de_pagos_todo_o_nada(self):
+        otro = Pedido.objects.create(
+            cliente=self.cliente, fecha_entrega_prometida=timezone.now(),
+            tipo_bordado='manual', descripcion='Parche', precio_total=Decimal('1000')
+        )
+        url = f'{self.url}lote/'
+
+        response = self.client.post(url, {'pagos': [
+            {'pedido': self.pedido.id, 'monto': '100', 'metodo_pago': 'transferencia'},
+            {'pedido': otro.id, 'monto': '1500', 'metodo_pago': 'transferencia'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e['pedido'] for e in response.data['errores']], [otro.id])
+        self.assertFalse(PagoPedido.objects.exists())
 
-# Create your tests here.
+        response = self.client.post(url, {'pagos': [
+            {'pedido': self.pedido.id, 'monto': '100', 'metodo_pago': 'transferencia'},
+            {'pedido': otro.id, 'monto': '600', 'metodo_pago': 'transferencia'},
+            {'pedido': otro.id, 'monto': '400', 'metodo_pago': 'transferencia'},
+        ]}, format='json')
+        self.assertEqual(response.status_code, 201)
+        otro.refresh_from_db()
+        self.assertTrue(otro.esta_pagado)
+        ingreso = IngresoDiario.objects.get(fuente='pago_pedido', metodo_pago='transferencia')
+        self.assertEqual((ingreso.total, ingreso.cantidad), (Decimal('1100'), 3))
@@ -0,0 +1,165 @@
+"""
+Registro de ventas directas con descuento de stock por conjuntos
+
+Todas las líneas de la venta descuentan stock con un solo UPDATE condicional
+(`cantidad_actual = cantidad_actual - x WHERE cantidad_actual >= x`), así que
+dos ventas simultáneas no pueden dejar un producto en negativo: la segunda ve
+el stock ya descontado y la venta completa se revierte. Los detalles y los
+movimientos de inventario se insertan con bulk_create, por lo que el costo de
+una venta no crece con el número de líneas.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.utils import timezone
+
+from backend import metricas
+from backend.cache import invalidar
+from inventario.models import Producto
+from .models import DetalleVentaDirecta, MovimientoInventario
+
+# Reintentos si el stock cambió entre el UPDATE fallido y la lectura del reporte
+INTENTOS = 3
+
+
+class StockInsuficiente(Exception):
+    """La venta no se registró porque una o más líneas no tienen stock"""
+
+    def __init__(self, faltantes):
+        self.faltantes = faltantes
+        super().__init__('; '.join(f['mensaje'] for f in faltantes))
+
+
+class _CarreraDeStock(Exception):
+    pass
+
+
+def leer_lineas(detalles_data):
+    """Convertir los detalles del request en (producto_id, cantidad, precio_unitario)"""
+    lineas = []
+    for detalle in detalles_data:
+        cantidad = Decimal(str(detalle.get('cantidad', 0)))
+        if cantidad <= 0:
+            raise ValueError('La cantidad de cada producto debe ser mayor a cero')
+        lineas.append((
+            int(detalle['producto']),
+            cantidad,
+            Decimal(str(detalle['precio_unitario'])),
+        ))
+    return lineas
+
+
+def _por_producto(lineas):
+    cantidades = defaultdict(Decimal)
+    for producto_id, cantidad, _ in lineas:
+        cantidades[producto_id] += cantidad
+    return dict(cantidades)
+
+
+def _cantidad_por_producto(cantidades):
+    """CASE id WHEN ... THEN cantidad END"""
+    return Case(
+        *[When(pk=pk, then=Value(cantidad)) for pk, cantidad in cantidades.items()],
+        output_field=DecimalField(max_digits=8, decimal_places=2)
+    )
+
+
+def _descontar_stock(cantidades):
+    """UPDATE condicional de todas las líneas. Retorna cuántos productos se descontaron"""
+    return Producto.objects.filter(
+        pk__in=cantidades, cantidad_actual__gte=_cantidad_por_producto(cantidades)
+    ).update(
+        cantidad_actual=F('cantidad_actual') - _cantidad_por_producto(cantidades),
+        fecha_actualizacion=timezone.now()
+    )
+
+
+def _faltantes(cantidades):
+    """Líneas que no se pueden cubrir con el stock actual"""
+    productos = Producto.objects.in_bulk(list(cantidades))
+    faltantes = []
+    for producto_id, solicitado in cantidades.items():
+        producto = productos.get(producto_id)
+        if producto is None:
+            faltantes.append({
+                'producto': producto_id, 'disponible': None, 'solicitado': solicitado,
+                'mensaje': f'Producto con ID {producto_id} no encontrado'
+            })
+        elif producto.cantidad_actual < solicitado:
+            faltantes.append({
+                'producto': producto_id, 'disponible': producto.cantidad_actual, 'solicitado': solicitado,
+                'mensaje': f'Stock insuficiente para {producto.nombre}. '
+                           f'Disponible: {producto.cantidad_actual}, Solicitado: {solicitado}'
+            })
+    return faltantes
+
+
+def registrar_venta(serializer, lineas):
+    """
+    Guardar la venta del serializer (ya validado) con sus líneas.
+    Lanza StockInsuficiente con todas las líneas sin stock; en ese caso no
+    se guarda nada.
+    """
+    cantidades = _por_producto(lineas)
+
+    for _ in range(INTENTOS):
+        try:
+            with transaction.atomic():
+                if _descontar_stock(cantidades) != len(cantidades):
+                    raise _CarreraDeStock
+                venta = _guardar(serializer, lineas)
+                transaction.on_commit(lambda: metricas.contar('bordados_ventas_registradas_total'))
+                return venta
+        except _CarreraDeStock:
+            faltantes = _faltantes(cantidades)
+            if faltantes:
+                metricas.contar('bordados_ventas_sin_stock_total')
+                raise StockInsuficiente(faltantes)
+            # Alguien repuso stock entre el UPDATE y la lectura: intentar de nuevo
+            metricas.contar('bordados_reintentos_total', operacion='venta')
+
+    metricas.contar('bordados_ventas_sin_stock_total')
+    raise StockInsuficiente(_faltantes(cantidades) or [{
+        'producto': None, 'disponible': None, 'solicitado': None,
+        'mensaje': 'El stock cambió mientras se registraba la venta, intente de nuevo'
+    }])
+
+
+def _guardar(serializer, lineas):
+    """Crear la venta, sus detalles y los movimientos (el stock ya está descontado)"""
+    venta = serializer.save()
+    productos = Producto.objects.in_bulk(list({producto_id for producto_id, _, _ in lineas}))
+
+    # Stock antes de la venta; cada línea parte de donde dejó la anterior
+    restante = {
+        pk: productos[pk].cantidad_actual + cantidad
+        for pk, cantidad in _por_producto(lineas).items()
+    }
+
+    detalles = []
+    movimientos = []
+    for producto_id, cantidad, precio_unitario in lineas:
+        detalles.append(DetalleVentaDirecta(
+            venta=venta, producto_id=producto_id, cantidad=cantidad,
+            precio_unitario=precio_unitario, subtotal=cantidad * precio_unitario
+        ))
+        movimientos.append(MovimientoInventario(
+            producto_id=producto_id,
+            tipo_movimiento='salida_venta',
+            cantidad=cantidad,
+            cantidad_anterior=restante[producto_id],
+            cantidad_nueva=restante[producto_id] - cantidad,
+            venta_directa=venta,
+            motivo=f'Venta directa #{venta.id}',
+            usuario='Sistema'
+        ))
+        restante[producto_id] -= cantidad
+
+    DetalleVentaDirecta.objects.bulk_create(detalles)
+    MovimientoInventario.objects.bulk_create(movimientos)
+
+    # bulk_create y update() no disparan las señales de la caché
+    invalidar('inventario', 'finanzas')
+    return venta
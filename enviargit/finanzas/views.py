@@ -1,26 +1,33 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count, F
-from django.db import transaction
-from django.utils import timezone
-from datetime import timedelta, date
+from django.db.models import Prefetch
 from decimal import Decimal
 from .models import VentaDirecta, DetalleVentaDirecta, PagoPedido, MovimientoInventario
 from .serializers import (
     VentaDirectaSerializer, PagoPedidoSerializer, MovimientoInventarioSerializer,
     ResumenFinancieroSerializer, ProductoVentasSerializer
 )
-from inventario.models import Producto
-from pedidos.models import Pedido
-from clientes.models import Cliente
+from .reportes import serie_ingresos, resumen_dashboard, ranking_productos
+from .ventas import registrar_venta, leer_lineas, StockInsuficiente
+from .pagos import registrar_pago, registrar_pagos, leer_pago, PagoRechazado
+from backend.fechas import filtrar_por_parametros
+from backend import escritura
+from backend.routers import en_reportes
 
 class VentaDirectaViewSet(viewsets.ModelViewSet):
     queryset = VentaDirecta.objects.select_related('cliente')
     serializer_class = VentaDirectaSerializer
+    ordering = ['-fecha_venta', '-id']
     
     def get_queryset(self):
-        queryset = VentaDirecta.objects.select_related('cliente')
+        # Plan de carga para VentaDirectaSerializer: cliente_info y detalles -> producto_info -> categoria
+        queryset = VentaDirecta.objects.select_related('cliente').prefetch_related(
+            Prefetch(
+                'detalles',
+                queryset=DetalleVentaDirecta.objects.select_related('producto__categoria')
+            )
+        )
         
         # Filtros opcionales
         fecha_desde = self.request.query_params.get('fecha_desde', None)
@@ -28,11 +35,7 @@ class VentaDirectaViewSet(viewsets.ModelViewSet):
         metodo_pago = self.request.query_params.get('metodo_pago', None)
         cliente = self.request.query_params.get('cliente', None)
         
-        if fecha_desde:
-            queryset = queryset.filter(fecha_venta__gte=fecha_desde)
-        
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_venta__lte=fecha_hasta)
+        queryset = filtrar_por_parametros(queryset, 'fecha_venta', fecha_desde, fecha_hasta)
         
         if metodo_pago:
             queryset = queryset.filter(metodo_pago=metodo_pago)
@@ -40,11 +43,10 @@ class VentaDirectaViewSet(viewsets.ModelViewSet):
         if cliente:
             queryset = queryset.filter(cliente_id=cliente)
         
-        return queryset.order_by('-fecha_venta')
+        return queryset.order_by(*self.ordering)
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
-        """Crear venta directa con manejo de transacciones"""
+        """Crear venta directa (registrar_venta es atómica; ver backend/escritura.py)"""
         try:
             # Validar datos básicos
             serializer = self.get_serializer(data=request.data)
@@ -58,51 +60,22 @@ class VentaDirectaViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Verificar stock disponible antes de crear la venta
-            for detalle_data in detalles_data:
-                producto_id = detalle_data.get('producto')
-                cantidad = Decimal(str(detalle_data.get('cantidad', 0)))
-                
-                try:
-                    producto = Producto.objects.get(id=producto_id)
-                    if producto.cantidad_actual < cantidad:
-                        return Response(
-                            {
-                                'error': f'Stock insuficiente para {producto.nombre}. '
-                                        f'Disponible: {producto.cantidad_actual}, Solicitado: {cantidad}'
-                            },
-                            status=status.HTTP_400_BAD_REQUEST
-                        )
-                except Producto.DoesNotExist:
-                    return Response(
-                        {'error': f'Producto con ID {producto_id} no encontrado'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            # Crear la venta
-            venta = serializer.save()
-            
-            # Crear los detalles
-            detalles_creados = []
-            for detalle_data in detalles_data:
-                detalle = DetalleVentaDirecta.objects.create(
-                    venta=venta,
-                    producto_id=detalle_data['producto'],
-                    cantidad=Decimal(str(detalle_data['cantidad'])),
-                    precio_unitario=Decimal(str(detalle_data['precio_unitario'])),
-                    subtotal=Decimal(str(detalle_data['subtotal']))
+            # Descontar stock de todas las líneas en un solo UPDATE condicional
+            lineas = leer_lineas(detalles_data)
+            try:
+                venta = escritura.ejecutar(lambda: registrar_venta(serializer, lineas))
+            except StockInsuficiente as e:
+                return Response(
+                    {'error': str(e), 'faltantes': e.faltantes},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
-                detalles_creados.append(detalle)
-            
-            # Actualizar última compra del cliente si existe
-            if venta.cliente:
-                venta.cliente.ultima_compra = timezone.now().date()
-                venta.cliente.save(update_fields=['ultima_compra'])
             
-            # Serializar la respuesta con los detalles
-            response_serializer = self.get_serializer(venta)
+            # Serializar la respuesta con los detalles (con el plan de carga del listado)
+            response_serializer = self.get_serializer(self.get_queryset().get(pk=venta.pk))
             return Response(response_serializer.data, status=status.HTTP_201_CREATED)
             
+        except escritura.ResultadoDesconocido as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response(
                 {'error': f'Error creando la venta: {str(e)}'}, 
@@ -112,6 +85,7 @@ class VentaDirectaViewSet(viewsets.ModelViewSet):
 class PagoPedidoViewSet(viewsets.ModelViewSet):
     queryset = PagoPedido.objects.select_related('pedido', 'pedido__cliente')
     serializer_class = PagoPedidoSerializer
+    ordering = ['-fecha_pago', '-id']
     
     def get_queryset(self):
         queryset = PagoPedido.objects.select_related('pedido', 'pedido__cliente')
@@ -121,44 +95,81 @@ class PagoPedidoViewSet(viewsets.ModelViewSet):
         fecha_hasta = self.request.query_params.get('fecha_hasta', None)
         pedido = self.request.query_params.get('pedido', None)
         
-        if fecha_desde:
-            queryset = queryset.filter(fecha_pago__gte=fecha_desde)
-        
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_pago__lte=fecha_hasta)
+        queryset = filtrar_por_parametros(queryset, 'fecha_pago', fecha_desde, fecha_hasta)
         
         if pedido:
             queryset = queryset.filter(pedido_id=pedido)
         
-        return queryset.order_by('-fecha_pago')
+        return queryset.order_by(*self.ordering)
     
     def create(self, request, *args, **kwargs):
-        """Actualizar saldo automáticamente al crear pago"""
-        # Crear el pago normalmente
-        response = super().create(request, *args, **kwargs)
+        """Registrar el pago y subir el adelanto del pedido en la misma transacción"""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        datos = dict(serializer.validated_data, pedido=serializer.validated_data['pedido'].pk)
         
-        if response.status_code == 201:  # Si se creó exitosamente
-            # Obtener el pago creado
-            pago_id = response.data['id']
-            pago = PagoPedido.objects.get(id=pago_id)
-            
-            # Actualizar el adelanto del pedido
-            pedido = pago.pedido
-            pedido.adelanto_pagado += Decimal(str(pago.monto))
-            pedido.save()
-            
-            # Actualizar la respuesta con información útil
-            response.data['pedido_saldo_actualizado'] = str(pedido.saldo_pendiente)
-            response.data['pedido_esta_pagado'] = pedido.esta_pagado
-            response.data['mensaje'] = f'Pago registrado. Saldo pendiente: ${pedido.saldo_pendiente}'
+        try:
+            pago = registrar_pago(datos)
+        except (PagoRechazado, ValueError) as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        pago = self.get_queryset().get(pk=pago.pk)
+        pedido = pago.pedido
+        data = self.get_serializer(pago).data
+        
+        # Actualizar la respuesta con información útil
+        data['pedido_saldo_actualizado'] = str(pedido.saldo_pendiente)
+        data['pedido_esta_pagado'] = pedido.esta_pagado
+        data['mensaje'] = f'Pago registrado. Saldo pendiente: ${pedido.saldo_pendiente}'
+        return Response(data, status=status.HTTP_201_CREATED)
+    
+    @action(detail=False, methods=['post'])
+    def lote(self, request):
+        """
+        Registrar varios pagos de distintos pedidos (conciliación de transferencias).
+        Todo o nada: si un pago se rechaza no se registra ninguno.
+        """
+        pagos_data = request.data.get('pagos', [])
+        if not pagos_data:
+            return Response(
+                {'error': 'Debe incluir al menos un pago'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        errores = []
+        pagos = []
+        for indice, pago_data in enumerate(pagos_data):
+            try:
+                pagos.append(leer_pago(pago_data))
+            except (ValueError, TypeError, AttributeError) as e:
+                errores.append({'indice': indice, 'mensaje': str(e)})
+        if errores:
+            return Response(
+                {'error': 'Hay pagos inválidos en el lote', 'errores': errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            creados = registrar_pagos(pagos)
+        except PagoRechazado as e:
+            return Response(
+                {'error': str(e), 'errores': e.errores},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        return response
+        return Response({
+            'mensaje': f'{len(creados)} pagos registrados',
+            'pagos': [pago.id for pago in creados],
+            'total': sum((pago.monto for pago in creados), Decimal('0')),
+        }, status=status.HTTP_201_CREATED)
 
 class MovimientoInventarioViewSet(viewsets.ModelViewSet):
     queryset = MovimientoInventario.objects.select_related('producto', 'producto__categoria')
     serializer_class = MovimientoInventarioSerializer
+    ordering = ['-fecha', '-id']
     
     def get_queryset(self):
+        # Plan de carga para MovimientoInventarioSerializer: producto_info -> categoria
         queryset = MovimientoInventario.objects.select_related('producto', 'producto__categoria')
         
         # Solo mostrar ventas directas
@@ -171,150 +182,51 @@ class MovimientoInventarioViewSet(viewsets.ModelViewSet):
         if producto:
             queryset = queryset.filter(producto_id=producto)
         
-        if fecha_desde:
-            queryset = queryset.filter(fecha__gte=fecha_desde)
+        queryset = filtrar_por_parametros(queryset, 'fecha', fecha_desde)
         
-        return queryset.order_by('-fecha')
+        return queryset.order_by(*self.ordering)
 
 class DashboardFinancieroViewSet(viewsets.ViewSet):
     """ViewSet especial para reportes y dashboard financiero"""
     
     @action(detail=False, methods=['get'])
+    @en_reportes
     def resumen_general(self, request):
         """Dashboard principal con todas las métricas"""
-        hoy = timezone.now().date()
-        inicio_semana = hoy - timedelta(days=hoy.weekday())
-        inicio_mes = hoy.replace(day=1)
-        
-        # Ingresos por ventas directas
-        ventas_hoy = VentaDirecta.objects.filter(fecha_venta__date=hoy).aggregate(
-            Sum('total'))['total__sum'] or Decimal('0')
-        
-        ventas_semana = VentaDirecta.objects.filter(fecha_venta__date__gte=inicio_semana).aggregate(
-            Sum('total'))['total__sum'] or Decimal('0')
-        
-        ventas_mes = VentaDirecta.objects.filter(fecha_venta__date__gte=inicio_mes).aggregate(
-            Sum('total'))['total__sum'] or Decimal('0')
-        
-        # Ingresos por servicios de bordado (pagos de pedidos)
-        pagos_hoy = PagoPedido.objects.filter(fecha_pago__date=hoy).aggregate(
-            Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        pagos_semana = PagoPedido.objects.filter(fecha_pago__date__gte=inicio_semana).aggregate(
-            Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        pagos_mes = PagoPedido.objects.filter(fecha_pago__date__gte=inicio_mes).aggregate(
-            Sum('monto'))['monto__sum'] or Decimal('0')
-        
-        # Totales combinados
-        ingresos_hoy = ventas_hoy + pagos_hoy
-        ingresos_semana = ventas_semana + pagos_semana
-        ingresos_mes = ventas_mes + pagos_mes
-        
-        # Pedidos pendientes de pago
-        pedidos_pendientes_pago = Pedido.objects.filter(
-            adelanto_pagado__lt=F('precio_total')
-        ).aggregate(
-            total=Sum(F('precio_total') - F('adelanto_pagado'))
-        )['total'] or Decimal('0')
-        
-        # Productos bajo stock
-        productos_bajo_stock = Producto.objects.filter(
-            cantidad_actual__lte=F('stock_minimo')
-        ).count()
-        
-        # Pedidos en proceso
-        pedidos_en_proceso = Pedido.objects.filter(
-            estado__in=['en_proceso', 'terminado']
-        ).count()
-        
-        # Clientes nuevos este mes
-        clientes_nuevos_mes = Cliente.objects.filter(
-            fecha_registro__gte=inicio_mes
-        ).count()
-        
-        data = {
-            'ingresos_hoy': ingresos_hoy,
-            'ingresos_semana': ingresos_semana,
-            'ingresos_mes': ingresos_mes,
-            'pedidos_pendientes_pago': pedidos_pendientes_pago,
-            'productos_bajo_stock': productos_bajo_stock,
-            'pedidos_en_proceso': pedidos_en_proceso,
-            'clientes_nuevos_mes': clientes_nuevos_mes
-        }
+        data = resumen_dashboard()
         
         serializer = ResumenFinancieroSerializer(data)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @en_reportes
     def productos_mas_vendidos(self, request):
         """Reporte de productos más vendidos"""
-        dias = int(request.query_params.get('dias', 30))
-        fecha_desde = timezone.now().date() - timedelta(days=dias)
+        metrica = request.query_params.get('metrica', 'ingresos')  # ingresos, cantidad, ganancia
+        categoria = request.query_params.get('categoria', None)
         
-        # Ventas directas
-        ventas_directas = DetalleVentaDirecta.objects.filter(
-            venta__fecha_venta__date__gte=fecha_desde
-        ).values(
-            'producto__nombre'
-        ).annotate(
-            total_vendido=Sum('subtotal'),
-            cantidad_vendida=Sum('cantidad')
-        )
-        
-        # Calcular ganancia (precio_venta - precio_compra) * cantidad
-        productos_vendidos = []
-        for venta in ventas_directas:
-            try:
-                producto = Producto.objects.get(nombre=venta['producto__nombre'])
-                ganancia_unitaria = producto.precio_venta - producto.precio_compra
-                ganancia_total = ganancia_unitaria * venta['cantidad_vendida']
-                
-                productos_vendidos.append({
-                    'producto_nombre': venta['producto__nombre'],
-                    'total_vendido': venta['total_vendido'],
-                    'cantidad_vendida': venta['cantidad_vendida'],
-                    'ganancia': ganancia_total
-                })
-            except Producto.DoesNotExist:
-                continue
-        
-        # Ordenar por total vendido
-        productos_vendidos.sort(key=lambda x: x['total_vendido'], reverse=True)
+        try:
+            dias = int(request.query_params.get('dias', 30))
+            limite = min(int(request.query_params.get('limite', 10)), 100)
+            productos_vendidos = ranking_productos(
+                dias=dias, metrica=metrica, limite=limite, categoria=categoria
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        serializer = ProductoVentasSerializer(productos_vendidos[:10], many=True)
+        serializer = ProductoVentasSerializer(productos_vendidos, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['get'])
+    @en_reportes
     def ingresos_por_periodo(self, request):
         """Gráfico de ingresos por período"""
-        periodo = request.query_params.get('periodo', 'mes')  # dia, semana, mes
-        dias = int(request.query_params.get('dias', 30))
-        
-        ingresos_por_fecha = []
-        fecha_actual = timezone.now().date()
+        periodo = request.query_params.get('periodo', 'dia')  # dia, semana, mes
         
-        for i in range(dias):
-            fecha = fecha_actual - timedelta(days=i)
-            
-            ventas_dia = VentaDirecta.objects.filter(
-                fecha_venta__date=fecha
-            ).aggregate(Sum('total'))['total__sum'] or Decimal('0')
-            
-            pagos_dia = PagoPedido.objects.filter(
-                fecha_pago__date=fecha
-            ).aggregate(Sum('monto'))['monto__sum'] or Decimal('0')
-            
-            total_dia = ventas_dia + pagos_dia
-            
-            ingresos_por_fecha.append({
-                'fecha': fecha,
-                'ingresos_ventas': ventas_dia,
-                'ingresos_servicios': pagos_dia,
-                'total': total_dia
-            })
-        
-        # Ordenar por fecha ascendente
-        ingresos_por_fecha.reverse()
+        try:
+            dias = int(request.query_params.get('dias', 30))
+            ingresos_por_fecha = serie_ingresos(periodo=periodo, dias=dias)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         return Response(ingresos_por_fecha)
\ No newline at end of file
@@ -27,7 +27,8 @@ const ClientDetail = ({ client, onClose, onEdit, onReload }) => {
   const loadHistorialPedidos = async () => {
     try {
       setLoading(true);
-      const response = await clientesAPI.getHistorialPedidos(client.id);
+      // Historial completo: esta pantalla no sigue el enlace `next`
+      const response = await clientesAPI.getHistorialPedidos(client.id, { paginar: false });
       setHistorialPedidos(response.data);
     } catch (error) {
       console.error('Error cargando historial:', error);
@@ -77,11 +77,19 @@ const AdvancedReports = () => {
     }
   };
 
+  // Agrupar rangos largos por semana o mes para no descargar una fila por día
+  const periodoParaRango = (dias) => {
+    const totalDias = parseInt(dias);
+    if (totalDias > 180) return 'mes';
+    if (totalDias > 60) return 'semana';
+    return 'dia';
+  };
+
   const loadRentabilidadData = async () => {
     const [resumenResponse, ventasResponse, ingresosPorDiaResponse] = await Promise.all([
       finanzasAPI.getResumenGeneral(),
       finanzasAPI.getProductosMasVendidos({ dias: dateRange }),
-      finanzasAPI.getIngresosPorPeriodo({ dias: dateRange })
+      finanzasAPI.getIngresosPorPeriodo({ dias: dateRange, periodo: periodoParaRango(dateRange) })
     ]);
 
     // Calcular métricas de rentabilidad
@@ -135,34 +143,27 @@ const AdvancedReports = () => {
   };
 
   const loadClientesData = async () => {
-    const [estadisticasResponse, pedidosResponse] = await Promise.all([
+    const [estadisticasResponse, pedidosResponse, topResponse] = await Promise.all([
       clientesAPI.getEstadisticasClientes(),
-      pedidosAPI.getPedidos()
+      pedidosAPI.getPedidos(),
+      clientesAPI.getTopClientes({ limite: 5 })
     ]);
 
     // Análisis de clientes
     const clientesPorMes = {};
-    const ventasPorCliente = {};
     
     pedidosResponse.data.forEach(pedido => {
       const mes = new Date(pedido.fecha_pedido).getMonth();
       clientesPorMes[mes] = (clientesPorMes[mes] || 0) + 1;
-      
-      const clienteId = pedido.cliente;
-      if (!ventasPorCliente[clienteId]) {
-        ventasPorCliente[clienteId] = {
-          nombre: pedido.cliente_nombre,
-          totalPedidos: 0,
-          totalGastado: 0
-        };
-      }
-      ventasPorCliente[clienteId].totalPedidos += 1;
-      ventasPorCliente[clienteId].totalGastado += parseFloat(pedido.precio_total);
     });
 
-    const topClientes = Object.values(ventasPorCliente)
-      .sort((a, b) => b.totalGastado - a.totalGastado)
-      .slice(0, 5);
+    // Los totales por cliente los mantiene el servidor (métricas acumuladas)
+    const topClientes = topResponse.data.map(cliente => ({
+      nombre: cliente.nombre,
+      totalPedidos: cliente.total_pedidos,
+      totalGastado: parseFloat(cliente.total_comprado),
+      totalFacturado: parseFloat(cliente.total_facturado)
+    }));
 
     setReportData({
       estadisticas: estadisticasResponse.data,
@@ -585,7 +586,9 @@ const AdvancedReports = () => {
                     {formatCurrency(cliente.totalGastado)}
                   </div>
                   <div style={{ fontSize: '0.75rem', color: '#6b7280' }}>
-                    {formatCurrency(cliente.totalGastado / cliente.totalPedidos)}/pedido
+                    {cliente.totalPedidos > 0
+                      ? `${formatCurrency(cliente.totalFacturado / cliente.totalPedidos)}/pedido`
+                      : 'Solo ventas directas'}
                   </div>
                 </div>
               </div>
@@ -19,16 +19,28 @@ api.interceptors.response.use(
   }
 );
 
+// Los listados de la API paginan por cursor (?page_size=N, ?cursor=...).
+// Mientras cada pantalla migra, se piden completos con ?paginar=false.
+const SIN_PAGINAR = { paginar: false };
+const listado = (url, params = {}) => api.get(url, { params: { ...SIN_PAGINAR, ...params } });
+
+// Para pantallas ya migradas: seguir el enlace `next` o `previous` de una página
+export const getPagina = (url) => api.get(url);
+
+// Búsqueda global (typeahead): clientes, productos y pedidos desde el índice del servidor
+// tipos: 'cliente,producto,pedido' (opcional)
+export const buscar = (q, params = {}) => api.get('/buscar/', { params: { q, ...params } });
+
 // === SERVICIOS DE INVENTARIO ===
 export const inventarioAPI = {
   // Categorías
-  getCategorias: () => api.get('/inventario/categorias/'),
+  getCategorias: () => listado('/inventario/categorias/'),
   createCategoria: (data) => api.post('/inventario/categorias/', data),
   updateCategoria: (id, data) => api.put(`/inventario/categorias/${id}/`, data),
   deleteCategoria: (id) => api.delete(`/inventario/categorias/${id}/`),
 
   // Productos
-  getProductos: (params = {}) => api.get('/inventario/productos/', { params }),
+  getProductos: (params = {}) => listado('/inventario/productos/', params),
   getProducto: (id) => api.get(`/inventario/productos/${id}/`),
   createProducto: (data) => api.post('/inventario/productos/', data),
   updateProducto: (id, data) => api.put(`/inventario/productos/${id}/`, data),
@@ -39,19 +51,22 @@ export const inventarioAPI = {
 
 // === SERVICIOS DE CLIENTES ===
 export const clientesAPI = {
-  getClientes: (params = {}) => api.get('/clientes/clientes/', { params }),
+  getClientes: (params = {}) => listado('/clientes/clientes/', params),
   getCliente: (id) => api.get(`/clientes/clientes/${id}/`),
   createCliente: (data) => api.post('/clientes/clientes/', data),
   updateCliente: (id, data) => api.put(`/clientes/clientes/${id}/`, data),
   deleteCliente: (id) => api.delete(`/clientes/clientes/${id}/`),
   getResumenClientes: () => api.get('/clientes/clientes/resumen/'),
   getEstadisticasClientes: () => api.get('/clientes/clientes/estadisticas/'),
-  getHistorialPedidos: (id) => api.get(`/clientes/clientes/${id}/historial_pedidos/`),
+  // Paginado por cursor: `pedidos` trae la primera página y `next` la siguiente
+  getHistorialPedidos: (id, params = {}) => api.get(`/clientes/clientes/${id}/historial_pedidos/`, { params }),
+  // Mejores clientes por métricas acumuladas: orden 'comprado' (por defecto) o 'saldo'
+  getTopClientes: (params = {}) => api.get('/clientes/clientes/top/', { params }),
 };
 
 // === SERVICIOS DE PEDIDOS ===
 export const pedidosAPI = {
-  getPedidos: (params = {}) => api.get('/pedidos/pedidos/', { params }),
+  getPedidos: (params = {}) => listado('/pedidos/pedidos/', params),
   getPedido: (id) => api.get(`/pedidos/pedidos/${id}/`),
   createPedido: (data) => api.post('/pedidos/pedidos/', data),
   updatePedido: (id, data) => api.put(`/pedidos/pedidos/${id}/`, data),
@@ -64,13 +79,14 @@ export const pedidosAPI = {
 // === SERVICIOS DE FINANZAS ===
 export const finanzasAPI = {
   // Pagos de pedidos
-  getPagos: (params = {}) => api.get('/finanzas/pagos-pedidos/', { params }),
+  getPagos: (params = {}) => listado('/finanzas/pagos-pedidos/', params),
   createPago: (data) => api.post('/finanzas/pagos-pedidos/', data),
+  createPagosLote: (pagos) => api.post('/finanzas/pagos-pedidos/lote/', { pagos }),
   updatePago: (id, data) => api.put(`/finanzas/pagos-pedidos/${id}/`, data),
   deletePago: (id) => api.delete(`/finanzas/pagos-pedidos/${id}/`),
 
   // Ventas directas
-  getVentas: (params = {}) => api.get('/finanzas/ventas-directas/', { params }),
+  getVentas: (params = {}) => listado('/finanzas/ventas-directas/', params),
   createVenta: (data) => api.post('/finanzas/ventas-directas/', data),
 
   // Dashboard financiero
@@ -79,7 +95,7 @@ export const finanzasAPI = {
   getIngresosPorPeriodo: (params = {}) => api.get('/finanzas/dashboard/ingresos_por_periodo/', { params }),
 
   // Movimientos de inventario
-  getMovimientos: (params = {}) => api.get('/finanzas/movimientos-inventario/', { params }),
+  getMovimientos: (params = {}) => listado('/finanzas/movimientos-inventario/', params),
 };
 
 // === UTILIDADES ===
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventario', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='producto',
+            index=models.Index(fields=['-fecha_creacion', '-id'], name='inventario__fecha_c_7c0dae_idx'),
+        ),
+    ]
@@ -108,6 +108,7 @@ class Producto(models.Model):
             models.Index(fields=['categoria', 'nombre']),
             models.Index(fields=['cantidad_actual', 'stock_minimo']),  # Para alertas de stock
             models.Index(fields=['-fecha_creacion']),
+            models.Index(fields=['-fecha_creacion', '-id']),  # Paginación por cursor
         ]
         
         # Constraint para evitar precios negativos
@@ -0,0 +1,18 @@
+"""
+Consultas para las alertas de inventario
+"""
+from django.db.models import F
+
+from backend.cache import en_cache
+from .models import Producto
+from .serializers import ProductoSerializer
+
+
+@en_cache('inventario.alertas_stock', dominios=['inventario'])
+def alertas_stock():
+    """Productos que necesitan restock, ya serializados"""
+    productos_bajo_stock = Producto.objects.select_related('categoria').filter(
+        cantidad_actual__lte=F('stock_minimo')
+    ).order_by('cantidad_actual')
+    
+    return list(ProductoSerializer(productos_bajo_stock, many=True).data)
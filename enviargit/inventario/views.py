@@ -1,3 +1,5 @@
+from decimal import Decimal
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -5,17 +7,22 @@ from django.db.models import Q, F
 from django.db import transaction
 from .models import Categoria, Producto
 from .serializers import CategoriaSerializer, ProductoSerializer
+from .reportes import alertas_stock
+from backend import escritura
+from backend.routers import en_reportes
 
 class CategoriaViewSet(viewsets.ModelViewSet):
     queryset = Categoria.objects.all()
     serializer_class = CategoriaSerializer
+    ordering = ['nombre', 'id']
     
     def get_queryset(self):
-        return Categoria.objects.all().order_by('nombre')
+        return Categoria.objects.all().order_by(*self.ordering)
 
 class ProductoViewSet(viewsets.ModelViewSet):
     queryset = Producto.objects.all()  # ← ESTA LÍNEA ES IMPORTANTE
     serializer_class = ProductoSerializer
+    ordering = ['-fecha_creacion', '-id']
     
     def get_queryset(self):
         queryset = Producto.objects.select_related('categoria').all()
@@ -38,7 +45,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 Q(color__icontains=buscar)
             )
         
-        return queryset.order_by('-fecha_creacion')
+        return queryset.order_by(*self.ordering)
     
     @transaction.atomic
     def create(self, request, *args, **kwargs):
@@ -110,14 +117,10 @@ class ProductoViewSet(viewsets.ModelViewSet):
             )
     
     @action(detail=False, methods=['get'])
+    @en_reportes
     def alertas_stock(self, request):
         """Productos que necesitan restock"""
-        productos_bajo_stock = Producto.objects.select_related('categoria').filter(
-            cantidad_actual__lte=F('stock_minimo')
-        ).order_by('cantidad_actual')
-        
-        serializer = self.get_serializer(productos_bajo_stock, many=True)
-        return Response(serializer.data)
+        return Response(alertas_stock())
     
     @action(detail=True, methods=['post'])
     def ajustar_stock(self, request, pk=None):
@@ -139,7 +142,7 @@ class ProductoViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            nueva_cantidad = float(nueva_cantidad)
+            nueva_cantidad = Decimal(str(nueva_cantidad))
             if nueva_cantidad < 0:
                 return Response(
                     {'error': 'La cantidad no puede ser negativa'},
@@ -151,17 +154,20 @@ class ProductoViewSet(viewsets.ModelViewSet):
             
             cantidad_anterior = producto.cantidad_actual
             producto.cantidad_actual = nueva_cantidad
-            producto.save()
-            
-            MovimientoInventario.objects.create(
-                producto=producto,
-                tipo_movimiento='ajuste',
-                cantidad=nueva_cantidad - cantidad_anterior,
-                cantidad_anterior=cantidad_anterior,
-                cantidad_nueva=nueva_cantidad,
-                motivo=motivo,
-                usuario=request.user.username if request.user.is_authenticated else 'Sistema'
-            )
+            
+            def ajustar():
+                producto.save()
+                MovimientoInventario.objects.create(
+                    producto=producto,
+                    tipo_movimiento='ajuste',
+                    cantidad=nueva_cantidad - cantidad_anterior,
+                    cantidad_anterior=cantidad_anterior,
+                    cantidad_nueva=nueva_cantidad,
+                    motivo=motivo,
+                    usuario=request.user.username if request.user.is_authenticated else 'Sistema'
+                )
+            
+            escritura.ejecutar(ajustar)
             
             serializer = self.get_serializer(producto)
             return Response({
@@ -169,6 +175,8 @@ class ProductoViewSet(viewsets.ModelViewSet):
                 'producto': serializer.data
             })
             
+        except escritura.ResultadoDesconocido as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             return Response(
                 {'error': f'Error ajustando stock: {str(e)}'},
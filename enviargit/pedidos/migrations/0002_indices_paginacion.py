@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+        ('pedidos', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['-fecha_pedido', '-id'], name='pedidos_ped_fecha_p_a3bd21_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clientes', '0002_indices_paginacion'),
+        ('pedidos', '0002_indices_paginacion'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='pedido',
+            index=models.Index(fields=['estado', 'fecha_entrega_prometida'], name='pedidos_ped_estado_f52383_idx'),
+        ),
+    ]
@@ -1,4 +1,6 @@
-from django.db import models
+from decimal import Decimal
+
+from django.db import models, transaction
 from django.utils import timezone
 from clientes.models import Cliente
 from inventario.models import Producto
@@ -35,12 +37,21 @@ class Pedido(models.Model):
     
     # Precios y pagos
     precio_total = models.DecimalField(max_digits=10, decimal_places=2)
-    adelanto_pagado = models.DecimalField(max_digits=10, decimal_places=2, default=0.00)
+    adelanto_pagado = models.DecimalField(max_digits=10, decimal_places=2, default=Decimal('0.00'))
     
     # Información adicional
     notas_internas = models.TextField(blank=True)
     archivo_diseno = models.CharField(max_length=200, blank=True)
     
+    def save(self, *args, **kwargs):
+        # Atómico para que las métricas del cliente (clientes/metricas.py) se actualicen en la misma transacción
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            return super().delete(*args, **kwargs)
+    
     def __str__(self):
         return f"Pedido #{self.id} - {self.cliente.nombre}"
     
@@ -54,6 +65,10 @@ class Pedido(models.Model):
     
     class Meta:
         verbose_name_plural = "Pedidos"
+        indexes = [
+            models.Index(fields=['-fecha_pedido', '-id']),  # Paginación por cursor
+            models.Index(fields=['estado', 'fecha_entrega_prometida']),  # Entregas pendientes del dashboard
+        ]
 
 class DetallePedido(models.Model):
     pedido = models.ForeignKey(Pedido, on_delete=models.CASCADE, related_name='detalles')
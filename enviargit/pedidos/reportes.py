@@ -0,0 +1,102 @@
+"""
+Consultas agregadas para el dashboard de pedidos
+"""
+from datetime import timedelta
+
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from backend.cache import en_cache
+from backend.fechas import rango_fechas
+from .models import Pedido
+
+
+def consultas_por_fecha(hoy=None):
+    """
+    Consultas del dashboard filtradas por rango de fechas.
+    El comando `verificar_planes` revisa que ninguna recorra la tabla completa.
+    """
+    hoy = hoy or timezone.localdate()
+    inicio_mes = hoy.replace(day=1)
+    fin_mes = (inicio_mes + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    pedidos = Pedido.objects.all()
+    
+    return {
+        # Pedidos que deben entregarse hoy
+        'pendientes_entrega_hoy': pedidos.filter(
+            rango_fechas('fecha_entrega_prometida', hoy, hoy),
+            estado__in=['en_proceso', 'terminado']
+        ),
+        # Pedidos por entregar esta semana
+        'pendientes_esta_semana': pedidos.filter(
+            rango_fechas('fecha_entrega_prometida', hoy, hoy + timedelta(days=7)),
+            estado__in=['recibido', 'en_proceso', 'terminado']
+        ),
+        # Pedidos próximos a vencer
+        'proximos_a_vencer': pedidos.filter(
+            rango_fechas('fecha_entrega_prometida', hoy, hoy + timedelta(days=3)),
+            estado__in=['recibido', 'en_proceso']
+        ),
+        'pedidos_este_mes': pedidos.filter(
+            rango_fechas('fecha_pedido', inicio_mes, fin_mes)
+        ),
+    }
+
+
+@en_cache('pedidos.dashboard', dominios=['pedidos'])
+def dashboard_pedidos():
+    """Métricas del dashboard de pedidos"""
+    hoy = timezone.localdate()
+    por_fecha = consultas_por_fecha(hoy)
+    
+    # Estadísticas básicas
+    todos_los_pedidos = Pedido.objects.all()
+    total_pedidos = todos_los_pedidos.count()
+    
+    # Pedidos activos (no entregados ni cancelados)
+    pedidos_activos = todos_los_pedidos.exclude(
+        estado__in=['entregado', 'cancelado']
+    ).count()
+    
+    pendientes_entrega_hoy = por_fecha['pendientes_entrega_hoy'].count()
+    pendientes_esta_semana = por_fecha['pendientes_esta_semana'].count()
+    
+    # Pedidos por estado
+    por_estado = todos_los_pedidos.values('estado').annotate(
+        total=Count('id')
+    ).order_by('estado')
+    
+    # Cálculos financieros
+    aggregated_data = todos_los_pedidos.aggregate(
+        total_facturado=Sum('precio_total'),
+        total_pagado=Sum('adelanto_pagado')
+    )
+    
+    total_facturado = aggregated_data['total_facturado'] or 0
+    total_pagado = aggregated_data['total_pagado'] or 0
+    ingresos_pendientes = total_facturado - total_pagado
+    
+    # Estadísticas adicionales
+    pedidos_este_mes = por_fecha['pedidos_este_mes'].count()
+    
+    promedio_pedido = total_facturado / total_pedidos if total_pedidos > 0 else 0
+    
+    proximos_a_vencer = por_fecha['proximos_a_vencer'].count()
+    
+    response_data = {
+        'total_pedidos': total_pedidos,
+        'pedidos_activos': pedidos_activos,
+        'pedidos_este_mes': pedidos_este_mes,
+        'pendientes_entrega_hoy': pendientes_entrega_hoy,
+        'pendientes_esta_semana': pendientes_esta_semana,
+        'proximos_a_vencer': proximos_a_vencer,
+        'distribucion_por_estado': list(por_estado),
+        'ingresos_pendientes': float(ingresos_pendientes),
+        'total_facturado': float(total_facturado),
+        'total_cobrado': float(total_pagado),
+        'promedio_pedido': float(promedio_pedido),
+        'porcentaje_cobrado': float((total_pagado / total_facturado * 100) if total_facturado > 0 else 0),
+        'timestamp': timezone.now().isoformat()
+    }
+    
+    return response_data
@@ -1,3 +1,84 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from clientes.models import Cliente
+from inventario.models import Categoria, Producto
+from .models import Pedido, DetallePedido
+
+
+class PedidosTestCase(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.cliente = Cliente.objects.create(nombre='Ana Torres', telefono='3001234567')
+
+    def crear_pedido(self, estado='recibido', precio_total='100000', **kwargs):
+        return Pedido.objects.create(
+            cliente=kwargs.pop('cliente', self.cliente),
+            fecha_entrega_prometida=kwargs.pop('fecha_entrega_prometida', timezone.now() + timedelta(days=2)),
+            tipo_bordado='computarizado',
+            descripcion='Logo bordado',
+            estado=estado,
+            precio_total=Decimal(precio_total),
+            **kwargs
+        )
+
+
+class DashboardPedidosTests(PedidosTestCase):
+    url = '/api/pedidos/pedidos/dashboard/'
+
+    def test_cache_se_invalida_al_guardar_pedidos(self):
+        self.crear_pedido()
+        self.assertEqual(self.client.get(self.url).data['total_pedidos'], 1)
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+        # La versión sube al confirmar la transacción
+        with self.captureOnCommitCallbacks(execute=True):
+            self.crear_pedido()
+        self.assertEqual(self.client.get(self.url).data['total_pedidos'], 2)
+
+    def test_marcar_entregados_invalida_el_cache(self):
+        pedido = self.crear_pedido(estado='terminado')
+        self.assertEqual(self.client.get(self.url).data['pedidos_activos'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/api/pedidos/pedidos/marcar_entregados/', {'pedido_ids': [pedido.id]}, format='json')
+
+        self.assertEqual(self.client.get(self.url).data['pedidos_activos'], 0)
+
+class ListadoPedidosTests(PedidosTestCase):
+    url = '/api/pedidos/pedidos/'
+
+    def crear_pedidos(self, n, lineas=3):
+        categoria, _ = Categoria.objects.get_or_create(nombre='Hilos')
+        for _ in range(n):
+            pedido = self.crear_pedido()
+            for i in range(lineas):
+                producto = Producto.objects.create(
+                    nombre=f'Hilo {pedido.id}-{i}', categoria=categoria,
+                    precio_compra=Decimal('100'), precio_venta=Decimal('200')
+                )
+                DetallePedido.objects.create(pedido=pedido, producto=producto, cantidad_usada=Decimal('1'))
+
+    def contar_consultas(self, url):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(consultas)
+
+    def test_consultas_constantes_al_crecer_las_filas(self):
+        self.crear_pedidos(1)
+        con_uno = self.contar_consultas(self.url)
+        self.crear_pedidos(5)
+        self.assertEqual(self.contar_consultas(self.url), con_uno)
 
-# Create your tests here.
+        pedido = Pedido.objects.first()
+        self.assertEqual(self.contar_consultas(f'{self.url}{pedido.id}/'), con_uno)
@@ -1,19 +1,29 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q, Sum, Count, F
+from django.db.models import F, Prefetch
 from django.utils import timezone
-from datetime import timedelta
-from decimal import Decimal
 from .models import Pedido, DetallePedido
-from .serializers import PedidoSerializer, PedidoResumenSerializer, DetallePedidoSerializer
+from .serializers import PedidoSerializer
+from .reportes import dashboard_pedidos
+from backend.cache import invalidar
+from backend.fechas import filtrar_por_parametros
+from backend import escritura
+from backend.routers import en_reportes
 
 class PedidoViewSet(viewsets.ModelViewSet):
     queryset = Pedido.objects.select_related('cliente')
     serializer_class = PedidoSerializer
+    ordering = ['-fecha_pedido', '-id']
     
     def get_queryset(self):
-        queryset = Pedido.objects.select_related('cliente')
+        # Plan de carga para PedidoSerializer: cliente_info y detalles -> producto_info -> categoria
+        queryset = Pedido.objects.select_related('cliente').prefetch_related(
+            Prefetch(
+                'detalles',
+                queryset=DetallePedido.objects.select_related('producto__categoria')
+            )
+        )
         
         # Filtros opcionales
         estado = self.request.query_params.get('estado', None)
@@ -33,91 +43,19 @@ class PedidoViewSet(viewsets.ModelViewSet):
         if cliente:
             queryset = queryset.filter(cliente_id=cliente)
         
-        if fecha_desde:
-            queryset = queryset.filter(fecha_pedido__gte=fecha_desde)
-        
-        if fecha_hasta:
-            queryset = queryset.filter(fecha_pedido__lte=fecha_hasta)
+        queryset = filtrar_por_parametros(queryset, 'fecha_pedido', fecha_desde, fecha_hasta)
         
         if pendiente_pago == 'true':
             queryset = queryset.filter(adelanto_pagado__lt=F('precio_total'))
         
-        return queryset.order_by('-fecha_pedido')
+        return queryset.order_by(*self.ordering)
     
     @action(detail=False, methods=['get'])
+    @en_reportes
     def dashboard(self, request):
         """Dashboard de pedidos"""
         try:
-            hoy = timezone.now().date()
-            
-            # Estadísticas básicas
-            todos_los_pedidos = Pedido.objects.all()
-            total_pedidos = todos_los_pedidos.count()
-            
-            # Pedidos activos (no entregados ni cancelados)
-            pedidos_activos = todos_los_pedidos.exclude(
-                estado__in=['entregado', 'cancelado']
-            ).count()
-            
-            # Pedidos que deben entregarse hoy
-            pendientes_entrega_hoy = todos_los_pedidos.filter(
-                fecha_entrega_prometida__date=hoy,
-                estado__in=['en_proceso', 'terminado']
-            ).count()
-            
-            # Pedidos por entregar esta semana
-            fin_semana = hoy + timedelta(days=7)
-            pendientes_esta_semana = todos_los_pedidos.filter(
-                fecha_entrega_prometida__date__gte=hoy,
-                fecha_entrega_prometida__date__lte=fin_semana,
-                estado__in=['recibido', 'en_proceso', 'terminado']
-            ).count()
-            
-            # Pedidos por estado
-            por_estado = todos_los_pedidos.values('estado').annotate(
-                total=Count('id')
-            ).order_by('estado')
-            
-            # Cálculos financieros
-            aggregated_data = todos_los_pedidos.aggregate(
-                total_facturado=Sum('precio_total'),
-                total_pagado=Sum('adelanto_pagado')
-            )
-            
-            total_facturado = aggregated_data['total_facturado'] or 0
-            total_pagado = aggregated_data['total_pagado'] or 0
-            ingresos_pendientes = total_facturado - total_pagado
-            
-            # Estadísticas adicionales
-            pedidos_este_mes = todos_los_pedidos.filter(
-                fecha_pedido__month=hoy.month,
-                fecha_pedido__year=hoy.year
-            ).count()
-            
-            promedio_pedido = total_facturado / total_pedidos if total_pedidos > 0 else 0
-            
-            # Pedidos próximos a vencer
-            proximos_a_vencer = todos_los_pedidos.filter(
-                fecha_entrega_prometida__date__lte=hoy + timedelta(days=3),
-                fecha_entrega_prometida__date__gte=hoy,
-                estado__in=['recibido', 'en_proceso']
-            ).count()
-            
-            response_data = {
-                'total_pedidos': total_pedidos,
-                'pedidos_activos': pedidos_activos,
-                'pedidos_este_mes': pedidos_este_mes,
-                'pendientes_entrega_hoy': pendientes_entrega_hoy,
-                'pendientes_esta_semana': pendientes_esta_semana,
-                'proximos_a_vencer': proximos_a_vencer,
-                'distribucion_por_estado': list(por_estado),
-                'ingresos_pendientes': float(ingresos_pendientes),
-                'total_facturado': float(total_facturado),
-                'total_cobrado': float(total_pagado),
-                'promedio_pedido': float(promedio_pedido),
-                'porcentaje_cobrado': float((total_pagado / total_facturado * 100) if total_facturado > 0 else 0),
-                'timestamp': timezone.now().isoformat()
-            }
+            response_data = dashboard_pedidos()
             
             return Response(response_data)
             
@@ -189,7 +127,7 @@ class PedidoViewSet(viewsets.ModelViewSet):
             if nuevo_estado == 'cancelado':
                 pedido.fecha_entrega_real = None
             
-            pedido.save()
+            escritura.ejecutar(pedido.save)
             
             # ⭐ NUEVO: Generar mensaje de notificación personalizado
             mensajes_estado = {
@@ -225,6 +163,8 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 }
             })
             
+        except escritura.ResultadoDesconocido as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             print(f"Error cambiando estado del pedido {pk}: {e}")
             return Response(
@@ -259,47 +199,31 @@ class PedidoViewSet(viewsets.ModelViewSet):
         """Registrar un pago para el pedido"""
         try:
             pedido = self.get_object()
-            monto = request.data.get('monto')
-            metodo_pago = request.data.get('metodo_pago', 'efectivo')
-            concepto = request.data.get('concepto', 'Pago parcial')
-            
-            if not monto:
+            if not request.data.get('monto'):
                 return Response(
                     {'error': 'Monto es requerido'}, 
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Validar que el monto no exceda el saldo pendiente
-            monto_decimal = Decimal(str(monto))
-            if monto_decimal > pedido.saldo_pendiente:
-                return Response(
-                    {'error': f'El monto no puede ser mayor al saldo pendiente ({pedido.saldo_pendiente})'}, 
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            # Crear registro de pago
-            from finanzas.models import PagoPedido
-            pago = PagoPedido.objects.create(
-                pedido=pedido,
-                monto=monto_decimal,
-                metodo_pago=metodo_pago,
-                concepto=concepto,
-                notas=request.data.get('notas', '')
-            )
-            
-            # Actualizar adelanto en el pedido
-            pedido.adelanto_pagado += monto_decimal
-            pedido.save()
+            # Inserta el pago y sube el adelanto con un UPDATE que rechaza pagar de más
+            from finanzas.pagos import registrar_pago, PagoRechazado
+            try:
+                pago = escritura.ejecutar(lambda: registrar_pago(request.data, pedido=pedido.pk))
+            except PagoRechazado as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
+            pedido.refresh_from_db(fields=['adelanto_pagado'])
             return Response({
                 'mensaje': 'Pago registrado exitosamente',
                 'pago_id': pago.id,
-                'monto_pagado': float(monto_decimal),
+                'monto_pagado': float(pago.monto),
                 'nuevo_saldo_pendiente': float(pedido.saldo_pendiente),
                 'esta_pagado': pedido.esta_pagado,
                 'adelanto_total': float(pedido.adelanto_pagado)
             })
             
+        except escritura.ResultadoDesconocido as e:
+            return Response({'error': str(e)}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
         except Exception as e:
             print(f"Error agregando pago al pedido {pk}: {e}")
             return Response(
@@ -328,6 +252,8 @@ class PedidoViewSet(viewsets.ModelViewSet):
                 estado='entregado',
                 fecha_entrega_real=timezone.now()
             )
+            # update() no dispara señales: invalidar la caché del dashboard a mano
+            invalidar('pedidos')
             
             return Response({
                 'mensaje': f'{count} pedido(s) marcado(s) como entregado(s)',